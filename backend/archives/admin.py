@@ -0,0 +1,60 @@
+from django.contrib import admin
+from django.db.models import Count
+from users.utils import get_coordinator_course_filter
+from .models import ArchivedStudent, SemesterArchive
+
+
+class ReadOnlyAdminMixin:
+    """Archives are written only by the archiving code, never by hand."""
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+def get_visible_archives(request):
+    archives = SemesterArchive.objects.all()
+    course_filter, is_coordinator = get_coordinator_course_filter(request)
+    if is_coordinator and course_filter:
+        return archives.filter(course_filter)
+    return archives
+
+
+@admin.register(SemesterArchive)
+class SemesterArchiveAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    list_display = ("semester", "course", "student_count", "created_by", "created_at")
+    list_filter = ("course",)
+    search_fields = ("semester",)
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request).annotate(student_count=Count("students"))
+        return qs.filter(id__in=get_visible_archives(request))
+
+    def student_count(self, obj):
+        return obj.student_count
+
+    student_count.short_description = "Students"
+    student_count.admin_order_field = "student_count"
+
+
+@admin.register(ArchivedStudent)
+class ArchivedStudentAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    list_display = (
+        "student_code",
+        "name",
+        "archive",
+        "mode",
+        "supervisor",
+        "total_mark",
+        "grade_letter",
+    )
+    list_filter = ("archive__course", "archive__semester", "mode")
+    search_fields = ("student_code", "name", "email", "supervisor")
+    list_select_related = ("archive",)
+    exclude = ("student",)
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.filter(archive__in=get_visible_archives(request))
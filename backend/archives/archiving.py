@@ -0,0 +1,264 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+
+from documents.models import Feedback, Logbook, StudentSubmission
+from grades.models import StudentGrade, StudentMark, StudentRubricScore
+from grades.signals import suspend_grade_updates
+from .models import ArchivedStudent, SemesterArchive
+
+# Live rows are deleted this many at a time, each batch in its own
+# transaction, so archiving a cohort never holds one long lock on a hot table
+ARCHIVE_CHUNK_SIZE = 1000
+
+# Per-student lists in ArchivedStudent, merged by the live row id when a
+# student is archived into the same semester twice
+ARCHIVED_LISTS = ("marks", "rubric_scores", "logbooks", "submissions")
+
+
+def current_semester(today=None):
+    """Semester label such as ``2025-S1`` (January-June) or ``2025-S2``."""
+    today = today or timezone.localdate()
+    return f"{today.year}-S{1 if today.month <= 6 else 2}"
+
+
+def _file_entry(field):
+    if not field:
+        return None
+    try:
+        size = field.size
+    except (OSError, ValueError):
+        # Missing from storage; the manifest still records the path
+        size = None
+    return {"name": field.name, "size": size}
+
+
+def _date(value):
+    return value.isoformat() if value else None
+
+
+def snapshot_students(students):
+    """
+    Unsaved ArchivedStudent rows for ``students``, read with one query per
+    table however many students there are.
+    """
+    student_ids = [student.id for student in students]
+    prefetch_related_objects(students, "user", "supervisor", "evaluators")
+
+    marks = defaultdict(list)
+    for mark in (
+        StudentMark.objects.filter(student_id__in=student_ids)
+        .select_related("criteria__rubric", "evaluator")
+        .order_by("criteria__rubric__steps", "criteria__rubric_id", "criteria_id", "id")
+    ):
+        marks[mark.student_id].append(
+            {
+                "id": mark.id,
+                "rubric": mark.criteria.rubric.label,
+                "criteria": mark.criteria.label,
+                "max_mark": mark.criteria.max_mark,
+                "evaluator": mark.evaluator.name if mark.evaluator else None,
+                "mark": mark.mark,
+            }
+        )
+
+    rubric_scores = defaultdict(list)
+    for score in (
+        StudentRubricScore.objects.filter(student_id__in=student_ids)
+        .select_related("rubric")
+        .order_by("rubric__steps", "rubric_id")
+    ):
+        rubric_scores[score.student_id].append(
+            {"id": score.id, "rubric": score.rubric.label, "score": score.score}
+        )
+
+    grades = {
+        grade.student_id: grade
+        for grade in StudentGrade.objects.filter(student_id__in=student_ids)
+        .select_related("grade")
+        .order_by("id")
+    }
+
+    logbooks = defaultdict(list)
+    for logbook in (
+        Logbook.objects.filter(student_id__in=student_ids)
+        .select_related("supervisor")
+        .order_by("date", "id")
+    ):
+        logbooks[logbook.student_id].append(
+            {
+                "id": logbook.id,
+                "date": _date(logbook.date),
+                "supervisor": logbook.supervisor.name,
+                "activities": logbook.activities,
+                "feedbacks": logbook.feedbacks,
+                "plan": logbook.plan,
+                "status": logbook.status,
+                "comment": logbook.comment,
+            }
+        )
+
+    feedbacks = defaultdict(list)
+    for feedback in (
+        Feedback.objects.filter(submission__student_id__in=student_ids)
+        .select_related("supervisor")
+        .order_by("upload_date", "id")
+    ):
+        feedbacks[feedback.submission_id].append(
+            {
+                "supervisor": feedback.supervisor.name,
+                "comment": feedback.comment,
+                "file": _file_entry(feedback.file),
+                "upload_date": _date(feedback.upload_date),
+            }
+        )
+
+    submissions = defaultdict(list)
+    for submission in (
+        StudentSubmission.objects.filter(student_id__in=student_ids)
+        .select_related("submission_phase")
+        .order_by("upload_date", "id")
+    ):
+        submissions[submission.student_id].append(
+            {
+                "id": submission.id,
+                "phase": submission.submission_phase.title,
+                "file": _file_entry(submission.file),
+                "upload_date": _date(submission.upload_date),
+                "feedback": feedbacks[submission.id],
+            }
+        )
+
+    rows = []
+    for student in students:
+        grade = grades.get(student.id)
+        rows.append(
+            ArchivedStudent(
+                student=student,
+                student_code=student.student_id,
+                name=student.user.name,
+                email=student.user.email,
+                mode=student.mode,
+                topic=student.topic,
+                supervisor=student.supervisor.name if student.supervisor else "",
+                evaluators=sorted(user.name for user in student.evaluators.all()),
+                total_mark=grade.total_mark if grade else None,
+                grade_letter=(
+                    grade.grade.grade_letter if grade and grade.grade else None
+                ),
+                gpa_value=grade.grade.gpa_value if grade and grade.grade else None,
+                marks=marks[student.id],
+                rubric_scores=rubric_scores[student.id],
+                logbooks=logbooks[student.id],
+                submissions=submissions[student.id],
+            )
+        )
+    return rows
+
+
+def _merge(existing, fresh):
+    """Fold ``fresh`` into an ArchivedStudent already in the same archive."""
+    for field in ARCHIVED_LISTS:
+        items = getattr(existing, field)
+        known = {item["id"] for item in items}
+        items.extend(item for item in getattr(fresh, field) if item["id"] not in known)
+    if fresh.total_mark is not None:
+        existing.total_mark = fresh.total_mark
+        existing.grade_letter = fresh.grade_letter
+        existing.gpa_value = fresh.gpa_value
+    return existing
+
+
+def delete_in_chunks(queryset, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """Delete ``queryset`` in primary key batches. Returns the number deleted."""
+    model = queryset.model
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by("pk").values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            _, per_model = model.objects.filter(pk__in=ids).delete()
+        deleted += per_model.get(model._meta.label, 0)
+
+
+def archived_file_names():
+    """Names of the stored files the archive manifests point to."""
+    names = set()
+    for submissions in ArchivedStudent.objects.values_list(
+        "submissions", flat=True
+    ).iterator():
+        for submission in submissions:
+            entries = [submission.get("file")]
+            entries += [feedback.get("file") for feedback in submission["feedback"]]
+            names.update(entry["name"] for entry in entries if entry)
+    return names
+
+
+def purge_students(student_ids, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """
+    Remove the marks, grades, logbooks, submissions and feedback of
+    ``student_ids`` from the live tables. Uploaded files stay in storage.
+    """
+    querysets = [
+        Feedback.objects.filter(submission__student_id__in=student_ids),
+        StudentSubmission.objects.filter(student_id__in=student_ids),
+        Logbook.objects.filter(student_id__in=student_ids),
+        StudentMark.objects.filter(student_id__in=student_ids),
+        StudentRubricScore.objects.filter(student_id__in=student_ids),
+        StudentGrade.objects.filter(student_id__in=student_ids),
+    ]
+    deleted = {}
+    # One grade refresh per student at the end instead of one per mark
+    with suspend_grade_updates():
+        for queryset in querysets:
+            deleted[queryset.model._meta.label] = delete_in_chunks(queryset, chunk_size)
+    return deleted
+
+
+def archive_students(students, semester=None, user=None, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """
+    Snapshot ``students`` into the archive of their course for ``semester``
+    (the current one by default), then purge their rows from the live
+    tables. Students outside FYP1/FYP2 are skipped. Returns the number of
+    students archived.
+    """
+    semester = semester or current_semester()
+    by_course = defaultdict(list)
+    for student in students:
+        if student.course in ("FYP1", "FYP2"):
+            by_course[student.course].append(student)
+    if not by_course:
+        return 0
+
+    student_ids = []
+    with transaction.atomic():
+        for course, group in sorted(by_course.items()):
+            archive, _ = SemesterArchive.objects.get_or_create(
+                semester=semester, course=course, defaults={"created_by": user}
+            )
+            existing = {
+                row.student_id: row
+                for row in archive.students.filter(
+                    student_id__in=[student.id for student in group]
+                )
+            }
+            new_rows, merged_rows = [], []
+            for row in snapshot_students(group):
+                row.archive = archive
+                if row.student_id in existing:
+                    merged_rows.append(_merge(existing[row.student_id], row))
+                else:
+                    new_rows.append(row)
+            ArchivedStudent.objects.bulk_create(new_rows, batch_size=500)
+            ArchivedStudent.objects.bulk_update(
+                merged_rows,
+                ["total_mark", "grade_letter", "gpa_value", *ARCHIVED_LISTS],
+                batch_size=500,
+            )
+            student_ids.extend(student.id for student in group)
+
+    purge_students(student_ids, chunk_size)
+    return len(student_ids)
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from archives.archiving import ARCHIVE_CHUNK_SIZE, archive_students, current_semester
+from users.models import Student
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive the marks, grades, logbooks and submissions of a finished "
+        "course cohort and remove them from the live tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("course", choices=["FYP1", "FYP2"])
+        parser.add_argument(
+            "--semester",
+            help="Archive label, e.g. 2025-S1 (defaults to the current semester).",
+        )
+        parser.add_argument(
+            "--students",
+            nargs="+",
+            metavar="STUDENT_ID",
+            help="Only archive these student IDs.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=ARCHIVE_CHUNK_SIZE,
+            help="Rows deleted per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        semester = options["semester"] or current_semester()
+        students = Student.objects.filter(course=options["course"])
+        if options["students"]:
+            students = students.filter(student_id__in=options["students"])
+
+        count = archive_students(
+            list(students), semester, chunk_size=options["chunk_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{options['course']} {semester}: {count} student(s) archived."
+            )
+        )
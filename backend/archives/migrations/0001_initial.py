@@ -0,0 +1,103 @@
+# Generated by Django 5.2 on 2026-10-18 18:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("users", "0018_student_cgpa"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SemesterArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("semester", models.CharField(max_length=20)),
+                (
+                    "course",
+                    models.CharField(
+                        choices=[("FYP1", "FYP1"), ("FYP2", "FYP2")], max_length=5
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-semester", "course"],
+                "unique_together": {("semester", "course")},
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedStudent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("student_code", models.CharField(db_index=True, max_length=10)),
+                ("name", models.CharField(max_length=255)),
+                ("email", models.EmailField(max_length=254)),
+                ("mode", models.CharField(max_length=20)),
+                ("topic", models.CharField(blank=True, max_length=255, null=True)),
+                ("supervisor", models.CharField(blank=True, max_length=255)),
+                ("evaluators", models.JSONField(default=list)),
+                ("total_mark", models.FloatField(blank=True, null=True)),
+                ("grade_letter", models.CharField(blank=True, max_length=5, null=True)),
+                ("gpa_value", models.FloatField(blank=True, null=True)),
+                ("marks", models.JSONField(default=list)),
+                ("rubric_scores", models.JSONField(default=list)),
+                ("logbooks", models.JSONField(default=list)),
+                ("submissions", models.JSONField(default=list)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "student",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="archives",
+                        to="users.student",
+                    ),
+                ),
+                (
+                    "archive",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="students",
+                        to="archives.semesterarchive",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["name", "id"],
+            },
+        ),
+    ]
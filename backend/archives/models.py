@@ -0,0 +1,61 @@
+from django.db import models
+
+
+class SemesterArchive(models.Model):
+    """One finished cohort of a course, frozen at the end of a semester."""
+
+    COURSE_CHOICES = [("FYP1", "FYP1"), ("FYP2", "FYP2")]
+
+    semester = models.CharField(max_length=20)
+    course = models.CharField(max_length=5, choices=COURSE_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(
+        "users.User", null=True, blank=True, on_delete=models.SET_NULL
+    )
+
+    class Meta:
+        unique_together = ("semester", "course")
+        ordering = ["-semester", "course"]
+
+    def __str__(self):
+        return f"{self.course} {self.semester}"
+
+
+class ArchivedStudent(models.Model):
+    """
+    Everything a student produced in one archived course, denormalised into
+    JSON so it survives later changes to rubrics, users and submission phases.
+    """
+
+    archive = models.ForeignKey(
+        SemesterArchive, on_delete=models.CASCADE, related_name="students"
+    )
+    # Kept while the live student exists, e.g. after promotion to FYP2
+    student = models.ForeignKey(
+        "users.Student",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="archives",
+    )
+    student_code = models.CharField(max_length=10, db_index=True)
+    name = models.CharField(max_length=255)
+    email = models.EmailField()
+    mode = models.CharField(max_length=20)
+    topic = models.CharField(max_length=255, null=True, blank=True)
+    supervisor = models.CharField(max_length=255, blank=True)
+    evaluators = models.JSONField(default=list)
+    total_mark = models.FloatField(null=True, blank=True)
+    grade_letter = models.CharField(max_length=5, null=True, blank=True)
+    gpa_value = models.FloatField(null=True, blank=True)
+    marks = models.JSONField(default=list)
+    rubric_scores = models.JSONField(default=list)
+    logbooks = models.JSONField(default=list)
+    submissions = models.JSONField(default=list)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["name", "id"]
+
+    def __str__(self):
+        return f"{self.name} ({self.student_code}) - {self.archive}"
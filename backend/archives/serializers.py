@@ -0,0 +1,50 @@
+from rest_framework import serializers
+from .models import ArchivedStudent, SemesterArchive
+
+
+class SemesterArchiveSerializer(serializers.ModelSerializer):
+    student_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = SemesterArchive
+        fields = ["id", "semester", "course", "created_at", "student_count"]
+
+
+class ArchivedStudentListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedStudent
+        fields = [
+            "id",
+            "student_code",
+            "name",
+            "mode",
+            "supervisor",
+            "total_mark",
+            "grade_letter",
+        ]
+
+
+class ArchivedStudentSerializer(serializers.ModelSerializer):
+    archive = SemesterArchiveSerializer(read_only=True)
+
+    class Meta:
+        model = ArchivedStudent
+        fields = [
+            "id",
+            "archive",
+            "student_code",
+            "name",
+            "email",
+            "mode",
+            "topic",
+            "supervisor",
+            "evaluators",
+            "total_mark",
+            "grade_letter",
+            "gpa_value",
+            "marks",
+            "rubric_scores",
+            "logbooks",
+            "submissions",
+            "archived_at",
+        ]
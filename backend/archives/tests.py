@@ -0,0 +1,63 @@
+import shutil
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from details.models import Submissions
+from documents.models import Feedback, StudentSubmission
+from users.models import Student, User
+
+from .archiving import archive_students
+
+
+class ArchivedFilesTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.supervisor = User.objects.create(
+            email="supervisor@example.com", name="Supervisor", role="supervisor"
+        )
+        self.phase = Submissions.objects.create(
+            title="Proposal",
+            date_open=date(2025, 1, 1),
+            date_close=date(2025, 2, 1),
+            description="",
+            course="FYP1",
+        )
+
+    def make_submission(self, code, content):
+        user = User.objects.create(
+            email=f"{code}@example.com", name=f"Student {code}", role="student"
+        )
+        student = Student.objects.create(user=user, student_id=code, course="FYP1")
+        submission = StudentSubmission(student=student, submission_phase=self.phase)
+        submission.file.save(f"{code}.pdf", ContentFile(content))
+        return student, submission
+
+    def test_gc_blobs_keeps_files_of_archived_students(self):
+        student, submission = self.make_submission("A0001", b"%PDF-1.4 report")
+        feedback = Feedback(supervisor=self.supervisor, submission=submission)
+        feedback.file.save("notes.pdf", ContentFile(b"%PDF-1.4 notes"))
+        names = [submission.file.name, feedback.file.name]
+        # A file whose row is gone and that no archive refers to
+        _, dropped = self.make_submission("A0002", b"%PDF-1.4 dropped")
+        dropped.delete()
+
+        archive_students([student], semester="2025-S1")
+        self.assertFalse(StudentSubmission.objects.exists())
+        call_command("gc_blobs", min_age=0, stdout=StringIO())
+
+        for name in names:
+            self.assertTrue(default_storage.exists(name), name)
+            with default_storage.open(name) as f:
+                self.assertTrue(f.read().startswith(b"%PDF-1.4"))
+        self.assertFalse(default_storage.exists(dropped.file.name))
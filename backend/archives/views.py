@@ -0,0 +1,92 @@
+from django.db.models import Count, Q
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from grades.pagination import KeysetPagination
+from grades.utils import IsCourseCoordinator, get_cohort_scope
+from .models import ArchivedStudent, SemesterArchive
+from .serializers import (
+    ArchivedStudentListSerializer,
+    ArchivedStudentSerializer,
+    SemesterArchiveSerializer,
+)
+
+
+def get_visible_archives(request):
+    """Archives of the ``course`` query param, limited to the coordinator's own."""
+    course, _ = get_cohort_scope(request)
+    archives = SemesterArchive.objects.all()
+    if course:
+        archives = archives.filter(course=course)
+    return archives
+
+
+class ArchiveListView(APIView):
+    """Archived semesters, newest first. Read-only."""
+
+    permission_classes = [IsCourseCoordinator]
+
+    def get(self, request):
+        archives = get_visible_archives(request).annotate(
+            student_count=Count("students")
+        )
+        semester = request.query_params.get("semester")
+        if semester:
+            archives = archives.filter(semester=semester)
+        serializer = SemesterArchiveSerializer(archives, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class ArchivedStudentListView(APIView):
+    """
+    Students of one archive, one keyset page at a time ordered by name.
+    ``search`` matches the name or student ID.
+    """
+
+    permission_classes = [IsCourseCoordinator]
+
+    def get(self, request, archive_id):
+        archive = get_visible_archives(request).filter(id=archive_id).first()
+        if archive is None:
+            return Response(
+                {"error": "Archive not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        students = archive.students.only(*ArchivedStudentListSerializer.Meta.fields)
+        search = request.query_params.get("search")
+        if search:
+            students = students.filter(
+                Q(name__icontains=search) | Q(student_code__icontains=search)
+            )
+        try:
+            page, next_cursor = KeysetPagination("name").paginate(students, request)
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = ArchivedStudentListSerializer(page, many=True)
+        return Response(
+            {"results": serializer.data, "next": next_cursor},
+            status=status.HTTP_200_OK,
+        )
+
+
+class ArchivedStudentDetailView(APIView):
+    """Everything archived for one student: marks, grade, logbooks and files."""
+
+    permission_classes = [IsCourseCoordinator]
+
+    def get(self, request, pk):
+        archived = (
+            ArchivedStudent.objects.select_related("archive")
+            .filter(archive__in=get_visible_archives(request), id=pk)
+            .first()
+        )
+        if archived is None:
+            return Response(
+                {"error": "Archived student not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        serializer = ArchivedStudentSerializer(archived)
+        return Response(serializer.data, status=status.HTTP_200_OK)
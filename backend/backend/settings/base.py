@@ -1,5 +1,6 @@
 from pathlib import Path
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 import os
 
@@ -29,6 +30,7 @@ INSTALLED_APPS = [
     "documents",
     "settings",
     "grades",
+    "archives",
     "rest_framework",
     "corsheaders",
     "rest_framework_simplejwt.token_blacklist",
@@ -115,6 +117,15 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 # Media files
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# Internal proxy location serving MEDIA_ROOT (e.g. "/protected-media/"); when
+# set, file downloads are handed off with X-Accel-Redirect
+FILE_ACCEL_REDIRECT_PREFIX = os.environ.get("FILE_ACCEL_REDIRECT_PREFIX")
+
+# Uploads are stored once per distinct content (see documents/storage.py)
+STORAGES = {
+    "default": {"BACKEND": "documents.storage.DedupFileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -122,6 +133,10 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+# Resumable uploads send each chunk's digest
+CORS_ALLOW_HEADERS = (*default_headers, "x-chunk-sha256")
+# Read by the PDF viewer's range requests and ETag revalidation
+CORS_EXPOSE_HEADERS = ["Accept-Ranges", "Content-Range", "Content-Length", "ETag"]
 
 # X-Frame-Options
 X_FRAME_OPTIONS = "SAMEORIGIN"
@@ -2,11 +2,19 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from grades.views import (
+    CohortAnalyticsView,
     GetAllTotalMarksView,
     GetGradesView,
     GetMarkingSchemeGradesView,
     GetMarkingSchemeView,
+    InterRaterReportView,
     SaveGradesView,
+    SimulateGradingView,
+)
+from archives.views import (
+    ArchiveListView,
+    ArchivedStudentDetailView,
+    ArchivedStudentListView,
 )
 from settings.views import (
     DocumentModeListView,
@@ -15,16 +23,28 @@ from settings.views import (
     systemThemeListView,
 )
 from documents.views import (
+    AnnotatedFeedbackView,
     DeleteFeedbackView,
     DeleteSubmissionView,
     DocumentListView,
+    ExportJobCreateView,
+    ExportJobDownloadView,
+    ExportJobView,
+    FeedbackAnnotationsView,
     FeedbackUploadView,
+    FileView,
     LatestStudentSubmissionView,
     LogbookCreateUpdateView,
     LogbookListView,
     LogbookStatusUpdateView,
+    PreviewView,
+    SearchView,
     SpecificStudentSubmissionView,
     StudentSubmissionsView,
+    UploadChunkView,
+    UploadSessionCompleteView,
+    UploadSessionCreateView,
+    UploadSessionView,
     UploadStudentSubmissionView,
     export_logs_pdf,
 )
@@ -189,6 +209,26 @@ urlpatterns = [
         UploadStudentSubmissionView.as_view(),
         name="upload-student-submission",
     ),
+    path(
+        "submissions/upload/<int:student_id>/sessions/",
+        UploadSessionCreateView.as_view(),
+        name="upload-session-create",
+    ),
+    path(
+        "submissions/upload/sessions/<uuid:session_id>/",
+        UploadSessionView.as_view(),
+        name="upload-session",
+    ),
+    path(
+        "submissions/upload/sessions/<uuid:session_id>/chunks/<int:index>/",
+        UploadChunkView.as_view(),
+        name="upload-chunk",
+    ),
+    path(
+        "submissions/upload/sessions/<uuid:session_id>/complete/",
+        UploadSessionCompleteView.as_view(),
+        name="upload-session-complete",
+    ),
     path(
         "submissions/delete/<int:student_id>/<int:studentsubmission_id>/",
         DeleteSubmissionView.as_view(),
@@ -204,12 +244,44 @@ urlpatterns = [
         DeleteFeedbackView.as_view(),
         name="delete-submission",
     ),
+    path(
+        "feedback/annotations/<int:submission_id>/",
+        FeedbackAnnotationsView.as_view(),
+        name="feedback-annotations",
+    ),
+    path(
+        "feedback/<int:feedback_id>/annotated/",
+        AnnotatedFeedbackView.as_view(),
+        name="feedback-annotated",
+    ),
+    path("files/<str:kind>/<int:pk>/", FileView.as_view(), name="file"),
+    path("search/", SearchView.as_view(), name="search"),
+    path(
+        "previews/<str:kind>/<int:pk>/<str:size>/",
+        PreviewView.as_view(),
+        name="preview",
+    ),
     path("logbooks/", LogbookCreateUpdateView.as_view()),
     path("logbooks/<int:pk>/", LogbookCreateUpdateView.as_view()),
     path("logbooks/<int:pk>/status/", LogbookStatusUpdateView.as_view()),
     path("logbooks/student/<int:student_id>/", LogbookListView.as_view()),
     path("logbooks/<int:student_id>/calendar/", LogbookListView.as_view()),
     path("logbooks/export/<int:student_id>/", export_logs_pdf, name="export_logs_pdf"),
+    path(
+        "logbooks/export/jobs/",
+        ExportJobCreateView.as_view(),
+        name="export-job-create",
+    ),
+    path(
+        "logbooks/export/jobs/<uuid:job_id>/",
+        ExportJobView.as_view(),
+        name="export-job",
+    ),
+    path(
+        "logbooks/export/jobs/<uuid:job_id>/download/",
+        ExportJobDownloadView.as_view(),
+        name="export-job-download",
+    ),
     path(
         "grades/scheme/<int:student_id>/",
         GetMarkingSchemeView.as_view(),
@@ -229,4 +301,30 @@ urlpatterns = [
         GetMarkingSchemeGradesView.as_view(),
         name="get-marking-schemes",
     ),
+    path(
+        "grades/analytics/",
+        CohortAnalyticsView.as_view(),
+        name="cohort-analytics",
+    ),
+    path(
+        "grades/inter-rater/",
+        InterRaterReportView.as_view(),
+        name="inter-rater-report",
+    ),
+    path(
+        "grades/simulate/",
+        SimulateGradingView.as_view(),
+        name="simulate-grading",
+    ),
+    path("archives/", ArchiveListView.as_view(), name="archive-list"),
+    path(
+        "archives/<int:archive_id>/students/",
+        ArchivedStudentListView.as_view(),
+        name="archived-students",
+    ),
+    path(
+        "archives/students/<int:pk>/",
+        ArchivedStudentDetailView.as_view(),
+        name="archived-student-detail",
+    ),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -9,4 +9,8 @@ pip install -r requirements.txt
 python manage.py collectstatic --no-input
 
 # Apply any outstanding database migrations
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+
+# Bring derived grade data (the per-rubric StudentRubricScore rows added by
+# grades 0010) up to date for existing cohorts; only changed rows are written
+python manage.py regrade
@@ -102,11 +102,18 @@ class Submissions(models.Model):
         return 0
 
     def get_dynamic_status(self, student):
+        submission = self.studentsubmission_set.filter(student=student).first()
+        return self.status_for(submission)
+
+    def status_for(self, submission):
+        """
+        The dynamic status given the student's ``submission`` (None when they
+        have not submitted). Uses its prefetched feedbacks when there are any.
+        """
         today = timezone.now().date()
         days_left = self.days_left()
 
-        student_submission = self.studentsubmission_set.filter(student=student).first()
-        if not student_submission:
+        if not submission:
             if today < self.date_open:
                 return "Upcoming"
             elif days_left > 0:
@@ -114,8 +121,7 @@ class Submissions(models.Model):
             else:
                 return "Missed"
         else:
-            feedback = student_submission.feedback_set.first()
-            if feedback:
+            if submission.feedback_set.all():
                 return "Feedback"
             elif days_left == 0:
                 return "Closed"
@@ -1,13 +1,15 @@
 from rest_framework import serializers
+from documents.previews import preview_urls
 from .models import Announcement, Period
 
 
 class AnnouncementSerializer(serializers.ModelSerializer):
     src = serializers.SerializerMethodField()
+    previews = serializers.SerializerMethodField()
 
     class Meta:
         model = Announcement
-        fields = ["id", "title", "message", "src", "course"]
+        fields = ["id", "title", "message", "src", "previews", "course"]
 
     def get_src(self, obj):
         request = self.context.get("request")
@@ -15,6 +17,11 @@ class AnnouncementSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.src.url)
         return None
 
+    def get_previews(self, obj):
+        return preview_urls(
+            self.context.get("request"), "announcement", obj.src, obj.id
+        )
+
 
 class PeriodSerializer(serializers.ModelSerializer):
     days_left = serializers.SerializerMethodField()
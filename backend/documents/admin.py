@@ -1,12 +1,13 @@
 from django.contrib import admin
 from django.urls import path
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils.html import format_html
-import zipfile
-from io import BytesIO
 from users.models import CourseCoordinator
 from users.utils import get_coordinator_course_filter
 from .models import Document, Logbook, StudentSubmission, Feedback
+from .previews import preview_urls
+from .serving import serve_file
+from .streaming import stream_zip
 
 
 @admin.register(Document)
@@ -21,9 +22,16 @@ class DocumentAdmin(admin.ModelAdmin):
         "thumbnail_preview",
     )
     search_fields = ("title",)
-    list_filter = ("category", "mode", "course")
-    readonly_fields = ("upload_date", "thumbnail")
+    list_filter = ("category", "mode", "course", "thumbnail_status")
+    readonly_fields = (
+        "upload_date",
+        "thumbnail",
+        "thumbnail_status",
+        "thumbnail_attempts",
+        "thumbnail_error",
+    )
     date_hierarchy = "upload_date"
+    actions = ["retry_thumbnails"]
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
@@ -46,15 +54,27 @@ class DocumentAdmin(admin.ModelAdmin):
     file_link.short_description = "File"
 
     def thumbnail_preview(self, obj):
-        if obj.thumbnail:
-            return format_html(
-                "<img src='{}' width='50' height='70'/>", obj.thumbnail.url
-            )
+        # The icon-sized preview instead of the full page PNG scaled down
+        previews = preview_urls(None, "document", obj.file, obj.id)
+        if obj.thumbnail and previews:
+            return format_html("<img src='{}' loading='lazy'/>", previews["icon"])
+        # Rendered in the background, so show how far along it is
+        if obj.thumbnail_status in ("pending", "failed"):
+            return obj.get_thumbnail_status_display()
         return "-"
 
     thumbnail_preview.allow_tags = True
     thumbnail_preview.short_description = "Thumbnail"
 
+    @admin.action(description="Retry thumbnail generation")
+    def retry_thumbnails(self, request, queryset):
+        count = 0
+        for document in queryset.filter(thumbnail_status__in=["pending", "failed"]):
+            # save() queues the thumbnail again
+            document.save()
+            count += 1
+        self.message_user(request, f"{count} thumbnail(s) queued.")
+
 
 @admin.register(StudentSubmission)
 class StudentSubmissionAdmin(admin.ModelAdmin):
@@ -98,25 +118,30 @@ class StudentSubmissionAdmin(admin.ModelAdmin):
         if not submission or not submission.file:
             return HttpResponse("File not found.", status=404)
 
-        file = submission.file
-        response = HttpResponse(file, content_type="application/octet-stream")
-        response["Content-Disposition"] = f'attachment; filename="{file.name}"'
-        return response
+        try:
+            return serve_file(request, submission.file, as_attachment=True)
+        except FileNotFoundError:
+            return HttpResponse("File not found.", status=404)
 
     def download_selected_files(self, request, queryset):
         """Action to download selected files as a ZIP archive."""
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-            for submission in queryset:
-                if submission.file:
-                    file_path = submission.file.path
-                    # Use a unique filename to avoid conflicts
-                    filename = f"{submission.student.user.name}_{submission.submission_phase.title}_{submission.file.name.split('/')[-1]}"
-                    zip_file.write(file_path, filename)
-
-        zip_buffer.seek(0)
-        response = HttpResponse(
-            zip_buffer.getvalue(), content_type="application/x-zip-compressed"
+        submissions = (
+            queryset.exclude(file="")
+            .select_related("student__user", "submission_phase")
+            .order_by("id")
+        )
+        # Named after the student and phase, e.g. "Ali_Proposal_report.pdf"
+        entries = (
+            (
+                f"{submission.student.user.name}_{submission.submission_phase.title}_"
+                f"{submission.file.name.split('/')[-1]}",
+                submission.file,
+                submission.upload_date,
+            )
+            for submission in submissions.iterator(chunk_size=200)
+        )
+        response = StreamingHttpResponse(
+            stream_zip(entries), content_type="application/x-zip-compressed"
         )
         response["Content-Disposition"] = 'attachment; filename="submissions.zip"'
         return response
@@ -0,0 +1,264 @@
+import os
+import re
+from uuid import uuid4
+
+import fitz
+from django.conf import settings
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.urls import reverse
+
+from .models import Feedback
+from .previews import file_digest
+
+ANNOTATED_PDF_CACHE_DIR = getattr(
+    settings,
+    "ANNOTATED_PDF_CACHE_DIR",
+    os.path.join(settings.MEDIA_ROOT, "cache", "annotated"),
+)
+# Keeps a single save from growing without bound
+MAX_ANNOTATIONS = getattr(settings, "MAX_ANNOTATIONS", 2000)
+MAX_INK_POINTS = 5000
+MAX_TEXT_LENGTH = 2000
+
+ANNOTATION_TYPES = ("rect", "ellipse", "highlight", "line", "ink", "text")
+COLOUR_RE = re.compile(r"^#(?:[0-9a-fA-F]{3}|[0-9a-fA-F]{6})$")
+# Times, like the text tool of the viewer
+TEXT_FONT = "tiro"
+
+
+class AnnotationError(Exception):
+    """Annotations that can't be stored, with the reason as the message."""
+
+
+def parse_colour(value):
+    """``#rgb``/``#rrggbb`` as a PyMuPDF ``(r, g, b)`` tuple of 0..1 floats."""
+    value = value.lstrip("#")
+    if len(value) == 3:
+        value = "".join(c * 2 for c in value)
+    return tuple(int(value[i : i + 2], 16) / 255 for i in (0, 2, 4))
+
+
+def _number(value, where, minimum=None, maximum=None):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise AnnotationError(f"{where} must be a number")
+    if value != value or value in (float("inf"), float("-inf")):
+        raise AnnotationError(f"{where} must be a number")
+    if (minimum is not None and value < minimum) or (
+        maximum is not None and value > maximum
+    ):
+        raise AnnotationError(f"{where} must be between {minimum} and {maximum}")
+    return round(float(value), 2)
+
+
+def _colour(value, where, optional=False):
+    if value is None and optional:
+        return None
+    if not isinstance(value, str) or not COLOUR_RE.match(value):
+        raise AnnotationError(f"{where} must be a #rrggbb colour")
+    return value.lower()
+
+
+def _points(value, where, count=None):
+    if not isinstance(value, list) or (count is not None and len(value) != count):
+        raise AnnotationError(f"{where} must be a list of {count or 'some'} numbers")
+    return [_number(v, f"{where}[{i}]") for i, v in enumerate(value)]
+
+
+def clean_annotation(data, index):
+    """One annotation checked and reduced to the keys its type uses."""
+    where = f"annotations[{index}]"
+    if not isinstance(data, dict):
+        raise AnnotationError(f"{where} must be an object")
+    kind = data.get("type")
+    if kind not in ANNOTATION_TYPES:
+        raise AnnotationError(
+            f"{where}.type must be one of {', '.join(ANNOTATION_TYPES)}"
+        )
+    page = data.get("page")
+    if isinstance(page, bool) or not isinstance(page, int) or page < 1:
+        raise AnnotationError(f"{where}.page must be a page number from 1")
+
+    cleaned = {"type": kind, "page": page}
+    if kind == "ink":
+        points = _points(data.get("points"), f"{where}.points")
+        if len(points) < 4 or len(points) % 2 or len(points) > 2 * MAX_INK_POINTS:
+            raise AnnotationError(
+                f"{where}.points must be 2 to {MAX_INK_POINTS} x, y pairs"
+            )
+        cleaned["points"] = points
+    elif kind == "line":
+        cleaned["points"] = _points(data.get("points"), f"{where}.points", 4)
+    else:
+        x0, y0, x1, y1 = _points(data.get("rect"), f"{where}.rect", 4)
+        if x1 < x0 or y1 < y0:
+            raise AnnotationError(f"{where}.rect must be [x0, y0, x1, y1]")
+        cleaned["rect"] = [x0, y0, x1, y1]
+
+    if kind == "text":
+        text = data.get("text")
+        if not isinstance(text, str) or len(text) > MAX_TEXT_LENGTH:
+            raise AnnotationError(
+                f"{where}.text must be at most {MAX_TEXT_LENGTH} characters"
+            )
+        cleaned["text"] = text
+        cleaned["font_size"] = _number(
+            data.get("font_size", 12), f"{where}.font_size", 4, 96
+        )
+        cleaned["colour"] = _colour(data.get("colour", "#000000"), f"{where}.colour")
+    else:
+        cleaned["colour"] = _colour(data.get("colour"), f"{where}.colour")
+    if kind in ("rect", "ellipse"):
+        cleaned["fill"] = _colour(data.get("fill"), f"{where}.fill", optional=True)
+    if kind != "text":
+        cleaned["width"] = _number(data.get("width", 1), f"{where}.width", 0, 50)
+    default_opacity = 0.4 if kind == "highlight" else 1
+    cleaned["opacity"] = _number(
+        data.get("opacity", default_opacity), f"{where}.opacity", 0, 1
+    )
+    return cleaned
+
+
+def clean_annotations(data):
+    """
+    The annotations of a save request, validated. Coordinates are PDF points
+    from the top-left corner of the page as the viewer shows it.
+    """
+    if not isinstance(data, list):
+        raise AnnotationError("annotations must be a list")
+    if len(data) > MAX_ANNOTATIONS:
+        raise AnnotationError(f"At most {MAX_ANNOTATIONS} annotations can be saved")
+    return [clean_annotation(item, index) for index, item in enumerate(data)]
+
+
+def stamp_annotation(page, annotation):
+    # Viewer coordinates are of the page as displayed, drawing is unrotated
+    matrix = page.derotation_matrix
+    colour = parse_colour(annotation["colour"])
+    opacity = annotation["opacity"]
+    kind = annotation["type"]
+
+    if kind == "text":
+        x0, y0, x1, y1 = annotation["rect"]
+        # Text that overflows its box runs on down the page rather than
+        # being dropped
+        for bottom in (y1, max(y1, page.rect.height)):
+            written = page.insert_textbox(
+                fitz.Rect(x0, y0, x1, bottom) * matrix,
+                annotation["text"],
+                fontsize=annotation["font_size"],
+                fontname=TEXT_FONT,
+                color=colour,
+                fill_opacity=opacity,
+                rotate=page.rotation,
+            )
+            if written >= 0:
+                break
+        return
+
+    shape = page.new_shape()
+    fill = None
+    if kind == "highlight":
+        shape.draw_rect(fitz.Rect(annotation["rect"]) * matrix)
+        fill, colour = colour, None
+    elif kind in ("rect", "ellipse"):
+        rect = fitz.Rect(annotation["rect"]) * matrix
+        if kind == "rect":
+            shape.draw_rect(rect)
+        else:
+            shape.draw_oval(rect)
+        if annotation["fill"]:
+            fill = parse_colour(annotation["fill"])
+    else:
+        values = annotation["points"]
+        points = [
+            fitz.Point(values[i], values[i + 1]) * matrix
+            for i in range(0, len(values), 2)
+        ]
+        shape.draw_polyline(points)
+    shape.finish(
+        color=colour if annotation.get("width", 1) else None,
+        fill=fill,
+        width=annotation.get("width", 1),
+        stroke_opacity=opacity,
+        fill_opacity=opacity,
+        lineCap=1,
+        lineJoin=1,
+        closePath=False,
+    )
+    shape.commit()
+
+
+def stamp_annotations(path, annotations):
+    """
+    PDF bytes of the file at ``path`` with ``annotations`` drawn into the
+    page contents, so they show in every viewer and print as vectors.
+    Annotations on pages the file does not have are left out.
+    """
+    with fitz.open(path) as doc:
+        for annotation in annotations:
+            if annotation["page"] <= doc.page_count:
+                stamp_annotation(doc[annotation["page"] - 1], annotation)
+        return doc.tobytes(garbage=3, deflate=True)
+
+
+def is_annotatable(field):
+    return bool(field) and field.name.lower().endswith(".pdf")
+
+
+def annotated_url(request, feedback):
+    """URL of the annotated submission PDF of ``feedback``, or None."""
+    if not feedback.annotations:
+        return None
+    url = reverse("feedback-annotated", kwargs={"feedback_id": feedback.id})
+    return request.build_absolute_uri(url) if request else url
+
+
+def annotated_fingerprint(feedback):
+    """Cache key of the annotated PDF: the submission's content and the version."""
+    digest = file_digest(feedback.submission.file)
+    return f"{digest[:32]}-v{feedback.annotation_version}"
+
+
+def get_annotated_pdf(feedback):
+    """
+    ``(path, fingerprint)`` of the submission of ``feedback`` with its
+    annotations stamped on, building it on a cache miss. Older versions of the
+    same feedback are dropped.
+    """
+    fingerprint = annotated_fingerprint(feedback)
+    directory = os.path.join(ANNOTATED_PDF_CACHE_DIR, str(feedback.id))
+    path = os.path.join(directory, f"{fingerprint}.pdf")
+    if os.path.exists(path):
+        return path, fingerprint
+
+    data = stamp_annotations(feedback.submission.file.path, feedback.annotations)
+    os.makedirs(directory, exist_ok=True)
+    # Write then rename so concurrent downloads never see a partial file
+    temp_path = f"{path}.{uuid4().hex}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+    for name in os.listdir(directory):
+        if name.endswith(".pdf") and name != os.path.basename(path):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+    return path, fingerprint
+
+
+@receiver(post_delete, sender=Feedback)
+def discard_annotated_pdfs(sender, instance, **kwargs):
+    directory = os.path.join(ANNOTATED_PDF_CACHE_DIR, str(instance.pk))
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
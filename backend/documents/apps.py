@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class DocumentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'documents'
+
+    def ready(self):
+        # Registers the receivers that keep the search index in step with
+        # uploaded files
+        from . import search  # noqa: F401
+
+        # And the one that drops the annotated PDFs of deleted feedback
+        from . import annotations  # noqa: F401
@@ -0,0 +1,172 @@
+import logging
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .logbook_pdf import (
+    cached_pdf_path,
+    header_details,
+    logbook_entries,
+    logbook_fingerprint,
+    render_logbook_pdf,
+    store_logbook_pdf,
+)
+from .models import ExportJob
+from .streaming import unique_name
+
+logger = logging.getLogger(__name__)
+
+# Rendering processes per job. Each one is a fresh interpreter with Django
+# loaded, so keep this small next to the web workers
+EXPORT_WORKERS = getattr(settings, "EXPORT_WORKERS", 2)
+# Finished exports are removed after this long
+EXPORT_JOB_TTL = getattr(settings, "EXPORT_JOB_TTL", timedelta(hours=24))
+# Jobs that make no progress for this long were lost to a restart
+EXPORT_JOB_TIMEOUT = getattr(settings, "EXPORT_JOB_TIMEOUT", timedelta(hours=1))
+
+
+def entry_name(student):
+    name = re.sub(r"[^\w.-]+", "_", student.user.name).strip("_")
+    return f"{student.student_id}_{name}.pdf"
+
+
+def archive_name(job):
+    return f"exports/logbooks-{job.id}.zip"
+
+
+def _progress(job, **fields):
+    fields["updated_at"] = timezone.now()
+    for name, value in fields.items():
+        setattr(job, name, value)
+    # A plain update: the status endpoint polls these counters
+    ExportJob.objects.filter(pk=job.pk).update(**fields)
+
+
+def run_export_job(job_id, workers=EXPORT_WORKERS):
+    """
+    Build the ZIP of an ExportJob. Logbooks already in the PDF cache are
+    copied in directly; the rest are rendered in a process pool and written
+    to the archive as each one finishes, then cached for the next download.
+    """
+    job = ExportJob.objects.get(pk=job_id)
+    students = list(job.students())
+    _progress(job, status="running", total=len(students))
+
+    name = archive_name(job)
+    path = default_storage.path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    used = set()
+    completed = skipped = failed = 0
+
+    # PDFs are compressed already, so entries are stored as they are
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+        pending = []
+        for student in students:
+            fingerprint = logbook_fingerprint(student)
+            if fingerprint is None:
+                skipped += 1
+                continue
+            cached = cached_pdf_path(student, fingerprint)
+            if os.path.exists(cached):
+                archive.write(cached, unique_name(entry_name(student), used))
+                completed += 1
+            else:
+                pending.append(
+                    (
+                        student,
+                        fingerprint,
+                        header_details(student),
+                        logbook_entries(student),
+                    )
+                )
+        _progress(job, completed=completed, skipped=skipped)
+
+        if pending:
+            # Spawned rather than forked: a fork would copy this thread's
+            # database connection and the locks other threads of the web
+            # worker hold. Workers set Django up before rendering.
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            ) as pool:
+                futures = {
+                    pool.submit(render_logbook_pdf, details, logs): (
+                        student,
+                        fingerprint,
+                    )
+                    for student, fingerprint, details, logs in pending
+                }
+                for future in as_completed(futures):
+                    student, fingerprint = futures[future]
+                    try:
+                        data = future.result()
+                    except Exception as e:
+                        logger.warning(
+                            "Logbook export of student %s failed: %s", student.id, e
+                        )
+                        failed += 1
+                        _progress(job, failed=failed, error=str(e))
+                        continue
+                    archive.writestr(unique_name(entry_name(student), used), data)
+                    store_logbook_pdf(student, fingerprint, data)
+                    completed += 1
+                    _progress(job, completed=completed)
+
+    job.file.name = name
+    job.save(update_fields=["file"])
+    _progress(job, status="done", finished_at=timezone.now())
+    return job
+
+
+def discard_job(job):
+    # A job that never finished may have left a partial archive
+    default_storage.delete(job.file.name or archive_name(job))
+    job.delete()
+
+
+def expire_jobs(now=None):
+    """
+    Mark jobs that stopped making progress EXPORT_JOB_TIMEOUT ago as failed,
+    since the process building them is gone, and remove exports that finished
+    EXPORT_JOB_TTL ago. Returns how many were removed.
+    """
+    now = now or timezone.now()
+    cutoff = now - EXPORT_JOB_TIMEOUT
+    pending = ExportJob.objects.filter(status__in=("queued", "running"))
+    # Queued jobs wait their turn behind the running ones, so they are only
+    # lost when no export anywhere is still moving
+    if not pending.filter(status="running", updated_at__gte=cutoff).exists():
+        lost = pending.filter(updated_at__lt=cutoff)
+    else:
+        lost = pending.filter(status="running", updated_at__lt=cutoff)
+    for job in list(lost):
+        # Checked again row by row so a job that moved meanwhile keeps its
+        # archive
+        marked = ExportJob.objects.filter(
+            pk=job.pk, status=job.status, updated_at__lt=cutoff
+        ).update(
+            status="failed",
+            error="The export was interrupted, please start it again.",
+            finished_at=now,
+            updated_at=now,
+        )
+        if marked:
+            default_storage.delete(archive_name(job))
+
+    expired = list(
+        ExportJob.objects.filter(
+            status__in=("done", "failed"), updated_at__lt=now - EXPORT_JOB_TTL
+        )
+    )
+    for job in expired:
+        discard_job(job)
+    return len(expired)
@@ -0,0 +1,24 @@
+import fitz
+
+# Longest text kept per file; enough for any report while keeping the
+# Postgres tsvector well under its 1 MB limit
+MAX_TEXT_LENGTH = 500_000
+
+
+def extract_pdf_text(path, max_length=MAX_TEXT_LENGTH):
+    """
+    Plain text of every page of the PDF at ``path``, up to ``max_length``
+    characters. Has no Django dependencies so it can run in worker processes.
+    """
+    parts = []
+    length = 0
+    with fitz.open(path) as doc:
+        for page in doc:
+            text = page.get_text().strip()
+            if not text:
+                continue
+            parts.append(text)
+            length += len(text)
+            if length >= max_length:
+                break
+    return "\n\n".join(parts)[:max_length]
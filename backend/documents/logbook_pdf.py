@@ -0,0 +1,311 @@
+import hashlib
+import os
+from io import BytesIO
+from uuid import uuid4
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.html import escape
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import (
+    BaseDocTemplate,
+    Frame,
+    PageBreak,
+    PageTemplate,
+    Paragraph,
+    Table,
+    TableStyle,
+)
+
+from .models import Logbook
+
+LOGBOOK_PDF_CACHE_DIR = getattr(
+    settings,
+    "LOGBOOK_PDF_CACHE_DIR",
+    os.path.join(settings.MEDIA_ROOT, "cache", "logbooks"),
+)
+
+NOTES = [
+    "This log book must be used by PSM 1 and PSM 2 students for reporting all "
+    "progress of their PSM projects.",
+    "The student is responsible for keeping the log book up to date and "
+    "complying with the Supervisor’s feedback.",
+    "Meetings with the supervisor must be held at least once every two weeks "
+    "(minimum of 6 per semester).",
+    "Failure to comply may result in disqualification from presenting the " "project.",
+    "The log book must be submitted with the proposal (PSM 1) or final thesis "
+    "(PSM 2).",
+    "The Faculty reserves the right to reject the thesis if the log book is "
+    "not properly maintained.",
+]
+
+
+def build_styles():
+    default_font = "Times-Roman"
+    default_font_bold = "Times-Bold"
+
+    styles = getSampleStyleSheet()
+    styles.add(
+        ParagraphStyle(
+            name="CustomTitle",
+            fontName=default_font_bold,
+            fontSize=18,
+            leading=22,
+            spaceAfter=16,
+            spaceBefore=20,
+            alignment=1,  # Center
+        )
+    )
+    styles.add(
+        ParagraphStyle(
+            name="SectionTitle",
+            fontName=default_font_bold,
+            fontSize=14,
+            leading=18,
+            spaceAfter=12,
+            spaceBefore=12,
+            alignment=1,
+        )
+    )
+    styles.add(
+        ParagraphStyle(
+            name="CustomBody",
+            fontName=default_font,
+            fontSize=12,
+            leading=16,
+            spaceAfter=8,
+        )
+    )
+    styles.add(
+        ParagraphStyle(
+            name="CustomBold",
+            fontName=default_font_bold,
+            fontSize=12,
+            leading=16,
+            spaceAfter=4,
+        )
+    )
+    styles.add(
+        ParagraphStyle(
+            name="Dotted",
+            fontName=default_font,
+            fontSize=12,
+            leading=16,
+            spaceAfter=4,
+        )
+    )
+    styles.add(
+        ParagraphStyle(
+            name="HeaderText",
+            fontName=default_font_bold,
+            fontSize=12,
+            leading=14,
+            spaceAfter=8,
+            alignment=1,
+        )
+    )
+    return styles
+
+
+# Built once per process rather than on every export
+STYLES = build_styles()
+LOG_TABLE_STYLE = TableStyle(
+    [
+        ("LINEBELOW", (0, 0), (-1, -1), 0.25, colors.black),
+        ("FONTSIZE", (0, 0), (-1, -1), 11),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("LEFTPADDING", (0, 0), (-1, -1), 6),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+        ("TOPPADDING", (0, 0), (-1, -1), 4),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+        ("FONTNAME", (0, 0), (-1, -1), "Times-Roman"),
+        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+    ]
+)
+
+
+class LogbookDocTemplate(BaseDocTemplate):
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, **kwargs)
+        frame = Frame(
+            0.75 * inch,
+            0.75 * inch,
+            letter[0] - 1.5 * inch,
+            letter[1] - 1.5 * inch,
+            id="normal",
+        )
+        self.addPageTemplates(PageTemplate(id="custom", frames=[frame]))
+
+
+def text(value):
+    """User text as Paragraph markup, keeping its line breaks."""
+    return escape(value or "").replace("\n", "<br/>")
+
+
+def header_details(student):
+    return {
+        "project_title": student.topic or "No topic assigned",
+        "student_name": student.user.name,
+        "student_id": student.student_id,
+        "student_email": student.user.email,
+        "supervisor_name": student.supervisor.name if student.supervisor else "N/A",
+        "supervisor_email": student.supervisor.email if student.supervisor else "N/A",
+    }
+
+
+def title_page(details):
+    story = [
+        Paragraph(
+            "SCHOOL OF COMPUTING FACULTY OF ENGINEERING UNIVERSITI TEKNOLOGI MALAYSIA",
+            STYLES["HeaderText"],
+        ),
+        Paragraph(
+            "FINAL YEAR PROJECT (PSM)<br/>STUDENT LOG BOOK", STYLES["CustomTitle"]
+        ),
+        Paragraph("PROJECT TITLE", STYLES["SectionTitle"]),
+        Paragraph(text(details["project_title"]), STYLES["CustomBody"]),
+        Paragraph("STUDENT INFO", STYLES["SectionTitle"]),
+    ]
+    fields = [
+        ("Name:", details["student_name"]),
+        ("Student ID:", details["student_id"]),
+        ("Email:", details["student_email"]),
+        ("Mobile No:", "N/A"),
+        ("Department:", "IS / SE / CS"),
+        None,
+        ("Main Supervisor:", details["supervisor_name"]),
+        ("Email:", details["supervisor_email"]),
+        ("Co-Supervisor:", ""),
+    ]
+    for field in fields:
+        if field is None:
+            story.append(Paragraph("SUPERVISOR INFO", STYLES["SectionTitle"]))
+            continue
+        label, value = field
+        story.append(Paragraph(label, STYLES["CustomBold"]))
+        if value:
+            story.append(Paragraph(text(str(value)), STYLES["Dotted"]))
+    story.append(PageBreak())
+    return story
+
+
+def notes_page():
+    story = [Paragraph("STUDENT LOG BOOK NOTES", STYLES["CustomTitle"])]
+    story.extend(Paragraph(f"• {escape(note)}", STYLES["CustomBody"]) for note in NOTES)
+    story.append(PageBreak())
+    return story
+
+
+def log_page(log):
+    cell = STYLES["Normal"]
+    header = Paragraph(
+        "FACULTY OF COMPUTING UNIVERSITI TEKNOLOGI MALAYSIA PSM LOG BOOK "
+        "SEMESTER: N/A &nbsp;&nbsp; TYPE: N/A",
+        STYLES["HeaderText"],
+    )
+    rows = [
+        ("<b>Date</b>", f": {log['date']} &nbsp;&nbsp; <b>Meeting:</b> N/A"),
+        (
+            "<b>Student<br/>(Meeting Minute / Achievements / Activities)</b>",
+            f": {text(log['activities'])}",
+        ),
+        (
+            "<b>Supervisor<br/>(Suggestion &amp; Comments)</b>",
+            f": {text(log['feedbacks'])}",
+        ),
+        ("<b>Next Meeting Plan</b>", f": {text(log['plan'])}"),
+        (f"Date: {log['date']}", ""),
+    ]
+    table = Table(
+        [[Paragraph(label, cell), Paragraph(value, cell)] for label, value in rows],
+        colWidths=[2.5 * inch, 4.5 * inch],
+    )
+    table.setStyle(LOG_TABLE_STYLE)
+    return [header, table]
+
+
+def render_logbook_pdf(details, logs):
+    """
+    Logbook PDF bytes from the student ``details`` of header_details() and
+    the ``logs`` of logbook_entries(). Reads nothing from the database, so it
+    can run in a worker process.
+    """
+    story = title_page(details) + notes_page()
+    for index, log in enumerate(logs):
+        if index:
+            story.append(PageBreak())
+        story.extend(log_page(log))
+
+    buffer = BytesIO()
+    LogbookDocTemplate(buffer, pagesize=letter).build(story)
+    return buffer.getvalue()
+
+
+def logbook_entries(student):
+    """The approved logbooks of ``student`` by date, as plain dicts."""
+    return list(
+        Logbook.objects.filter(student=student, status="approved")
+        .order_by("date", "id")
+        .values("date", "activities", "feedbacks", "plan")
+    )
+
+
+def logbook_fingerprint(student):
+    """
+    Digest that changes whenever the exported PDF would: when approved
+    logbooks are added, removed or edited, or the student's details change.
+    None when there are no approved logbooks.
+    """
+    stats = Logbook.objects.filter(student=student, status="approved").aggregate(
+        count=Count("id"), last_id=Max("id"), last_modified=Max("updated_at")
+    )
+    if not stats["count"]:
+        return None
+    details = sorted(header_details(student).items())
+    key = repr((stats["count"], stats["last_id"], stats["last_modified"], details))
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def cached_pdf_path(student, fingerprint):
+    return os.path.join(LOGBOOK_PDF_CACHE_DIR, str(student.id), f"{fingerprint}.pdf")
+
+
+def store_logbook_pdf(student, fingerprint, data):
+    """
+    Cache the PDF ``data`` of ``student`` under ``fingerprint`` and drop the
+    student's older exports. Returns the cached path.
+    """
+    path = cached_pdf_path(student, fingerprint)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Write then rename so concurrent downloads never see a partial file
+    temp_path = f"{path}.{uuid4().hex}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+    for name in os.listdir(directory):
+        if name.endswith(".pdf") and name != os.path.basename(path):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+    return path
+
+
+def get_logbook_pdf(student):
+    """
+    ``(path, fingerprint)`` of the cached logbook PDF of ``student``, building
+    it on a miss, or None without approved logbooks.
+    """
+    fingerprint = logbook_fingerprint(student)
+    if fingerprint is None:
+        return None
+    path = cached_pdf_path(student, fingerprint)
+    if not os.path.exists(path):
+        data = render_logbook_pdf(header_details(student), logbook_entries(student))
+        path = store_logbook_pdf(student, fingerprint, data)
+    return path, fingerprint
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from documents.uploads import expire_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove chunked uploads that were started but not completed within "
+        "UPLOAD_SESSION_TTL, along with their part files."
+    )
+
+    def handle(self, *args, **options):
+        removed = expire_sessions()
+        self.stdout.write(self.style.SUCCESS(f"{removed} abandoned upload(s) removed."))
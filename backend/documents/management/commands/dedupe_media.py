@@ -0,0 +1,44 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.models import BlobLink
+from documents.storage import DedupFileSystemStorage, referenced_names
+
+
+class Command(BaseCommand):
+    help = (
+        "Move files uploaded before deduplication into the blob store, so "
+        "identical files share one copy on disk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the files that would be moved.",
+        )
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, DedupFileSystemStorage):
+            raise CommandError("The default storage does not deduplicate files.")
+
+        linked = set(BlobLink.objects.values_list("name", flat=True))
+        names = sorted(
+            name for name in referenced_names() - linked if default_storage.exists(name)
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"{len(names)} file(s) to move into the blob store.")
+            return
+
+        freed = 0
+        for name in names:
+            try:
+                freed += default_storage.adopt(name)
+            except OSError as e:
+                self.stderr.write(f"{name}: {e}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(names)} file(s) moved, {freed / 1024**2:.1f} MB freed."
+            )
+        )
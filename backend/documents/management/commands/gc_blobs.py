@@ -0,0 +1,78 @@
+import os
+import time
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from documents.models import Blob, BlobLink
+from documents.storage import BLOB_TEMP_DIR, DedupFileSystemStorage, referenced_names
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove stored files no longer referenced by any FileField or "
+        "archived student (rows deleted by cascade leave them behind), then "
+        "the blobs left without a link and unfinished uploads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=24,
+            help=(
+                "Only collect links and temporary files older than this many "
+                "hours, so uploads still being saved are left alone."
+            ),
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be removed without removing it.",
+        )
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, DedupFileSystemStorage):
+            raise CommandError("The default storage does not deduplicate files.")
+        dry_run = options["dry_run"]
+        cutoff = timezone.now() - timedelta(hours=options["min_age"])
+
+        referenced = referenced_names()
+        stale_links = [
+            name
+            for name in BlobLink.objects.filter(created_at__lt=cutoff).values_list(
+                "name", flat=True
+            )
+            if name not in referenced
+        ]
+        if not dry_run:
+            for name in stale_links:
+                default_storage.delete(name)
+
+        orphans = Blob.objects.filter(links__isnull=True)
+        freed = sum(blob.size for blob in orphans)
+        orphan_count = orphans.count()
+        if not dry_run:
+            for blob in orphans:
+                default_storage.delete_blob(blob)
+
+        temp_files = 0
+        temp_dir = default_storage.path(BLOB_TEMP_DIR)
+        if os.path.isdir(temp_dir):
+            for name in os.listdir(temp_dir):
+                path = os.path.join(temp_dir, name)
+                if os.path.getmtime(path) < time.time() - options["min_age"] * 3600:
+                    temp_files += 1
+                    if not dry_run:
+                        os.remove(path)
+
+        verb = "Would remove" if dry_run else "Removed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {len(stale_links)} unreferenced file(s), "
+                f"{orphan_count} blob(s) ({freed / 1024**2:.1f} MB) and "
+                f"{temp_files} unfinished upload(s)."
+            )
+        )
@@ -0,0 +1,66 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from documents.models import Document
+from documents.tasks import record_thumbnail_failure, store_thumbnail
+from documents.thumbnails import render_pdf_thumbnail
+
+
+class Command(BaseCommand):
+    help = (
+        "Render missing Document thumbnails in a pool of worker processes. "
+        "Failed documents are retried with --retry-failed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of rendering processes (defaults to the CPU count).",
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Also retry documents whose thumbnail already failed.",
+        )
+
+    def handle(self, *args, **options):
+        statuses = ["pending", "failed"] if options["retry_failed"] else ["pending"]
+        documents = [
+            document
+            for document in Document.objects.filter(
+                thumbnail_status__in=statuses
+            ).order_by("id")
+            if document.needs_thumbnail()
+        ]
+        if not documents:
+            self.stdout.write("No thumbnails to generate.")
+            return
+
+        ready = failed = 0
+        # Workers only render; the database and storage are written here
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = {
+                pool.submit(render_pdf_thumbnail, document.file.path): document
+                for document in documents
+            }
+            for future in as_completed(futures):
+                document = futures[future]
+                document.thumbnail_attempts += 1
+                try:
+                    png = future.result()
+                except Exception as e:
+                    # Marked failed so the next run skips it unless asked to
+                    # retry
+                    record_thumbnail_failure(document, e, final=True)
+                    failed += 1
+                    self.stderr.write(f"{document.title}: {e}")
+                    continue
+                store_thumbnail(document, png)
+                ready += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{ready} thumbnail(s) generated, {failed} failed.")
+        )
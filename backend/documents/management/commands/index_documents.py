@@ -0,0 +1,83 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from documents.extraction import extract_pdf_text
+from documents.models import SearchEntry
+from documents.search import SEARCH_SOURCES, is_indexable, schedule_indexing, store_text
+from documents.tasks import index_entry, record_index_failure
+
+
+class Command(BaseCommand):
+    help = (
+        "Add missing files to the full-text search index and extract the text "
+        "of pending entries in a pool of worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of extraction processes (defaults to the CPU count).",
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Also retry entries whose extraction failed.",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Extract the text of every entry again.",
+        )
+
+    def handle(self, *args, **options):
+        added = 0
+        for kind, model in SEARCH_SOURCES.items():
+            indexed = SearchEntry.objects.filter(kind=kind).values("object_id")
+            for obj in model.objects.exclude(pk__in=indexed).iterator():
+                schedule_indexing(kind, obj, enqueue=False)
+                added += 1
+
+        if options["rebuild"]:
+            SearchEntry.objects.update(status="pending", error="")
+        statuses = ["pending", "failed"] if options["retry_failed"] else ["pending"]
+        entries = list(SearchEntry.objects.filter(status__in=statuses).order_by("id"))
+
+        # Entries without a PDF need no worker
+        pdfs = []
+        for entry in entries:
+            if is_indexable(entry.file_name):
+                pdfs.append(entry)
+            else:
+                index_entry(entry.pk)
+
+        ready = failed = 0
+        # Workers only extract; the database is written here
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = {
+                pool.submit(
+                    extract_pdf_text, default_storage.path(entry.file_name)
+                ): entry
+                for entry in pdfs
+            }
+            for future in as_completed(futures):
+                entry = futures[future]
+                try:
+                    text = future.result()
+                except Exception as e:
+                    record_index_failure(entry, e)
+                    failed += 1
+                    self.stderr.write(f"{entry}: {e}")
+                    continue
+                store_text(entry, text)
+                ready += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{added} file(s) added to the index, {ready} extracted, "
+                f"{failed} failed, {len(entries) - len(pdfs)} without a PDF."
+            )
+        )
@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-18 18:33
+
+from django.db import migrations, models
+
+
+def set_thumbnail_status(apps, schema_editor):
+    Document = apps.get_model("documents", "Document")
+    Document.objects.exclude(thumbnail="").exclude(thumbnail=None).update(
+        thumbnail_status="ready"
+    )
+    Document.objects.filter(thumbnail_status="pending").exclude(
+        file__endswith=".pdf"
+    ).update(thumbnail_status="skipped")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0015_alter_feedback_supervisor"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="thumbnail_attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="thumbnail_error",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="thumbnail_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                    ("skipped", "Not a PDF"),
+                ],
+                default="pending",
+                max_length=10,
+            ),
+        ),
+        migrations.RunPython(set_thumbnail_status, migrations.RunPython.noop),
+    ]
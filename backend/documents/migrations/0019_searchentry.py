@@ -0,0 +1,146 @@
+# Generated by Django 5.2 on 2026-10-18 18:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The full-text index depends on the database: a weighted tsvector column
+# with a GIN index on Postgres, an FTS5 table kept in sync by triggers on
+# SQLite (development). Other databases fall back to a plain scan.
+POSTGRES_INDEX = """
+ALTER TABLE documents_searchentry ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(text, '')), 'B')
+    ) STORED;
+CREATE INDEX documents_searchentry_vector_gin
+    ON documents_searchentry USING gin (search_vector);
+"""
+POSTGRES_DROP = """
+DROP INDEX IF EXISTS documents_searchentry_vector_gin;
+ALTER TABLE documents_searchentry DROP COLUMN IF EXISTS search_vector;
+"""
+SQLITE_INDEX = [
+    """
+    CREATE VIRTUAL TABLE documents_searchentry_fts USING fts5(
+        title, text, content='documents_searchentry', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER documents_searchentry_fts_insert
+    AFTER INSERT ON documents_searchentry BEGIN
+        INSERT INTO documents_searchentry_fts (rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER documents_searchentry_fts_delete
+    AFTER DELETE ON documents_searchentry BEGIN
+        INSERT INTO documents_searchentry_fts (documents_searchentry_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER documents_searchentry_fts_update
+    AFTER UPDATE ON documents_searchentry BEGIN
+        INSERT INTO documents_searchentry_fts (documents_searchentry_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO documents_searchentry_fts (rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS documents_searchentry_fts_insert",
+    "DROP TRIGGER IF EXISTS documents_searchentry_fts_delete",
+    "DROP TRIGGER IF EXISTS documents_searchentry_fts_update",
+    "DROP TABLE IF EXISTS documents_searchentry_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(POSTGRES_INDEX)
+    elif vendor == "sqlite":
+        for statement in SQLITE_INDEX:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(POSTGRES_DROP)
+    elif vendor == "sqlite":
+        for statement in SQLITE_DROP:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0018_uploadsession"),
+        ("users", "0018_student_cgpa"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("document", "Document"),
+                            ("submission", "Submission"),
+                            ("feedback", "Feedback"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("object_id", models.PositiveBigIntegerField()),
+                ("title", models.CharField(max_length=255)),
+                ("text", models.TextField(blank=True)),
+                ("file_name", models.CharField(blank=True, max_length=255)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("ready", "Ready"),
+                            ("failed", "Failed"),
+                            ("skipped", "Not a PDF"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("course", models.CharField(blank=True, max_length=5)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "student",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="users.student",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "search entries",
+                "unique_together": {("kind", "object_id")},
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 18:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0019_searchentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="logbook",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 18:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0021_exportjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feedback",
+            name="annotation_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="feedback",
+            name="annotations",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0022_feedback_annotations"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportjob",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,8 +1,6 @@
-from io import BytesIO
-from django.db import models
-from django.core.files.base import ContentFile
-import os
-import fitz
+import uuid
+
+from django.db import models, transaction
 from django.db.models import Q
 
 
@@ -31,6 +29,12 @@ class Document(models.Model):
         ("forms", "Forms"),
         ("other", "Other"),
     ]
+    THUMBNAIL_STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("ready", "Ready"),
+        ("failed", "Failed"),
+        ("skipped", "Not a PDF"),
+    ]
     title = models.CharField(max_length=255)
     upload_date = models.DateTimeField(auto_now_add=True)
     file = models.FileField(upload_to=document_upload_path)
@@ -40,6 +44,11 @@ class Document(models.Model):
     thumbnail = models.ImageField(
         upload_to=pdf_thumbnail_upload_path, blank=True, null=True
     )
+    thumbnail_status = models.CharField(
+        max_length=10, choices=THUMBNAIL_STATUS_CHOICES, default="pending"
+    )
+    thumbnail_attempts = models.PositiveSmallIntegerField(default=0)
+    thumbnail_error = models.TextField(blank=True)
     mode = models.ForeignKey("settings.documentModes", on_delete=models.CASCADE)
     course = models.CharField(
         max_length=5,
@@ -50,25 +59,28 @@ class Document(models.Model):
         ],
     )
 
+    def needs_thumbnail(self):
+        return (
+            bool(self.file) and self.file.name.endswith(".pdf") and not self.thumbnail
+        )
+
     def save(self, *args, **kwargs):
+        # Partial saves come from the thumbnail job itself
+        schedule = "update_fields" not in kwargs and self.needs_thumbnail()
+        if schedule:
+            self.thumbnail_status = "pending"
+            self.thumbnail_attempts = 0
+            self.thumbnail_error = ""
+        elif "update_fields" not in kwargs and not self.thumbnail:
+            self.thumbnail_status = "skipped"
         super().save(*args, **kwargs)
 
-        # Generate thumbnail if PDF and no thumbnail set
-        if self.file and self.file.name.endswith(".pdf") and not self.thumbnail:
-            try:
-                doc = fitz.open(self.file.path)
-                page = doc.load_page(0)  # first page
-                pix = page.get_pixmap()
-                buffer = BytesIO(pix.tobytes("png"))
+        # Rendering a large PDF takes seconds, so it happens in the background
+        # once the upload is committed
+        if schedule:
+            from .tasks import enqueue_thumbnail
 
-                thumb_name = (
-                    os.path.splitext(os.path.basename(self.file.name))[0] + "_thumb.png"
-                )
-                self.thumbnail.save(thumb_name, ContentFile(buffer.read()), save=False)
-                super().save(update_fields=["thumbnail"])
-
-            except Exception as e:
-                print("Thumbnail generation failed:", e)
+            transaction.on_commit(lambda: enqueue_thumbnail(self.pk))
 
     def __str__(self):
         return self.title
@@ -86,6 +98,32 @@ class StudentSubmission(models.Model):
         return f"{self.student.user.name} - {self.submission_phase.title}"
 
 
+class UploadSession(models.Model):
+    """
+    A submission being uploaded in chunks. The bytes received so far are kept
+    in a part file (see documents/uploads.py) until the upload is completed.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    student = models.ForeignKey("users.Student", on_delete=models.CASCADE)
+    submission_phase = models.ForeignKey(
+        "details.Submissions", on_delete=models.CASCADE
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def next_chunk(self):
+        return self.received // self.chunk_size
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size} bytes)"
+
+
 def limit_to_feedback_roles():
     return Q(role__in=["supervisor", "course_coordinator", "examiner"])
 
@@ -100,6 +138,10 @@ class Feedback(models.Model):
     submission = models.ForeignKey(StudentSubmission, on_delete=models.CASCADE)
     file = models.FileField(upload_to=feedback_upload_path, null=True, blank=True)
     upload_date = models.DateTimeField(auto_now_add=True)
+    # Vector markup of the submission (see documents/annotations.py), stamped
+    # onto it on download; the version keys the cached result
+    annotations = models.JSONField(default=list, blank=True)
+    annotation_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"Feedback by {self.supervisor.name} for {self.submission}"
@@ -121,6 +163,131 @@ class Logbook(models.Model):
     plan = models.TextField()
     status = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default="sent")
     comment = models.TextField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Logbook for {self.student.user.name} on {self.date}"
+
+
+class Blob(models.Model):
+    """
+    One stored copy of a unique file content, kept under ``blobs/`` by its
+    SHA-256. Every FileField value pointing at it is a BlobLink.
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def name(self):
+        return f"blobs/{self.sha256[:2]}/{self.sha256[2:4]}/{self.sha256}"
+
+    def __str__(self):
+        return self.sha256
+
+
+class BlobLink(models.Model):
+    """A stored file name (as saved in a FileField) and the blob it holds."""
+
+    name = models.CharField(max_length=255, unique=True)
+    blob = models.ForeignKey(Blob, on_delete=models.PROTECT, related_name="links")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class SearchEntry(models.Model):
+    """
+    Text extracted from a document, submission or feedback file, indexed for
+    full-text search (see documents/search.py). The database-specific index
+    is created by migration 0019.
+    """
+
+    KIND_CHOICES = [
+        ("document", "Document"),
+        ("submission", "Submission"),
+        ("feedback", "Feedback"),
+    ]
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("ready", "Ready"),
+        ("failed", "Failed"),
+        ("skipped", "Not a PDF"),
+    ]
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    text = models.TextField(blank=True)
+    # The indexed file, so saves that don't replace it skip re-extraction
+    file_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    error = models.TextField(blank=True)
+    # Used to scope results: the owner of a submission or feedback, and the
+    # course of a document
+    student = models.ForeignKey(
+        "users.Student", on_delete=models.CASCADE, null=True, blank=True
+    )
+    course = models.CharField(max_length=5, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("kind", "object_id")
+        verbose_name_plural = "search entries"
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
+
+
+class ExportJob(models.Model):
+    """
+    Bulk logbook export for a supervisor's students, a course or a list of
+    students, built in the background into one ZIP (see documents/exports.py).
+    """
+
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey("users.User", on_delete=models.CASCADE)
+    supervisor = models.ForeignKey(
+        "users.User",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+        limit_choices_to={"role": "supervisor"},
+    )
+    course = models.CharField(max_length=5, blank=True)
+    student_ids = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    total = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    # Students without approved logbooks, left out of the ZIP
+    skipped = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    file = models.FileField(upload_to="exports/", blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Moved on by every progress write; jobs that stop moving were lost
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def students(self):
+        from users.models import Student
+
+        students = Student.objects.select_related("user", "supervisor")
+        if self.student_ids:
+            students = students.filter(id__in=self.student_ids)
+        if self.supervisor_id:
+            students = students.filter(supervisor_id=self.supervisor_id)
+        if self.course:
+            students = students.filter(course=self.course)
+        return students.order_by("student_id", "id")
+
+    def __str__(self):
+        return f"Logbook export {self.id} ({self.status})"
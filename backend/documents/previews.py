@@ -0,0 +1,240 @@
+import hashlib
+import os
+import time
+from io import BytesIO
+from urllib.parse import urlencode
+from uuid import uuid4
+
+import fitz
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signing import Signer
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+from PIL import Image
+
+# Named preview sizes as (max width, max height); aspect ratio is kept
+PREVIEW_SIZES = getattr(
+    settings,
+    "PREVIEW_SIZES",
+    {"icon": (64, 90), "card": (320, 452), "page": (1240, 1754)},
+)
+# WEBP or JPEG
+PREVIEW_FORMAT = getattr(settings, "PREVIEW_FORMAT", "WEBP")
+PREVIEW_QUALITY = getattr(settings, "PREVIEW_QUALITY", 80)
+PREVIEW_CACHE_DIR = getattr(
+    settings,
+    "PREVIEW_CACHE_DIR",
+    os.path.join(settings.MEDIA_ROOT, "cache", "previews"),
+)
+# Least recently used previews are evicted once the cache grows past this
+PREVIEW_CACHE_MAX_BYTES = getattr(settings, "PREVIEW_CACHE_MAX_BYTES", 512 * 1024**2)
+# Preview URLs are signed for whoever was shown them and stop working after
+# between one and two of these periods
+PREVIEW_URL_TTL = getattr(settings, "PREVIEW_URL_TTL", 60 * 60 * 6)
+# The cache directory is scanned for eviction once per this many renders
+EVICT_EVERY = 50
+
+PDF_EXTENSIONS = {".pdf"}
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp"}
+
+# Preview kind in URLs -> (model, file field)
+PREVIEW_SOURCES = {
+    "document": ("documents.Document", "file"),
+    "submission": ("documents.StudentSubmission", "file"),
+    "feedback": ("documents.Feedback", "file"),
+    "announcement": ("details.Announcement", "src"),
+    "outline": ("settings.Outline", "src"),
+}
+
+_renders = 0
+
+
+def has_preview(field):
+    if not field:
+        return False
+    extension = os.path.splitext(field.name)[1].lower()
+    return extension in PDF_EXTENSIONS | IMAGE_EXTENSIONS
+
+
+def get_preview_file(kind, pk):
+    """The file field a preview of ``kind`` ``pk`` is made from, or None."""
+    if kind not in PREVIEW_SOURCES:
+        return None
+    model_label, field_name = PREVIEW_SOURCES[kind]
+    obj = apps.get_model(model_label).objects.filter(pk=pk).first()
+    field = getattr(obj, field_name, None)
+    return field if has_preview(field) else None
+
+
+def _preview_signature(kind, pk, expires):
+    return Signer(salt="documents.preview").signature(f"{kind}:{pk}:{expires}")
+
+
+def sign_preview(kind, pk):
+    """
+    Query string that lets ``<img>`` tags load the previews of ``kind`` ``pk``
+    without a token. The expiry is rounded to PREVIEW_URL_TTL so a file keeps
+    the same URLs for a while and browsers can cache the images.
+    """
+    expires = (int(time.time()) // PREVIEW_URL_TTL + 2) * PREVIEW_URL_TTL
+    return urlencode(
+        {"expires": expires, "signature": _preview_signature(kind, pk, expires)}
+    )
+
+
+def check_preview_signature(kind, pk, expires, signature):
+    """Whether ``expires``/``signature`` are an unexpired sign_preview() pair."""
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    return expires > time.time() and constant_time_compare(
+        signature or "", _preview_signature(kind, pk, expires)
+    )
+
+
+def preview_urls(request, kind, field, pk):
+    """``{size: url}`` for every preview size of a file, or None."""
+    if not has_preview(field):
+        return None
+    query = sign_preview(kind, pk)
+    urls = {
+        size: reverse("preview", kwargs={"kind": kind, "pk": pk, "size": size})
+        + f"?{query}"
+        for size in PREVIEW_SIZES
+    }
+    if request is not None:
+        urls = {size: request.build_absolute_uri(url) for size, url in urls.items()}
+    return urls
+
+
+def file_digest(field):
+    """
+    SHA-256 of a stored file. Taken from its blob when it has one, otherwise
+    remembered per (name, size, mtime) so the file is read again only when
+    it changes.
+    """
+    from .models import BlobLink
+
+    link = BlobLink.objects.filter(name=field.name).select_related("blob").first()
+    if link is not None:
+        return link.blob.sha256
+    storage = field.storage
+    try:
+        stat = os.stat(storage.path(field.name))
+        version = f"{stat.st_size}:{stat.st_mtime_ns}"
+    except NotImplementedError:
+        version = str(storage.size(field.name))
+    key = f"previews:digest:{hashlib.md5(field.name.encode()).hexdigest()}:{version}"
+    digest = cache.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with storage.open(field.name, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        cache.set(key, digest, 60 * 60 * 24 * 7)
+    return digest
+
+
+def _first_page(field, width, height):
+    with field.storage.open(field.name, "rb") as f:
+        data = f.read()
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        page = doc.load_page(0)
+        # Render straight at the target scale rather than shrinking a full page
+        zoom = min(width / page.rect.width, height / page.rect.height)
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+
+def render_preview(field, size):
+    """Encoded preview image of ``field`` at the named ``size``."""
+    width, height = PREVIEW_SIZES[size]
+    extension = os.path.splitext(field.name)[1].lower()
+    if extension in PDF_EXTENSIONS:
+        image = _first_page(field, width, height)
+    else:
+        with field.storage.open(field.name, "rb") as f:
+            image = Image.open(f)
+            image.load()
+        image = image.convert("RGB")
+        image.thumbnail((width, height))
+
+    buffer = BytesIO()
+    image.save(buffer, PREVIEW_FORMAT, quality=PREVIEW_QUALITY)
+    return buffer.getvalue()
+
+
+def preview_extension():
+    return "webp" if PREVIEW_FORMAT.upper() == "WEBP" else "jpg"
+
+
+def preview_content_type():
+    return "image/webp" if PREVIEW_FORMAT.upper() == "WEBP" else "image/jpeg"
+
+
+def get_preview(field, size):
+    """
+    ``(path, digest)`` of the cached preview of ``field``, rendering it on a
+    miss. Files with the same content share one preview.
+    """
+    global _renders
+
+    digest = file_digest(field)
+    path = os.path.join(
+        PREVIEW_CACHE_DIR, digest[:2], f"{digest}-{size}.{preview_extension()}"
+    )
+    if os.path.exists(path):
+        # Mark as recently used for eviction
+        os.utime(path)
+        return path, digest
+
+    data = render_preview(field, size)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename so concurrent readers never see a partial file
+    temp_path = f"{path}.{uuid4().hex}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+    _renders += 1
+    if _renders % EVICT_EVERY == 0:
+        evict_previews()
+    return path, digest
+
+
+def evict_previews(max_bytes=None):
+    """
+    Delete the least recently used previews until the cache is back under
+    90% of ``max_bytes``. Returns the number of files removed.
+    """
+    max_bytes = PREVIEW_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    total = 0
+    for root, _, files in os.walk(PREVIEW_CACHE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+    if total <= max_bytes:
+        return 0
+
+    removed = 0
+    target = max_bytes * 0.9
+    for _, size, path in sorted(entries):
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
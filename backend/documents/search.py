@@ -0,0 +1,243 @@
+import os
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.html import escape
+
+from users.models import Student
+from users.utils import get_coordinator_course_filter
+from .models import Document, Feedback, SearchEntry, StudentSubmission
+
+SEARCH_SOURCES = {
+    "document": Document,
+    "submission": StudentSubmission,
+    "feedback": Feedback,
+}
+
+SOURCE_KINDS = {model: kind for kind, model in SEARCH_SOURCES.items()}
+# Saves limited to other fields (like the thumbnail job's) leave the index alone
+INDEXED_FIELDS = {"file", "title", "comment", "student", "submission"}
+
+# Snippet highlight markers; control characters can't occur in the indexed
+# text, so the snippet can be escaped and the markers turned into <mark> tags
+MARK_START, MARK_END = "\x02", "\x03"
+SNIPPET_WORDS = 20
+# Postgres text search configuration (stemming and stop words)
+SEARCH_CONFIG = "english"
+
+
+def entry_fields(kind, obj):
+    """SearchEntry field values describing ``obj``, except the text."""
+    if kind == "document":
+        return {"title": obj.title, "student": None, "course": obj.course}
+    if kind == "submission":
+        return {"title": str(obj), "student": obj.student, "course": ""}
+    return {"title": str(obj), "student": obj.submission.student, "course": ""}
+
+
+def schedule_indexing(kind, obj, enqueue=True):
+    """
+    Bring the SearchEntry of ``obj`` up to date, marking it pending (and
+    queueing text extraction unless ``enqueue`` is false) when its file is
+    new or was replaced.
+    """
+    file_name = obj.file.name if obj.file else ""
+    fields = entry_fields(kind, obj)
+    entry = SearchEntry.objects.filter(kind=kind, object_id=obj.pk).first()
+    # Feedback is indexed with its comment, which may have changed
+    if entry is not None and entry.file_name == file_name and kind != "feedback":
+        # Only the title or owner changed
+        for name, value in fields.items():
+            setattr(entry, name, value)
+        entry.save()
+        return entry
+
+    entry, _ = SearchEntry.objects.update_or_create(
+        kind=kind,
+        object_id=obj.pk,
+        defaults={**fields, "file_name": file_name, "status": "pending", "error": ""},
+    )
+    if enqueue:
+        from .tasks import enqueue_indexing
+
+        transaction.on_commit(lambda: enqueue_indexing(entry.pk))
+    return entry
+
+
+def clean_text(*parts):
+    text = "\n\n".join(part for part in parts if part)
+    # Postgres text can't hold NUL, and the markers must stay unambiguous
+    return re.sub(r"[\x00\x02\x03]", "", text)
+
+
+def store_text(entry, file_text):
+    comment = ""
+    if entry.kind == "feedback":
+        comment = (
+            Feedback.objects.filter(pk=entry.object_id)
+            .values_list("comment", flat=True)
+            .first()
+            or ""
+        )
+    entry.text = clean_text(comment, file_text)
+    entry.status = "ready"
+    entry.error = ""
+    entry.save(update_fields=["text", "status", "error", "updated_at"])
+
+
+def is_indexable(file_name):
+    return os.path.splitext(file_name)[1].lower() == ".pdf"
+
+
+def visible_entries(request):
+    """SearchEntry rows the user may find, following their role."""
+    user = request.user
+    entries = SearchEntry.objects.all()
+    if user.is_superuser:
+        return entries
+    if user.role == "student":
+        student = Student.objects.filter(user=user).first()
+        if student is None:
+            return entries.none()
+        return entries.filter(
+            Q(kind="document", course=student.course) | Q(student=student)
+        )
+    if user.role in ("supervisor", "examiner"):
+        students = Student.objects.filter(Q(supervisor=user) | Q(evaluators=user))
+        return entries.filter(Q(kind="document") | Q(student__in=students))
+    if user.role == "course_coordinator":
+        course_filter, _ = get_coordinator_course_filter(request)
+        students = Student.objects.filter(course_filter or Q())
+        return entries.filter(Q(kind="document") | Q(student__in=students))
+    return entries.none()
+
+
+def fts5_query(query):
+    """User input as an FTS5 query matching all of its words."""
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{word}"' for word in words)
+
+
+def _postgres_search(query, scope_sql, scope_params, limit, offset):
+    options = (
+        f"StartSel={MARK_START}, StopSel={MARK_END}, "
+        f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}, MaxFragments=2"
+    )
+    # Headlines are slow to build, so only for the page of results returned
+    sql = f"""
+        SELECT ranked.id, ranked.rank,
+               ts_headline(%s::regconfig, e.text, ranked.q, %s)
+        FROM (
+            SELECT e.id, q, ts_rank_cd(e.search_vector, q) AS rank
+            FROM documents_searchentry e,
+                 websearch_to_tsquery(%s::regconfig, %s) q
+            WHERE e.search_vector @@ q AND e.id IN ({scope_sql})
+            ORDER BY rank DESC, e.id
+            LIMIT %s OFFSET %s
+        ) ranked
+        JOIN documents_searchentry e ON e.id = ranked.id
+        ORDER BY ranked.rank DESC, ranked.id
+    """
+    params = [
+        SEARCH_CONFIG,
+        options,
+        SEARCH_CONFIG,
+        query,
+        *scope_params,
+        limit,
+        offset,
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _sqlite_search(query, scope_sql, scope_params, limit, offset):
+    match = fts5_query(query)
+    if not match:
+        return []
+    # bm25() is lower for better matches; titles weigh ten times the text
+    sql = f"""
+        SELECT rowid, -bm25(documents_searchentry_fts, 10.0, 1.0) AS rank,
+               snippet(documents_searchentry_fts, 1, %s, %s, '…', %s)
+        FROM documents_searchentry_fts
+        WHERE documents_searchentry_fts MATCH %s AND rowid IN ({scope_sql})
+        ORDER BY rank DESC, rowid
+        LIMIT %s OFFSET %s
+    """
+    params = [MARK_START, MARK_END, SNIPPET_WORDS, match, *scope_params, limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _basic_search(query, scope, limit, offset):
+    words = re.findall(r"\w+", query)
+    if not words:
+        return []
+    entries = scope
+    for word in words:
+        entries = entries.filter(Q(title__icontains=word) | Q(text__icontains=word))
+    rows = []
+    for entry in entries.order_by("-updated_at")[offset : offset + limit]:
+        position = entry.text.lower().find(words[0].lower())
+        start = max(position - 80, 0) if position >= 0 else 0
+        rows.append((entry.id, 0.0, entry.text[start : start + 200]))
+    return rows
+
+
+def search(request, query, kinds=None, limit=20, offset=0):
+    """
+    Ranked SearchEntry matches for ``query`` visible to the user, as
+    ``(entry, rank, snippet)`` with the matched words of the HTML-escaped
+    snippet wrapped in ``<mark>``. Only the index is read, never the files.
+    """
+    # Files that aren't PDFs can still be found by their title
+    scope = visible_entries(request).filter(status__in=["ready", "skipped"])
+    if kinds:
+        scope = scope.filter(kind__in=kinds)
+
+    if connection.vendor in ("postgresql", "sqlite"):
+        scope_sql, scope_params = scope.values("id").query.sql_with_params()
+        backend = (
+            _postgres_search if connection.vendor == "postgresql" else _sqlite_search
+        )
+        rows = backend(query, scope_sql, list(scope_params), limit, offset)
+    else:
+        rows = _basic_search(query, scope, limit, offset)
+
+    entries = SearchEntry.objects.select_related("student__user").in_bulk(
+        [row[0] for row in rows]
+    )
+    return [
+        (
+            entries[entry_id],
+            rank,
+            escape(snippet or "")
+            .replace(MARK_START, "<mark>")
+            .replace(MARK_END, "</mark>"),
+        )
+        for entry_id, rank, snippet in rows
+        if entry_id in entries
+    ]
+
+
+@receiver(post_save, sender=Document)
+@receiver(post_save, sender=StudentSubmission)
+@receiver(post_save, sender=Feedback)
+def index_saved_file(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not INDEXED_FIELDS & set(update_fields):
+        return
+    schedule_indexing(SOURCE_KINDS[sender], instance)
+
+
+@receiver(post_delete, sender=Document)
+@receiver(post_delete, sender=StudentSubmission)
+@receiver(post_delete, sender=Feedback)
+def remove_deleted_file(sender, instance, **kwargs):
+    SearchEntry.objects.filter(
+        kind=SOURCE_KINDS[sender], object_id=instance.pk
+    ).delete()
@@ -1,11 +1,26 @@
 from rest_framework import serializers
-from .models import Document, Logbook, StudentSubmission, Feedback
+from django.db.models import Prefetch
+from django.urls import reverse
+from .models import (
+    Document,
+    ExportJob,
+    Feedback,
+    Logbook,
+    StudentSubmission,
+    UploadSession,
+)
 from details.models import Submissions
+from .annotations import annotated_url
+from .previews import preview_urls
+from .serving import file_url
+from .uploads import MAX_UPLOAD_SIZE
 
 
 class DocumentSerializer(serializers.ModelSerializer):
     src = serializers.SerializerMethodField()
+    stream_url = serializers.SerializerMethodField()
     thumbnail_url = serializers.SerializerMethodField()
+    previews = serializers.SerializerMethodField()
     category = serializers.StringRelatedField()
     mode = serializers.StringRelatedField()
 
@@ -17,7 +32,10 @@ class DocumentSerializer(serializers.ModelSerializer):
             "category",
             "upload_date",
             "src",
+            "stream_url",
             "thumbnail_url",
+            "thumbnail_status",
+            "previews",
             "mode",
         ]
 
@@ -27,6 +45,9 @@ class DocumentSerializer(serializers.ModelSerializer):
             request.build_absolute_uri(obj.file.url) if obj.file and request else None
         )
 
+    def get_stream_url(self, obj):
+        return file_url(self.context.get("request"), "document", obj.file, obj.id)
+
     def get_thumbnail_url(self, obj):
         request = self.context.get("request")
         return (
@@ -35,13 +56,20 @@ class DocumentSerializer(serializers.ModelSerializer):
             else None
         )
 
+    def get_previews(self, obj):
+        return preview_urls(self.context.get("request"), "document", obj.file, obj.id)
+
 
 class MarkingSchemeSerializer(serializers.ModelSerializer):
     src = serializers.SerializerMethodField()
+    stream_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Document
-        fields = ["src"]
+        fields = ["src", "stream_url"]
+
+    def get_stream_url(self, obj):
+        return file_url(self.context.get("request"), "document", obj.file, obj.id)
 
     def get_src(self, obj):
         request = self.context.get("request")
@@ -52,10 +80,23 @@ class MarkingSchemeSerializer(serializers.ModelSerializer):
 
 class StudentSubmissionSerializer(serializers.ModelSerializer):
     file = serializers.SerializerMethodField()
+    stream_url = serializers.SerializerMethodField()
+    previews = serializers.SerializerMethodField()
 
     class Meta:
         model = StudentSubmission
-        fields = ["id", "student", "submission_phase", "file", "upload_date"]
+        fields = [
+            "id",
+            "student",
+            "submission_phase",
+            "file",
+            "stream_url",
+            "previews",
+            "upload_date",
+        ]
+
+    def get_stream_url(self, obj):
+        return file_url(self.context.get("request"), "submission", obj.file, obj.id)
 
     def get_file(self, obj):
         request = self.context.get("request")
@@ -63,9 +104,15 @@ class StudentSubmissionSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.file.url)
         return None
 
+    def get_previews(self, obj):
+        return preview_urls(self.context.get("request"), "submission", obj.file, obj.id)
+
 
 class FeedbackSerializer(serializers.ModelSerializer):
     src = serializers.SerializerMethodField()
+    stream_url = serializers.SerializerMethodField()
+    previews = serializers.SerializerMethodField()
+    annotated_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Feedback
@@ -73,10 +120,13 @@ class FeedbackSerializer(serializers.ModelSerializer):
             "id",
             "upload_date",
             "src",
+            "stream_url",
+            "previews",
             "file",
             "supervisor",
             "submission",
             "comment",
+            "annotated_url",
         ]
 
     def get_src(self, obj):
@@ -85,6 +135,26 @@ class FeedbackSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.file.url)
         return None
 
+    def get_stream_url(self, obj):
+        return file_url(self.context.get("request"), "feedback", obj.file, obj.id)
+
+    def get_previews(self, obj):
+        return preview_urls(self.context.get("request"), "feedback", obj.file, obj.id)
+
+    def get_annotated_url(self, obj):
+        return annotated_url(self.context.get("request"), obj)
+
+
+class FeedbackAnnotationsSerializer(serializers.ModelSerializer):
+    annotated_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Feedback
+        fields = ["id", "annotation_version", "annotations", "annotated_url"]
+
+    def get_annotated_url(self, obj):
+        return annotated_url(self.context.get("request"), obj)
+
 
 class SubmissionPhaseSerializer(serializers.ModelSerializer):
     days_left = serializers.SerializerMethodField()
@@ -111,13 +181,22 @@ class CombinedSubmissionSerializer(serializers.Serializer):
     def get_days_left(self, obj):
         return obj.days_left()
 
-    def get_status(self, obj):
+    def student_submission(self, obj):
+        """
+        The student's submission for the phase ``obj``, from the
+        ``student_submissions`` prefetch of the view when it has one.
+        """
+        if hasattr(obj, "student_submissions"):
+            return obj.student_submissions[0] if obj.student_submissions else None
         student = self.context.get("student")
-        return obj.get_dynamic_status(student)
+        return obj.studentsubmission_set.filter(student=student).first()
+
+    def get_status(self, obj):
+        return obj.status_for(self.student_submission(obj))
 
     def get_submission(self, obj):
         student = self.context.get("student")
-        submission = obj.studentsubmission_set.filter(student=student).first()
+        submission = self.student_submission(obj)
         if not submission:
             return {}
         return {
@@ -125,15 +204,26 @@ class CombinedSubmissionSerializer(serializers.Serializer):
             "title": submission.file.name.split("/")[-1],
             "upload_date": submission.upload_date,
             "src": submission.file.url,
-            "status": "Reviewed" if submission.feedback_set.exists() else "Submitted",
+            "stream_url": file_url(
+                self.context.get("request"),
+                "submission",
+                submission.file,
+                submission.id,
+            ),
+            "previews": preview_urls(
+                self.context.get("request"),
+                "submission",
+                submission.file,
+                submission.id,
+            ),
+            "status": "Reviewed" if submission.feedback_set.all() else "Submitted",
             "type": "submission",
             "studentId": student.id,
             "assignmentId": obj.id,
         }
 
     def get_feedback(self, obj):
-        student = self.context.get("student")
-        submission = obj.studentsubmission_set.filter(student=student).first()
+        submission = self.student_submission(obj)
         if not submission:
             return []
 
@@ -148,6 +238,13 @@ class CombinedSubmissionSerializer(serializers.Serializer):
                 "upload_date": feedback.upload_date,
                 "comment": feedback.comment,
                 "src": feedback.file.url if feedback.file else "",
+                "stream_url": file_url(
+                    self.context.get("request"), "feedback", feedback.file, feedback.id
+                ),
+                "previews": preview_urls(
+                    self.context.get("request"), "feedback", feedback.file, feedback.id
+                ),
+                "annotated_url": annotated_url(self.context.get("request"), feedback),
                 "type": "feedback",
                 "supervisorId": feedback.supervisor.id,
                 "supervisorName": feedback.supervisor.name,
@@ -157,10 +254,31 @@ class CombinedSubmissionSerializer(serializers.Serializer):
         ]
 
 
+def viewer_submissions(student, viewer):
+    """
+    The submissions of ``student`` for StudentAllSubmissionSerializer, with
+    their phase joined in and ``viewer``'s feedbacks prefetched.
+    """
+    return (
+        StudentSubmission.objects.filter(student=student)
+        .select_related("submission_phase")
+        .prefetch_related(
+            Prefetch(
+                "feedback_set",
+                queryset=Feedback.objects.filter(supervisor=viewer).order_by("id"),
+                to_attr="viewer_feedbacks",
+            )
+        )
+        .order_by("id")
+    )
+
+
 class StudentAllSubmissionSerializer(serializers.Serializer):
     id = serializers.IntegerField()
     title = serializers.SerializerMethodField()
     src = serializers.SerializerMethodField()
+    stream_url = serializers.SerializerMethodField()
+    previews = serializers.SerializerMethodField()
     status = serializers.SerializerMethodField()
     type = serializers.SerializerMethodField()
     studentId = serializers.SerializerMethodField()
@@ -174,29 +292,42 @@ class StudentAllSubmissionSerializer(serializers.Serializer):
         request = self.context.get("request")
         return request.build_absolute_uri(obj.file.url) if obj.file and request else ""
 
-    def get_status(self, obj):
+    def get_stream_url(self, obj):
+        return file_url(self.context.get("request"), "submission", obj.file, obj.id)
+
+    def get_previews(self, obj):
+        return preview_urls(self.context.get("request"), "submission", obj.file, obj.id)
+
+    def viewer_feedback(self, obj):
+        """
+        The requesting user's first feedback on ``obj``, from the
+        viewer_submissions() prefetch when it has one.
+        """
+        if hasattr(obj, "viewer_feedbacks"):
+            return obj.viewer_feedbacks[0] if obj.viewer_feedbacks else None
         request = self.context.get("request")
-        return (
-            "Reviewed"
-            if request and obj.feedback_set.filter(supervisor=request.user).exists()
-            else "Submitted"
-        )
+        if not request:
+            return None
+        return obj.feedback_set.filter(supervisor=request.user).first()
+
+    def get_status(self, obj):
+        return "Reviewed" if self.viewer_feedback(obj) else "Submitted"
 
     def get_type(self, obj):
         return "submission"
 
     def get_studentId(self, obj):
-        return obj.student.id
+        return obj.student_id
 
     def get_assignmentId(self, obj):
-        return obj.submission_phase.id
+        return obj.submission_phase_id
 
     def get_feedback(self, obj):
         request = self.context.get("request")
         if not request:
             return {}
 
-        feedback = obj.feedback_set.filter(supervisor=request.user).first()
+        feedback = self.viewer_feedback(obj)
         if not feedback:
             return {}
 
@@ -204,12 +335,15 @@ class StudentAllSubmissionSerializer(serializers.Serializer):
             "id": feedback.id,
             "title": "Feedback",
             "upload_date": feedback.upload_date,
-            "src": request.build_absolute_uri(feedback.file.url)
-            if feedback.file
-            else "",
+            "src": (
+                request.build_absolute_uri(feedback.file.url) if feedback.file else ""
+            ),
+            "stream_url": file_url(request, "feedback", feedback.file, feedback.id),
+            "previews": preview_urls(request, "feedback", feedback.file, feedback.id),
+            "annotated_url": annotated_url(request, feedback),
             "comment": feedback.comment,
             "type": "feedback",
-            "supervisorId": feedback.supervisor.id,
+            "supervisorId": feedback.supervisor_id,
             "submissionId": obj.id,
         }
 
@@ -224,6 +358,47 @@ class SubmissionUploadSerializer(serializers.ModelSerializer):
         return StudentSubmission.objects.create(student=student, **validated_data)
 
 
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ["filename", "size", "submission_phase"]
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("The file is empty.")
+        if value > MAX_UPLOAD_SIZE:
+            raise serializers.ValidationError(
+                f"The file is larger than {MAX_UPLOAD_SIZE // 1024**2} MB."
+            )
+        return value
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id",
+            "status",
+            "total",
+            "completed",
+            "skipped",
+            "failed",
+            "error",
+            "created_at",
+            "finished_at",
+            "download_url",
+        ]
+
+    def get_download_url(self, obj):
+        if obj.status != "done":
+            return None
+        url = reverse("export-job-download", kwargs={"job_id": obj.id})
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+
 class LogbookSerializer(serializers.ModelSerializer):
     class Meta:
         model = Logbook
@@ -0,0 +1,140 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.utils.http import http_date, parse_http_date_safe
+
+# When set (e.g. "/protected-media/"), responses carry an X-Accel-Redirect to
+# this internal location of the front proxy instead of the file body, and the
+# proxy does the sending, ranges included
+FILE_ACCEL_REDIRECT_PREFIX = getattr(settings, "FILE_ACCEL_REDIRECT_PREFIX", None)
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeFile:
+    """Read-only view of ``length`` bytes of ``file`` starting at ``start``."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def file_url(request, kind, field, pk):
+    """URL of the range-capable download endpoint for a file, or None."""
+    if not field:
+        return None
+    url = reverse("file", kwargs={"kind": kind, "pk": pk})
+    return request.build_absolute_uri(url) if request else url
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` (inclusive) of a single ``bytes=`` range, None to send
+    the whole file, or ``False`` when the range can't be satisfied.
+    Multi-range requests are answered with the whole file, as RFC 9110 allows.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _not_modified(request, etag, modified):
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates
+    since = parse_http_date_safe(request.headers.get("If-Modified-Since") or "")
+    return since is not None and int(modified) <= since
+
+
+def serve_file(request, field, filename=None, as_attachment=False):
+    """
+    Response for a stored file with ETag/Last-Modified validation and single
+    byte-range support, streamed with FileResponse or handed to the front
+    proxy when FILE_ACCEL_REDIRECT_PREFIX is set.
+    """
+    path = field.path
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    filename = filename or os.path.basename(field.name)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    def finish(response):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        response["Accept-Ranges"] = "bytes"
+        # Private files: the browser may keep them but must revalidate
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    if _not_modified(request, etag, stat.st_mtime):
+        return finish(HttpResponseNotModified())
+
+    disposition = "attachment" if as_attachment else "inline"
+    content_disposition = f"{disposition}; filename*=UTF-8''{quote(filename)}"
+
+    if FILE_ACCEL_REDIRECT_PREFIX:
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = quote(
+            FILE_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + field.name
+        )
+        response["Content-Disposition"] = content_disposition
+        return finish(response)
+
+    byte_range = None
+    range_header = request.headers.get("Range")
+    # If-Range: only honour the range if the client's copy is still current
+    if range_header and request.headers.get("If-Range", etag) == etag:
+        byte_range = parse_range(range_header, size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return finish(response)
+
+    if byte_range is None:
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+        response["Content-Length"] = size
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            RangeFile(open(path, "rb"), start, end - start + 1),
+            content_type=content_type,
+            status=206,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = end - start + 1
+    response["Content-Disposition"] = content_disposition
+    return finish(response)
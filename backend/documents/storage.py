@@ -0,0 +1,159 @@
+import hashlib
+import os
+import shutil
+from uuid import uuid4
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import models, transaction
+
+# Files being written are kept here until their digest is known
+BLOB_TEMP_DIR = "blobs/tmp"
+
+
+def file_fields():
+    """``(model, field)`` for every FileField (and ImageField) in the project."""
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.FileField):
+                yield model, field
+
+
+def referenced_names():
+    """
+    Every file name currently stored in a FileField, plus the files of
+    archived students, which only the archive manifests refer to.
+    """
+    from archives.archiving import archived_file_names
+
+    names = archived_file_names()
+    for model, field in file_fields():
+        names.update(
+            model._default_manager.exclude(**{field.name: ""})
+            .exclude(**{f"{field.name}__isnull": True})
+            .values_list(field.name, flat=True)
+        )
+    return names
+
+
+class DedupFileSystemStorage(FileSystemStorage):
+    """
+    File system storage that keeps one copy of each distinct file content.
+
+    Uploads are hashed while they are written, and the bytes are kept once
+    under ``blobs/`` by their SHA-256. The name saved in the FileField is a
+    hard link to that blob, so paths, URLs and ``open()`` work exactly as
+    before. BlobLink rows count the references; the blob is removed along
+    with its last link. Files must never be rewritten in place, since every
+    link shares the same bytes.
+    """
+
+    def _save(self, name, content):
+        from .models import Blob
+
+        temp_path = self.path(f"{BLOB_TEMP_DIR}/{uuid4().hex}")
+        os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+        try:
+            sha = hashlib.sha256()
+            size = 0
+            with open(temp_path, "wb") as f:
+                for chunk in content.chunks():
+                    sha.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+
+            with transaction.atomic():
+                # The row lock keeps a concurrent delete of the last link from
+                # removing the blob between here and the new link
+                blob, _ = Blob.objects.select_for_update().get_or_create(
+                    sha256=sha.hexdigest(), defaults={"size": size}
+                )
+                blob_path = self.path(blob.name)
+                if not os.path.exists(blob_path):
+                    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                    os.replace(temp_path, blob_path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(blob_path, self.file_permissions_mode)
+                return self._link(blob, name)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _link(self, blob, name):
+        """Make ``name`` a hard link to ``blob`` and record it."""
+        from .models import BlobLink
+
+        blob_path = self.path(blob.name)
+        while True:
+            full_path = self.path(name)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            try:
+                os.link(blob_path, full_path)
+            except FileExistsError:
+                # Taken since get_available_name() ran
+                name = self.get_available_name(name)
+                continue
+            except OSError:
+                # No hard links on this file system; keep a plain copy but
+                # still track it so the blob is not collected under it
+                if os.path.exists(full_path):
+                    name = self.get_available_name(name)
+                    continue
+                shutil.copyfile(blob_path, full_path)
+            break
+        name = name.replace("\\", "/")
+        BlobLink.objects.create(name=name, blob=blob)
+        return name
+
+    def delete(self, name):
+        from .models import Blob, BlobLink
+
+        with transaction.atomic():
+            link = BlobLink.objects.filter(name=name).first()
+            super().delete(name)
+            if link is None:
+                return
+            blob = Blob.objects.select_for_update().get(pk=link.blob_id)
+            link.delete()
+            if not blob.links.exists():
+                self.delete_blob(blob)
+
+    def delete_blob(self, blob):
+        super().delete(blob.name)
+        blob.delete()
+
+    def adopt(self, name):
+        """
+        Move an existing file saved before deduplication into the blob store,
+        replacing it with a link. Returns the number of bytes freed.
+        """
+        from .models import Blob, BlobLink
+
+        if BlobLink.objects.filter(name=name).exists():
+            return 0
+        full_path = self.path(name)
+        sha = hashlib.sha256()
+        with open(full_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+        size = os.path.getsize(full_path)
+
+        with transaction.atomic():
+            blob, _ = Blob.objects.select_for_update().get_or_create(
+                sha256=sha.hexdigest(), defaults={"size": size}
+            )
+            blob_path = self.path(blob.name)
+            freed = 0
+            if not os.path.exists(blob_path):
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.link(full_path, blob_path)
+            elif not os.path.samefile(blob_path, full_path):
+                # Swap in a link to the existing copy without a moment where
+                # the name is missing
+                temp_path = self.path(f"{BLOB_TEMP_DIR}/{uuid4().hex}")
+                os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+                os.link(blob_path, temp_path)
+                os.replace(temp_path, full_path)
+                freed = size
+            BlobLink.objects.create(name=name, blob=blob)
+        return freed
@@ -0,0 +1,94 @@
+import os
+import zipfile
+
+# Formats that are already compressed; deflating them again only burns CPU
+STORED_EXTENSIONS = {
+    ".pdf",
+    ".zip",
+    ".rar",
+    ".7z",
+    ".gz",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".webp",
+    ".mp4",
+    ".mov",
+    ".mp3",
+    ".docx",
+    ".xlsx",
+    ".pptx",
+}
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkBuffer:
+    """
+    Write-only file object the ZipFile writes into. It is not seekable, so
+    zipfile streams each entry with a data descriptor instead of seeking back
+    to patch its header; the bytes are handed on as soon as they are written.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+
+def unique_name(name, used):
+    """``name`` or ``name (2)``, ``name (3)``... so archive entries never clash."""
+    base, extension = os.path.splitext(name)
+    candidate = name
+    counter = 2
+    while candidate in used:
+        candidate = f"{base} ({counter}){extension}"
+        counter += 1
+    used.add(candidate)
+    return candidate
+
+
+def stream_zip(entries, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield a ZIP archive of ``entries`` ((archive name, FieldFile, datetime))
+    chunk by chunk. Files are read from storage in ``chunk_size`` pieces, so
+    memory use does not grow with the archive. Files missing from storage are
+    left out.
+    """
+    buffer = _ChunkBuffer()
+    used = set()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, field, modified in entries:
+            try:
+                source = field.open("rb")
+            except FileNotFoundError:
+                continue
+            with source:
+                info = zipfile.ZipInfo(
+                    unique_name(name, used),
+                    date_time=max(modified.timetuple()[:6], (1980, 1, 1, 0, 0, 0)),
+                )
+                extension = os.path.splitext(name)[1].lower()
+                info.compress_type = (
+                    zipfile.ZIP_STORED
+                    if extension in STORED_EXTENSIONS
+                    else zipfile.ZIP_DEFLATED
+                )
+                with archive.open(
+                    info, "w", force_zip64=field.size > zipfile.ZIP64_LIMIT
+                ) as target:
+                    for chunk in iter(lambda: source.read(chunk_size), b""):
+                        target.write(chunk)
+                        yield from buffer.drain()
+            yield from buffer.drain()
+    # Central directory
+    yield from buffer.drain()
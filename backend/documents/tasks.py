@@ -0,0 +1,170 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.utils import timezone
+
+from .extraction import extract_pdf_text
+from .exports import run_export_job
+from .models import Document, ExportJob, SearchEntry
+from .search import is_indexable, store_text
+from .thumbnails import render_pdf_thumbnail
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_MAX_ATTEMPTS = 3
+# Seconds before the first retry, doubled after each failed attempt
+THUMBNAIL_RETRY_DELAY = 2
+
+# Shared by every request in the worker process; thumbnails are rendered one
+# or two at a time so a burst of uploads can't starve the web workers
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumbnails")
+# Text extraction has its own queue so a backlog of it never delays thumbnails
+_index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-index")
+# Export jobs run one at a time; each renders in its own process pool
+_export_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exports")
+
+
+def thumbnail_name(document):
+    return os.path.splitext(os.path.basename(document.file.name))[0] + "_thumb.png"
+
+
+def store_thumbnail(document, png):
+    document.thumbnail.save(thumbnail_name(document), ContentFile(png), save=False)
+    document.thumbnail_status = "ready"
+    document.thumbnail_error = ""
+    document.save(
+        update_fields=[
+            "thumbnail",
+            "thumbnail_status",
+            "thumbnail_attempts",
+            "thumbnail_error",
+        ]
+    )
+
+
+def record_thumbnail_failure(document, error, final):
+    document.thumbnail_error = str(error)
+    if final:
+        document.thumbnail_status = "failed"
+    document.save(
+        update_fields=["thumbnail_status", "thumbnail_attempts", "thumbnail_error"]
+    )
+
+
+def generate_thumbnail(document_id, max_attempts=THUMBNAIL_MAX_ATTEMPTS):
+    """
+    Render and store the thumbnail of a Document, retrying with backoff.
+    Each attempt and the last error are recorded on the document. Returns the
+    final thumbnail status.
+    """
+    delay = THUMBNAIL_RETRY_DELAY
+    while True:
+        # Reloaded each attempt in case the document changed or was deleted
+        document = Document.objects.filter(pk=document_id).first()
+        if document is None:
+            return None
+        if not document.needs_thumbnail():
+            return document.thumbnail_status
+
+        document.thumbnail_attempts += 1
+        try:
+            png = render_pdf_thumbnail(document.file.path)
+        except Exception as e:
+            final = document.thumbnail_attempts >= max_attempts
+            logger.warning(
+                "Thumbnail attempt %s for document %s failed: %s",
+                document.thumbnail_attempts,
+                document_id,
+                e,
+            )
+            record_thumbnail_failure(document, e, final)
+            if final:
+                return document.thumbnail_status
+            time.sleep(delay)
+            delay *= 2
+            continue
+
+        store_thumbnail(document, png)
+        return document.thumbnail_status
+
+
+def _run_thumbnail_job(document_id):
+    try:
+        generate_thumbnail(document_id)
+    except Exception:
+        logger.exception("Thumbnail job for document %s crashed", document_id)
+    finally:
+        # Jobs run outside the request cycle, so nothing else closes the
+        # thread's connection
+        connection.close()
+
+
+def enqueue_thumbnail(document_id):
+    """Generate a Document's thumbnail in the background."""
+    return _executor.submit(_run_thumbnail_job, document_id)
+
+
+def record_index_failure(entry, error):
+    entry.status = "failed"
+    entry.error = str(error)
+    entry.save(update_fields=["status", "error", "updated_at"])
+
+
+def index_entry(entry_id):
+    """Extract and store the text of a SearchEntry. Returns its status."""
+    entry = SearchEntry.objects.filter(pk=entry_id).first()
+    if entry is None:
+        return None
+    if not is_indexable(entry.file_name):
+        if entry.kind == "feedback":
+            # The comment alone is still worth finding
+            store_text(entry, "")
+        else:
+            entry.status = "skipped"
+            entry.save(update_fields=["status", "updated_at"])
+        return entry.status
+
+    try:
+        text = extract_pdf_text(default_storage.path(entry.file_name))
+    except Exception as e:
+        logger.warning("Text extraction for search entry %s failed: %s", entry_id, e)
+        record_index_failure(entry, e)
+        return entry.status
+    store_text(entry, text)
+    return entry.status
+
+
+def _run_index_job(entry_id):
+    try:
+        index_entry(entry_id)
+    except Exception:
+        logger.exception("Indexing job for search entry %s crashed", entry_id)
+    finally:
+        connection.close()
+
+
+def enqueue_indexing(entry_id):
+    """Extract a SearchEntry's text in the background."""
+    return _index_executor.submit(_run_index_job, entry_id)
+
+
+def _run_export_job(job_id):
+    try:
+        run_export_job(job_id)
+    except Exception as e:
+        logger.exception("Export job %s crashed", job_id)
+        ExportJob.objects.filter(pk=job_id).update(
+            status="failed", error=str(e), finished_at=timezone.now()
+        )
+    finally:
+        connection.close()
+
+
+def enqueue_export(job_id):
+    """Build an ExportJob's ZIP in the background."""
+    return _export_executor.submit(_run_export_job, job_id)
@@ -0,0 +1,10 @@
+import fitz
+
+# Kept free of Django imports so the backfill command can render in worker
+# processes without setting Django up in each of them
+
+
+def render_pdf_thumbnail(path):
+    """PNG bytes of the first page of the PDF at ``path``."""
+    with fitz.open(path) as doc:
+        return doc.load_page(0).get_pixmap().tobytes("png")
@@ -0,0 +1,115 @@
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .models import UploadSession
+
+# Bytes per chunk of a resumable upload; only the last chunk may be shorter
+UPLOAD_CHUNK_SIZE = getattr(settings, "UPLOAD_CHUNK_SIZE", 4 * 1024**2)
+# Largest file a resumable upload accepts, checked when the session starts
+MAX_UPLOAD_SIZE = getattr(settings, "MAX_UPLOAD_SIZE", 200 * 1024**2)
+# Sessions untouched for this long are abandoned and removed
+UPLOAD_SESSION_TTL = getattr(settings, "UPLOAD_SESSION_TTL", timedelta(hours=24))
+UPLOAD_SESSION_DIR = getattr(
+    settings, "UPLOAD_SESSION_DIR", os.path.join(settings.MEDIA_ROOT, "uploads")
+)
+# Request bodies are copied to disk this many bytes at a time
+READ_SIZE = 64 * 1024
+
+
+class ChunkError(Exception):
+    """A chunk that can't be accepted; ``status`` is the HTTP status to send."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def part_path(session):
+    return os.path.join(UPLOAD_SESSION_DIR, f"{session.id}.part")
+
+
+def session_state(session):
+    return {
+        "id": str(session.id),
+        "filename": session.filename,
+        "size": session.size,
+        "chunk_size": session.chunk_size,
+        "received": session.received,
+        "next_chunk": session.next_chunk,
+        "complete": session.received == session.size,
+    }
+
+
+def write_chunk(session, index, stream, checksum):
+    """
+    Append chunk ``index`` read from ``stream`` to the part file of a locked
+    ``session`` after checking it against its SHA-256 ``checksum``. A chunk
+    received before is acknowledged without being written again, so clients
+    can simply re-send after a dropped connection.
+    """
+    if index < session.next_chunk or session.received == session.size:
+        return
+    if index > session.next_chunk:
+        raise ChunkError(f"Expected chunk {session.next_chunk}.", status=409)
+
+    offset = session.received
+    expected = min(session.chunk_size, session.size - offset)
+    sha = hashlib.sha256()
+    length = 0
+    os.makedirs(UPLOAD_SESSION_DIR, exist_ok=True)
+    with open(part_path(session), "ab") as f:
+        # Anything past the offset is left over from a chunk that failed
+        f.truncate(offset)
+        try:
+            while length <= expected:
+                data = stream.read(READ_SIZE) if stream is not None else b""
+                if not data:
+                    break
+                sha.update(data)
+                length += len(data)
+                f.write(data)
+            if length != expected:
+                raise ChunkError(f"Chunk {index} must be {expected} bytes.")
+            if sha.hexdigest() != checksum.lower():
+                raise ChunkError(f"Checksum mismatch for chunk {index}.")
+        except BaseException:
+            f.truncate(offset)
+            raise
+
+    session.received = offset + length
+    session.save(update_fields=["received", "updated_at"])
+
+
+def assembled_file(session):
+    """The completed upload as a File, read from disk as it is stored."""
+    return File(open(part_path(session), "rb"), name=session.filename)
+
+
+def discard_session(session):
+    try:
+        os.remove(part_path(session))
+    except FileNotFoundError:
+        pass
+    session.delete()
+
+
+def expire_sessions(now=None):
+    """Remove sessions untouched for UPLOAD_SESSION_TTL. Returns how many."""
+    cutoff = (now or timezone.now()) - UPLOAD_SESSION_TTL
+    expired = list(UploadSession.objects.filter(updated_at__lt=cutoff))
+    for session in expired:
+        discard_session(session)
+
+    # Part files left behind by sessions deleted along with their student or
+    # submission phase
+    if os.path.isdir(UPLOAD_SESSION_DIR):
+        for name in os.listdir(UPLOAD_SESSION_DIR):
+            path = os.path.join(UPLOAD_SESSION_DIR, name)
+            if os.path.getmtime(path) < cutoff.timestamp():
+                os.remove(path)
+    return len(expired)
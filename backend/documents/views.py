@@ -1,10 +1,47 @@
+import os
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from settings.models import documentModes
-from users.models import Student
+from users.models import Student, User
+from grades.utils import get_cohort_scope
 from details.models import Submissions
-from .models import Document, Feedback, Logbook, StudentSubmission
+from .models import (
+    Document,
+    ExportJob,
+    Feedback,
+    Logbook,
+    StudentSubmission,
+    UploadSession,
+)
+from .exports import expire_jobs
+from .logbook_pdf import get_logbook_pdf
+from .tasks import enqueue_export
+from .search import SEARCH_SOURCES, search
+from .serving import file_url, serve_file
+from .uploads import (
+    UPLOAD_CHUNK_SIZE,
+    ChunkError,
+    assembled_file,
+    discard_session,
+    expire_sessions,
+    session_state,
+    write_chunk,
+)
+from .previews import (
+    PREVIEW_SIZES,
+    check_preview_signature,
+    get_preview,
+    get_preview_file,
+    preview_content_type,
+)
+from .annotations import (
+    AnnotationError,
+    clean_annotations,
+    get_annotated_pdf,
+    is_annotatable,
+)
 from .serializers import (
     CombinedSubmissionSerializer,
     DocumentSerializer,
@@ -14,32 +51,20 @@ from .serializers import (
     StudentAllSubmissionSerializer,
     StudentSubmissionSerializer,
     FeedbackSerializer,
+    ExportJobSerializer,
+    FeedbackAnnotationsSerializer,
     SubmissionUploadSerializer,
+    UploadSessionSerializer,
+    viewer_submissions,
 )
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.db import transaction
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from rest_framework import status
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.platypus import (
-    Paragraph,
-    PageBreak,
-    Frame,
-    PageTemplate,
-    BaseDocTemplate,
-    Table,
-    TableStyle,
-    Image,
-)
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from datetime import datetime
-import os
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
 from django.conf import settings
-import html.parser
 from django.core.mail import send_mail
 
 
@@ -72,6 +97,159 @@ class DocumentListView(APIView):
         return Response(serializer.data)
 
 
+class PreviewView(APIView):
+    """
+    WebP/JPEG preview of an uploaded file at a named size, rendered once per
+    file content and served from the preview cache. The URL has to carry the
+    signature preview_urls() gave the serializer, which only lists files the
+    user can see.
+    """
+
+    # <img> tags can't send a token, the signed URL stands in for it
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, kind, pk, size):
+        if not check_preview_signature(
+            kind,
+            pk,
+            request.query_params.get("expires"),
+            request.query_params.get("signature"),
+        ):
+            return Response(
+                {"detail": "Invalid or expired preview link"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        if size not in PREVIEW_SIZES:
+            return Response(
+                {"error": f"size must be one of {', '.join(PREVIEW_SIZES)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        field = get_preview_file(kind, pk)
+        if field is None:
+            return Response(
+                {"error": "No preview available"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            path, digest = get_preview(field, size)
+        except FileNotFoundError:
+            return Response(
+                {"error": "File not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            print(f"Error rendering preview of {kind} {pk}: {e}")
+            return Response(
+                {"error": "Failed to render preview"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        etag = f'"{digest}-{size}"'
+        if request.headers.get("If-None-Match") == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                open(path, "rb"), content_type=preview_content_type()
+            )
+        response["ETag"] = etag
+        # The URL stays the same when the file is replaced, so revalidate
+        response["Cache-Control"] = "private, max-age=3600"
+        return response
+
+
+class FileView(APIView):
+    """
+    Authenticated download of a document, submission or feedback file with
+    Range, ETag and Last-Modified support, so the PDF viewer can fetch the
+    pages it shows instead of the whole file.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, kind, pk):
+        user = request.user
+        if kind == "document":
+            field = get_object_or_404(Document, pk=pk).file
+        elif kind == "submission":
+            submission = get_object_or_404(
+                StudentSubmission.objects.select_related("student"), pk=pk
+            )
+            if user.role == "student" and submission.student.user_id != user.id:
+                return Response({"detail": "Unauthorized"}, status=403)
+            field = submission.file
+        elif kind == "feedback":
+            feedback = get_object_or_404(
+                Feedback.objects.select_related("submission__student"), pk=pk
+            )
+            if (
+                user.role == "student"
+                and feedback.submission.student.user_id != user.id
+            ):
+                return Response({"detail": "Unauthorized"}, status=403)
+            field = feedback.file
+        else:
+            return Response({"error": "Unknown file type"}, status=404)
+
+        if not field:
+            return Response({"error": "File not found"}, status=404)
+        try:
+            return serve_file(request, field)
+        except FileNotFoundError:
+            return Response({"error": "File not found"}, status=404)
+
+
+class SearchView(APIView):
+    """
+    Ranked full-text search over the contents of documents, submissions and
+    feedback the user can see: ``?q=<words>[&kind=submission][&limit=20]
+    [&offset=0]``. Snippets are HTML-escaped with matches in ``<mark>``.
+    """
+
+    permission_classes = [IsAuthenticated]
+    MAX_LIMIT = 50
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"error": "q is required"}, status=400)
+        kinds = request.query_params.getlist("kind")
+        unknown = [kind for kind in kinds if kind not in SEARCH_SOURCES]
+        if unknown:
+            return Response(
+                {"error": f"kind must be one of {', '.join(SEARCH_SOURCES)}"},
+                status=400,
+            )
+        try:
+            limit = min(int(request.query_params.get("limit", 20)), self.MAX_LIMIT)
+            offset = int(request.query_params.get("offset", 0))
+        except ValueError:
+            return Response({"error": "limit and offset must be integers"}, status=400)
+        if limit < 1 or offset < 0:
+            return Response({"error": "limit and offset out of range"}, status=400)
+
+        results = search(request, query, kinds, limit, offset)
+        return Response(
+            {
+                "results": [
+                    {
+                        "kind": entry.kind,
+                        "id": entry.object_id,
+                        "title": entry.title,
+                        "student": entry.student.user.name if entry.student else None,
+                        "snippet": snippet,
+                        "rank": rank,
+                        "stream_url": file_url(
+                            request, entry.kind, entry.file_name, entry.object_id
+                        ),
+                    }
+                    for entry, rank, snippet in results
+                ],
+                "limit": limit,
+                "offset": offset,
+            }
+        )
+
+
 class StudentSubmissionsView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -88,7 +266,7 @@ class StudentSubmissionsView(APIView):
             ]:
                 return Response({"detail": "Unauthorized"}, status=403)
 
-            submissions = StudentSubmission.objects.filter(student=student)
+            submissions = viewer_submissions(student, request.user)
 
             serializer = StudentAllSubmissionSerializer(
                 submissions, many=True, context={"request": request}
@@ -104,7 +282,9 @@ class StudentSubmissionsView(APIView):
             ]:
                 return Response({"detail": "Unauthorized"}, status=403)
 
-            submissions = StudentSubmission.objects.filter(student=student)
+            submissions = StudentSubmission.objects.filter(
+                student=student
+            ).select_related("submission_phase")
             data = [
                 {
                     "id": submission.id,
@@ -125,8 +305,25 @@ class StudentSubmissionsView(APIView):
         )
 
         student_course = request.user.student.course
+        # The student's submissions and their feedbacks are loaded once for
+        # every phase, so the serializer runs no queries of its own
         submission_phases = submission_phases.filter(
             course__in=[student_course, "Both"]
+        ).prefetch_related(
+            Prefetch(
+                "studentsubmission_set",
+                queryset=StudentSubmission.objects.filter(student=request.user.student)
+                .order_by("id")
+                .prefetch_related(
+                    Prefetch(
+                        "feedback_set",
+                        queryset=Feedback.objects.select_related("supervisor").order_by(
+                            "id"
+                        ),
+                    )
+                ),
+                to_attr="student_submissions",
+            )
         )
 
         serializer = CombinedSubmissionSerializer(
@@ -250,6 +447,108 @@ class DeleteFeedbackView(APIView):
             )
 
 
+class FeedbackAnnotationsView(APIView):
+    """
+    The requesting reviewer's vector annotations on a submission. PUT
+    replaces them with ``{"annotations": [...], "version": n}``; ``version``
+    is the one the client last read, and a stale one is answered with 409
+    so a second tab can't silently overwrite newer markup.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get_submission(self, request, submission_id):
+        if request.user.role not in ["supervisor", "examiner", "course_coordinator"]:
+            return None
+        return get_object_or_404(StudentSubmission, id=submission_id)
+
+    def get(self, request, submission_id):
+        submission = self.get_submission(request, submission_id)
+        if submission is None:
+            return Response({"detail": "Unauthorized"}, status=403)
+        feedback = Feedback.objects.filter(
+            submission=submission, supervisor=request.user
+        ).first()
+        if feedback is None:
+            return Response({"id": None, "annotation_version": 0, "annotations": []})
+        return Response(
+            FeedbackAnnotationsSerializer(feedback, context={"request": request}).data
+        )
+
+    def put(self, request, submission_id):
+        submission = self.get_submission(request, submission_id)
+        if submission is None:
+            return Response({"detail": "Unauthorized"}, status=403)
+        if not is_annotatable(submission.file):
+            return Response(
+                {"error": "Only PDF submissions can be annotated"}, status=400
+            )
+        try:
+            annotations = clean_annotations(request.data.get("annotations"))
+        except AnnotationError as e:
+            return Response({"error": str(e)}, status=400)
+
+        with transaction.atomic():
+            feedback, created = Feedback.objects.select_for_update().get_or_create(
+                submission=submission, supervisor=request.user
+            )
+            version = request.data.get("version")
+            if version is not None and version != feedback.annotation_version:
+                return Response(
+                    {
+                        "error": "The annotations were changed elsewhere",
+                        "annotation_version": feedback.annotation_version,
+                    },
+                    status=409,
+                )
+            feedback.annotations = annotations
+            feedback.annotation_version += 1
+            feedback.save(update_fields=["annotations", "annotation_version"])
+
+        return Response(
+            FeedbackAnnotationsSerializer(feedback, context={"request": request}).data,
+            status=201 if created else 200,
+        )
+
+
+class AnnotatedFeedbackView(APIView):
+    """
+    The submission of a feedback with its annotations stamped on as vectors,
+    built on first request and cached until the file or annotations change.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, feedback_id):
+        feedback = get_object_or_404(
+            Feedback.objects.select_related("submission__student"), id=feedback_id
+        )
+        user = request.user
+        if user.role == "student" and feedback.submission.student.user_id != user.id:
+            return Response({"detail": "Unauthorized"}, status=403)
+        if not feedback.annotations or not is_annotatable(feedback.submission.file):
+            return Response({"error": "No annotations"}, status=404)
+
+        try:
+            path, fingerprint = get_annotated_pdf(feedback)
+        except FileNotFoundError:
+            return Response({"error": "File not found"}, status=404)
+
+        etag = f'"{fingerprint}"'
+        if request.headers.get("If-None-Match") == etag:
+            response = HttpResponseNotModified()
+        else:
+            name = os.path.splitext(os.path.basename(feedback.submission.file.name))[0]
+            response = FileResponse(
+                open(path, "rb"),
+                content_type="application/pdf",
+                filename=f"{name}_annotated.pdf",
+            )
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
 class UploadStudentSubmissionView(APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
@@ -270,6 +569,108 @@ class UploadStudentSubmissionView(APIView):
         return Response(serializer.errors, status=400)
 
 
+class UploadSessionCreateView(APIView):
+    """
+    Start a resumable upload: the file is then sent as numbered chunks to
+    UploadChunkView and turned into a submission by UploadSessionCompleteView.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, student_id):
+        if request.user.role != "student" or request.user.id != student_id:
+            return Response({"detail": "Unauthorized"}, status=403)
+
+        serializer = UploadSessionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+
+        # Abandoned uploads are swept whenever a new one starts
+        expire_sessions()
+        session = serializer.save(
+            student=request.user.student, chunk_size=UPLOAD_CHUNK_SIZE
+        )
+        return Response(session_state(session), status=201)
+
+
+def get_upload_session(request, session_id, lock=False):
+    sessions = UploadSession.objects.filter(student__user=request.user)
+    if lock:
+        sessions = sessions.select_for_update()
+    return get_object_or_404(sessions, id=session_id)
+
+
+class UploadSessionView(APIView):
+    """Progress of an upload, used to resume it, or DELETE to abandon it."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, session_id):
+        session = get_upload_session(request, session_id)
+        return Response(session_state(session))
+
+    def delete(self, request, session_id):
+        discard_session(get_upload_session(request, session_id))
+        return Response({"detail": "Upload cancelled"}, status=200)
+
+
+class UploadChunkView(APIView):
+    """
+    PUT the raw bytes of chunk ``index`` with their SHA-256 in the
+    ``X-Chunk-SHA256`` header. Chunks must arrive in order.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, session_id, index):
+        checksum = request.headers.get("X-Chunk-SHA256")
+        if not checksum:
+            return Response({"error": "X-Chunk-SHA256 header is required"}, status=400)
+
+        # The session row stays locked while the chunk is written, so a retry
+        # racing the original request can't write the same bytes twice
+        with transaction.atomic():
+            session = get_upload_session(request, session_id, lock=True)
+            try:
+                write_chunk(session, index, request.stream, checksum)
+            except ChunkError as e:
+                return Response(
+                    {"error": str(e), **session_state(session)}, status=e.status
+                )
+        return Response(session_state(session))
+
+
+class UploadSessionCompleteView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, session_id):
+        with transaction.atomic():
+            session = get_upload_session(request, session_id, lock=True)
+            if session.received != session.size:
+                return Response(
+                    {"error": "Upload is incomplete", **session_state(session)},
+                    status=409,
+                )
+
+            # The part file is streamed into storage, never read into memory
+            with assembled_file(session) as file:
+                serializer = SubmissionUploadSerializer(
+                    data={
+                        "file": file,
+                        "submission_phase": session.submission_phase_id,
+                    },
+                    context={"student": session.student},
+                )
+                if not serializer.is_valid():
+                    return Response(serializer.errors, status=400)
+                submission = serializer.save()
+            discard_session(session)
+
+        return Response(
+            {"detail": "Submission uploaded", "id": submission.id}, status=201
+        )
+
+
 class DeleteSubmissionView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -420,7 +821,8 @@ class LogbookStatusUpdateView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        update_fields = ["status"]
+        # updated_at is listed so the cached PDF export notices the change
+        update_fields = ["status", "updated_at"]
         log.status = status_value
 
         comment = request.data.get("comment")
@@ -502,265 +904,107 @@ class LogbookListView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class HTMLToReportLabParser(html.parser.HTMLParser):
-    def __init__(self, styles):
-        super().__init__()
-        self.styles = styles
-        self.flowables = []
-        self.current_text = []
-        self.current_style = "Normal"
-        self.current_table = None
-        self.current_row = None
-        self.in_table = False
-        self.in_header = False
-        self.header_text = []
-        self.style_stack = []  # To handle nested styles
-
-    def handle_starttag(self, tag, attrs):
-        # Push current style to stack to preserve for nested tags
-        self.style_stack.append(self.current_style)
-
-        if tag == "h1":
-            self.current_style = "CustomTitle"
-        elif tag == "p":
-            self.current_style = "CustomBody"
-            for attr in attrs:
-                if attr[0] == "class" and attr[1] == "section-title":
-                    self.current_style = "SectionTitle"
-                elif attr[0] == "class" and attr[1] == "underline":
-                    self.current_style = "DottedUnderline"
-        elif tag == "span":
-            for attr in attrs:
-                if attr[0] == "class" and attr[1] == "field-label":
-                    self.current_style = "CustomBold"
-                elif attr[0] == "class" and attr[1] == "dotted":
-                    self.current_style = "Dotted"
-                elif attr[0] == "class" and attr[1] == "dotted-content":
-                    self.current_style = "DottedContent"
-        elif tag == "li":
-            self.current_style = "CustomBody"
-            self.current_text.append("• ")  # Use bullet instead of hyphen
-        elif tag == "table":
-            self.in_table = True
-            self.current_table = []
-        elif tag == "tr":
-            self.current_row = []
-        elif tag == "td":
-            self.current_text = []
-        elif tag == "div":
-            for attr in attrs:
-                if attr[0] == "class" and attr[1] == "header":
-                    self.in_header = True
-                    self.header_text = []
-                elif attr[0] == "class" and attr[1] == "page-break":
-                    self.flowables.append(PageBreak())
-        elif tag == "img":
-            src = None
-            for attr in attrs:
-                if attr[0] == "src":
-                    src = attr[1]
-                    break
-            if src:
-                try:
-                    img_path = os.path.join(
-                        settings.STATIC_ROOT, src.replace("/static/", "")
-                    )
-                    if os.path.exists(img_path):
-                        self.flowables.append(Image(img_path, width=80, height=32))
-                except Exception as e:
-                    print(f"Error loading image: {e}")
-
-    def handle_endtag(self, tag):
-        if tag in ("h1", "p", "span", "li"):
-            if self.current_text:
-                text = "".join(self.current_text).strip()
-                if text:
-                    self.flowables.append(
-                        Paragraph(text, self.styles[self.current_style])
-                    )
-                self.current_text = []
-            # Pop style from stack instead of resetting to "Normal"
-            self.current_style = (
-                self.style_stack.pop() if self.style_stack else "Normal"
-            )
-        elif tag == "td":
-            text = "".join(self.current_text).strip()
-            # Wrap text in Paragraph for better control within table cells
-            self.current_row.append(Paragraph(text, self.styles[self.current_style]))
-            self.current_text = []
-        elif tag == "tr":
-            self.current_table.append(self.current_row)
-            self.current_row = []
-        elif tag == "table":
-            self.in_table = False
-            # Dynamic column widths based on page size
-            table = Table(self.current_table, colWidths=[2.5 * inch, 4.5 * inch])
-            table.setStyle(
-                TableStyle(
-                    [
-                        ("LINEBELOW", (0, 0), (-1, -1), 0.25, colors.black),
-                        ("FONTSIZE", (0, 0), (-1, -1), 11),
-                        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                        ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                        ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-                        ("TOPPADDING", (0, 0), (-1, -1), 4),
-                        ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
-                        ("FONTNAME", (0, 0), (-1, -1), "Times-Roman"),
-                        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ]
-                )
-            )
-            self.flowables.append(table)
-        elif tag == "div" and self.in_header:
-            self.in_header = False
-            header_text = "".join(self.header_text).strip()
-            if header_text:
-                self.flowables.append(Paragraph(header_text, self.styles["HeaderText"]))
-        # Ensure style is restored from stack
-        self.current_style = self.style_stack.pop() if self.style_stack else "Normal"
-
-    def handle_data(self, data):
-        if self.in_header:
-            self.header_text.append(data)
-        else:
-            self.current_text.append(data)
-
-
 @csrf_exempt
 def export_logs_pdf(request, student_id):
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = 'attachment; filename="logs_export.pdf"'
-
-    default_font = "Times-Roman"
-    default_font_bold = "Times-Bold"
-
-    styles = getSampleStyleSheet()
-    styles.add(
-        ParagraphStyle(
-            name="CustomTitle",
-            fontName=default_font_bold,
-            fontSize=18,
-            leading=22,
-            spaceAfter=16,
-            spaceBefore=20,
-            alignment=1,  # Center
-        )
-    )
-    styles.add(
-        ParagraphStyle(
-            name="SectionTitle",
-            fontName=default_font_bold,
-            fontSize=14,
-            leading=18,
-            spaceAfter=12,
-            spaceBefore=12,
-            alignment=1,
-        )
-    )
-    styles.add(
-        ParagraphStyle(
-            name="CustomBody",
-            fontName=default_font,
-            fontSize=12,
-            leading=16,
-            spaceAfter=8,
-        )
-    )
-    styles.add(
-        ParagraphStyle(
-            name="CustomBold",
-            fontName=default_font_bold,
-            fontSize=12,
-            leading=16,
-            spaceAfter=4,
-        )
-    )
-    styles.add(
-        ParagraphStyle(
-            name="DottedUnderline",
-            fontName=default_font,
-            fontSize=12,
-            leading=16,
-            spaceAfter=10,
-            alignment=1,
-        )
-    )
-    styles.add(
-        ParagraphStyle(
-            name="Dotted",
-            fontName=default_font,
-            fontSize=12,
-            leading=16,
-            spaceAfter=4,
-        )
-    )
-    styles.add(
-        ParagraphStyle(
-            name="DottedContent",
-            fontName=default_font,
-            fontSize=12,
-            leading=16,
-            spaceAfter=6,
-        )
-    )
-    styles.add(
-        ParagraphStyle(
-            name="HeaderText",
-            fontName=default_font_bold,
-            fontSize=12,
-            leading=14,
-            spaceAfter=8,
-            alignment=1,
-        )
-    )
-
-    print("Generating PDF...")
-
     try:
         try:
-            student = Student.objects.get(user__id=student_id)
+            student = Student.objects.select_related("user", "supervisor").get(
+                user__id=student_id
+            )
         except Student.DoesNotExist:
-            student = Student.objects.get(id=student_id)
+            student = Student.objects.select_related("user", "supervisor").get(
+                id=student_id
+            )
     except Student.DoesNotExist:
         return HttpResponse("Student not found.", status=404)
 
-    logs = Logbook.objects.filter(student=student, status="approved").order_by("date")
-    if not logs.exists():
+    # Served from the cache until an approved logbook or the student changes
+    cached = get_logbook_pdf(student)
+    if cached is None:
         return HttpResponse("No logs available for export.", status=404)
-
-    context = {
-        "logs": logs,
-        "project_title": student.topic or "No topic assigned",
-        "student_name": student.user.name,
-        "student_id": student.student_id,
-        "student_email": student.user.email,
-        "student_mobile": "N/A",
-        "student_department": "IS / SE / CS",
-        "supervisor_name": student.supervisor.name if student.supervisor else "N/A",
-        "supervisor_email": student.supervisor.email if student.supervisor else "N/A",
-        "generate_date": datetime.now(),
-    }
-
-    html_content = render_to_string("logbooks.html", context)
-    parser = HTMLToReportLabParser(styles)
-    parser.feed(html_content)
-    story = parser.flowables
-
-    class CustomDocTemplate(BaseDocTemplate):
-        def __init__(self, filename, **kwargs):
-            super().__init__(filename, **kwargs)
-            self.addPageTemplates(self._create_page_template())
-
-        def _create_page_template(self):
-            frame = Frame(
-                0.75 * inch,
-                0.75 * inch,
-                letter[0] - 1.5 * inch,
-                letter[1] - 1.5 * inch,
-                id="normal",
-            )
-            return PageTemplate(id="custom", frames=[frame])
-
-    doc = CustomDocTemplate(response, pagesize=letter)
-    doc.build(story)
+    path, fingerprint = cached
+
+    etag = f'"{fingerprint}"'
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(open(path, "rb"), content_type="application/pdf")
+        response["Content-Disposition"] = 'attachment; filename="logs_export.pdf"'
+    response["ETag"] = etag
     return response
+
+
+class ExportJobCreateView(APIView):
+    """
+    Queue a bulk logbook export. Coordinators may pass ``supervisor``,
+    ``course`` and/or ``students`` (ids); supervisors always export their own
+    students, optionally only ``students``. Poll ExportJobView for progress.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        user = request.user
+        students = request.data.get("students") or []
+        if not isinstance(students, list) or not all(
+            isinstance(student_id, int) for student_id in students
+        ):
+            return Response(
+                {"error": "students must be a list of student ids"}, status=400
+            )
+
+        if user.role == "course_coordinator" or user.is_superuser:
+            course, _ = get_cohort_scope(
+                request, {"course": request.data.get("course")}
+            )
+            supervisor = request.data.get("supervisor")
+            if (
+                supervisor is not None
+                and not User.objects.filter(id=supervisor, role="supervisor").exists()
+            ):
+                return Response({"error": "Supervisor not found"}, status=404)
+        elif user.role == "supervisor":
+            course, supervisor = None, user.id
+        else:
+            return Response({"detail": "Unauthorized"}, status=403)
+
+        # Old exports are swept, and lost ones failed, whenever one is queued
+        expire_jobs()
+        job = ExportJob.objects.create(
+            created_by=user,
+            supervisor_id=supervisor,
+            course=course or "",
+            student_ids=students,
+        )
+        transaction.on_commit(lambda: enqueue_export(job.pk))
+        return Response(
+            ExportJobSerializer(job, context={"request": request}).data, status=202
+        )
+
+
+def get_export_job(request, job_id):
+    jobs = ExportJob.objects.all()
+    if not request.user.is_superuser:
+        jobs = jobs.filter(created_by=request.user)
+    return get_object_or_404(jobs, id=job_id)
+
+
+class ExportJobView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = get_export_job(request, job_id)
+        return Response(ExportJobSerializer(job, context={"request": request}).data)
+
+
+class ExportJobDownloadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = get_export_job(request, job_id)
+        if job.status != "done" or not job.file:
+            return Response({"error": "Export is not ready"}, status=409)
+        try:
+            return serve_file(request, job.file, as_attachment=True)
+        except FileNotFoundError:
+            return Response({"error": "File not found"}, status=404)
@@ -1,19 +1,42 @@
-from django.contrib import admin
-from django.http import HttpResponse
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from rest_framework.exceptions import APIException
+from grades.agreement import get_agreement_report
+from grades.engine import regrade_cohort
+from grades.simulator import parse_simulation, simulate_grading
 from grades.forms import StudentMarkAdminForm
 from grades.resources import (
     CriteriaResource,
     GradeResource,
     RubricResource,
     StudentGradesResource,
+    StudentMarkBulkResource,
     StudentMarkResource,
 )
 from .models import Grade, Rubric, Criteria, StudentGrade, StudentMark
+from django.db.models import Prefetch
 from import_export.admin import ImportExportModelAdmin
 import csv
+from grades.utils import COURSES, MODES, IsCourseCoordinator, get_cohort_scope
 from users.utils import get_coordinator_course_filter
 from django import forms
-from import_export.admin import ExportMixin
+from import_export.admin import ExportMixin, ImportExportMixin
+
+
+def regrade_courses(modeladmin, request, courses):
+    # Shared by the Rubric and StudentGrade "regrade" actions
+    for course in sorted(courses):
+        report = regrade_cohort(course)
+        modeladmin.message_user(
+            request,
+            f"{course}: {report['students']} student(s) regraded, "
+            f"{report['totals_changed']} total(s) and "
+            f"{report['letters_changed']} grade letter(s) changed.",
+            messages.SUCCESS,
+        )
 
 
 # Rubric Admin
@@ -41,7 +64,8 @@ class RubricAdmin(ImportExportModelAdmin):
     list_filter = ("course",)
     search_fields = ("label",)
     ordering = ("steps",)
-    actions = ["get_scheme"]
+    actions = ["get_scheme", "regrade_cohort"]
+    import_export_change_list_template = "admin/grades/rubric/change_list.html"
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
@@ -73,6 +97,90 @@ class RubricAdmin(ImportExportModelAdmin):
 
     get_scheme.short_description = "Download CSV scheme for Rubric/Criteria"
 
+    @admin.action(description="Regrade the cohorts of the selected rubrics' courses")
+    def regrade_cohort(self, request, queryset):
+        courses = set(queryset.values_list("course", flat=True))
+        regrade_courses(self, request, courses)
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path(
+                "simulate/",
+                self.admin_site.admin_view(self.simulate_view),
+                name="grades_rubric_simulate",
+            ),
+        ]
+        return custom_urls + urls
+
+    def simulate_view(self, request):
+        """Preview the effect of new weightages and grade bands without saving."""
+        params = request.POST if request.method == "POST" else request.GET
+        try:
+            course, _ = get_cohort_scope(request, {"course": params.get("course")})
+        except APIException as e:
+            self.message_user(request, str(e.detail), messages.ERROR)
+            return HttpResponseRedirect(reverse("admin:grades_rubric_simulate"))
+        courses = [course] if course else list(COURSES)
+
+        # Form fields default to the current scheme and bands
+        rubrics = list(
+            Rubric.objects.filter(course__in=courses)
+            .prefetch_related(
+                Prefetch("criterias", queryset=Criteria.objects.order_by("id"))
+            )
+            .order_by("course", "steps", "id")
+        )
+        grades = list(Grade.objects.all())
+        proposal = {"rubrics": {}, "criteria": {}, "bands": []}
+        for rubric in rubrics:
+            rubric.proposed = params.get(f"rubric_{rubric.id}") or rubric.weightage
+            proposal["rubrics"][rubric.id] = rubric.proposed
+            for criteria in rubric.criterias.all():
+                criteria.proposed = (
+                    params.get(f"criteria_{criteria.id}") or criteria.weightage
+                )
+                proposal["criteria"][criteria.id] = criteria.proposed
+        for grade in grades:
+            grade.proposed_min = params.get(f"band_{grade.id}_min") or grade.min_mark
+            grade.proposed_max = params.get(f"band_{grade.id}_max") or grade.max_mark
+            proposal["bands"].append(
+                {
+                    "grade_letter": grade.grade_letter,
+                    "min_mark": grade.proposed_min,
+                    "max_mark": grade.proposed_max,
+                }
+            )
+
+        result = shift_rows = None
+        letters = [grade.grade_letter for grade in grades] + ["N/A"]
+        if request.method == "POST":
+            try:
+                result = simulate_grading(course, **parse_simulation(proposal, courses))
+                shift_rows = [
+                    (
+                        current,
+                        [result["shift"].get(current, {}).get(p, 0) for p in letters],
+                    )
+                    for current in letters
+                ]
+            except ValueError as e:
+                self.message_user(request, str(e), messages.ERROR)
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "What-if Grading Simulator",
+            "course": course,
+            "courses": COURSES,
+            "rubrics": rubrics,
+            "grades": grades,
+            "letters": letters,
+            "shift_rows": shift_rows,
+            "result": result,
+        }
+        return TemplateResponse(request, "admin/grades/simulator.html", context)
+
 
 # Criteria Admin
 @admin.register(Criteria)
@@ -124,7 +232,7 @@ class CriteriaAdmin(ImportExportModelAdmin):
 
 
 @admin.register(StudentMark)
-class StudentMarkAdmin(ExportMixin, admin.ModelAdmin):
+class StudentMarkAdmin(ImportExportMixin, admin.ModelAdmin):
     resource_class = StudentMarkResource
     form = StudentMarkAdminForm
     list_display = (
@@ -140,6 +248,11 @@ class StudentMarkAdmin(ExportMixin, admin.ModelAdmin):
     list_select_related = ("student", "criteria", "criteria__rubric", "evaluator")
     list_editable = ("mark",)
     actions = ["get_scheme"]
+    import_export_change_list_template = "admin/grades/studentmark/change_list.html"
+
+    def get_import_resource_classes(self, request):
+        # Exports keep the readable StudentMarkResource columns
+        return [StudentMarkBulkResource]
 
     def rubric_display(self, obj):
         return obj.criteria.rubric.label
@@ -182,6 +295,42 @@ class StudentMarkAdmin(ExportMixin, admin.ModelAdmin):
 
     get_scheme.short_description = "Download CSV scheme for StudentMark"
 
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path(
+                "inter-rater/",
+                self.admin_site.admin_view(self.inter_rater_view),
+                name="grades_studentmark_inter_rater",
+            ),
+        ]
+        return custom_urls + urls
+
+    def inter_rater_view(self, request):
+        """Evaluator bias, per-rubric agreement and outlying marks."""
+        # Staff access alone isn't enough, the report names every evaluator
+        if not IsCourseCoordinator().has_permission(request, self):
+            raise PermissionDenied
+        try:
+            course, mode = get_cohort_scope(request)
+        except APIException as e:
+            self.message_user(request, str(e.detail), messages.ERROR)
+            return HttpResponseRedirect(reverse("admin:grades_studentmark_inter_rater"))
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Inter-rater Agreement",
+            "course": course,
+            "mode": mode,
+            "courses": COURSES,
+            "modes": MODES,
+            "report": get_agreement_report(course, mode),
+        }
+        return TemplateResponse(
+            request, "admin/grades/inter_rater_report.html", context
+        )
+
 
 # StudentGrades Admin
 @admin.register(StudentGrade)
@@ -191,7 +340,7 @@ class StudentGradesAdmin(ExportMixin, admin.ModelAdmin):
     search_fields = ("student__user__name",)
     list_select_related = ("student",)
     readonly_fields = ("grade", "total_mark", "student")
-    actions = ["get_scheme"]
+    actions = ["get_scheme", "regrade_cohort"]
 
     def has_add_permission(self, request, obj=None):
         return False
@@ -220,6 +369,11 @@ class StudentGradesAdmin(ExportMixin, admin.ModelAdmin):
 
     get_scheme.short_description = "Download CSV scheme for StudentGrades"
 
+    @admin.action(description="Regrade the whole cohort of the selected students")
+    def regrade_cohort(self, request, queryset):
+        courses = set(queryset.values_list("student__course", flat=True))
+        regrade_courses(self, request, courses - {"inactive"})
+
 
 # Grade Admin
 @admin.register(Grade)
@@ -0,0 +1,215 @@
+import numpy as np
+from django.core.cache import cache
+from django.db.models import F
+
+from users.models import Student, User
+from .caching import MARKS_VERSION, get_version
+from .engine import _pair_keys
+from .models import Criteria, Rubric, StudentMark
+from .schemes import SCHEME_VERSION
+
+AGREEMENT_TIMEOUT = 60 * 10
+
+# Marks further than this many standard deviations from the other raters of
+# the same (student, criterion) are listed as outliers
+OUTLIER_Z = 2.5
+MAX_OUTLIERS = 100
+
+# An evaluator is flagged as biased once their mean offset is more than two
+# standard errors from zero over at least this many paired marks
+MIN_BIAS_PAIRS = 5
+
+
+def _round(value):
+    return None if value is None or not np.isfinite(value) else round(float(value), 2)
+
+
+def build_agreement_report(course=None, mode=None):
+    """
+    Inter-rater agreement over every StudentMark of the cohort in one pass.
+
+    Marks are compared as a percentage of the criterion's max mark. A mark is
+    "paired" when another evaluator marked the same (student, criterion); its
+    offset is the difference to the mean of those other marks. The report
+    holds per-evaluator mean offsets, a one-way ICC(1) per rubric and the
+    paired marks with the most extreme offsets.
+    """
+    marks = (
+        StudentMark.objects.filter(criteria__rubric__course=F("student__course"))
+        .exclude(mark=0)
+        .exclude(evaluator=None)
+    )
+    if course:
+        marks = marks.filter(student__course=course)
+    if mode:
+        marks = marks.filter(student__mode=mode)
+    rows = list(
+        marks.values_list(
+            "student_id",
+            "criteria_id",
+            "criteria__rubric_id",
+            "criteria__max_mark",
+            "evaluator_id",
+            "mark",
+        )
+    )
+    report = {
+        "course": course or "all",
+        "mode": mode or "all",
+        "marks": len(rows),
+        "paired_marks": 0,
+        "evaluators": [],
+        "rubrics": [],
+        "outliers": [],
+    }
+    if not rows:
+        return report
+
+    student, criteria, rubric, max_mark, evaluator, mark = (
+        np.array(column) for column in zip(*rows)
+    )
+    student = student.astype(np.int64)
+    criteria = criteria.astype(np.int64)
+    score = mark / max_mark * 100
+
+    # Group marks by (student, criterion) cell
+    cells, cell = np.unique(_pair_keys(student, criteria), return_inverse=True)
+    cell_count = np.bincount(cell)
+    cell_total = np.bincount(cell, weights=score)
+    cell_mean = cell_total / cell_count
+    paired = cell_count[cell] > 1
+    report["paired_marks"] = int(paired.sum())
+    if not paired.any():
+        return report
+
+    # Offset of each paired mark from the mean of the other raters' marks
+    others_mean = (cell_total[cell] - score)[paired] / (cell_count[cell][paired] - 1)
+    offset = score[paired] - others_mean
+
+    # Per-evaluator bias
+    evaluator_ids, position = np.unique(evaluator[paired], return_inverse=True)
+    pairs = np.bincount(position)
+    mean_offset = np.bincount(position, weights=offset) / pairs
+    variance = np.bincount(position, weights=offset**2) / pairs - mean_offset**2
+    std_offset = np.sqrt(np.maximum(variance, 0))
+    standard_error = std_offset / np.sqrt(np.maximum(pairs - 1, 1))
+    biased = (pairs >= MIN_BIAS_PAIRS) & (np.abs(mean_offset) > 2 * standard_error)
+
+    # ICC(1) per rubric over cells with more than one rater, using the average
+    # group size for unbalanced designs
+    multi = cell_count > 1
+    cell_rubric = np.zeros(len(cells), dtype=np.int64)
+    cell_rubric[cell] = rubric
+    rubric_ids, rubric_position = np.unique(cell_rubric[multi], return_inverse=True)
+    targets = np.bincount(rubric_position)
+    ratings = np.bincount(rubric_position, weights=cell_count[multi])
+    grand_mean = np.bincount(rubric_position, weights=cell_total[multi]) / ratings
+    between = np.bincount(
+        rubric_position,
+        weights=cell_count[multi]
+        * (cell_mean[multi] - grand_mean[rubric_position]) ** 2,
+    )
+    within = np.bincount(
+        np.searchsorted(rubric_ids, rubric[paired]),
+        weights=(score[paired] - cell_mean[cell][paired]) ** 2,
+        minlength=len(rubric_ids),
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ms_between = between / (targets - 1)
+        ms_within = within / (ratings - targets)
+        group_size = (
+            ratings
+            - np.bincount(rubric_position, weights=cell_count[multi] ** 2) / ratings
+        ) / (targets - 1)
+        icc = (ms_between - ms_within) / (ms_between + (group_size - 1) * ms_within)
+
+    # Outlying marks by z-score of their offset
+    spread = offset.std()
+    z = (offset - offset.mean()) / spread if spread else np.zeros_like(offset)
+    flagged = np.flatnonzero(np.abs(z) >= OUTLIER_Z)
+    flagged = flagged[np.argsort(-np.abs(z[flagged]), kind="stable")][:MAX_OUTLIERS]
+
+    paired_score = score[paired]
+    paired_student = student[paired]
+    paired_criteria = criteria[paired]
+    paired_evaluator = evaluator[paired]
+    names = dict(
+        User.objects.filter(id__in=evaluator_ids.tolist()).values_list("id", "name")
+    )
+    student_names = dict(
+        Student.objects.filter(id__in=paired_student[flagged].tolist()).values_list(
+            "id", "user__name"
+        )
+    )
+    criteria_labels = dict(
+        Criteria.objects.filter(id__in=paired_criteria[flagged].tolist()).values_list(
+            "id", "label"
+        )
+    )
+    rubric_labels = {
+        rubric_id: (steps, label)
+        for rubric_id, steps, label in Rubric.objects.filter(
+            id__in=rubric_ids.tolist()
+        ).values_list("id", "steps", "label")
+    }
+
+    report["evaluators"] = sorted(
+        (
+            {
+                "id": int(evaluator_id),
+                "name": names.get(int(evaluator_id)),
+                "paired_marks": int(pairs[index]),
+                "mean_offset": _round(mean_offset[index]),
+                "std_offset": _round(std_offset[index]),
+                "biased": bool(biased[index]),
+            }
+            for index, evaluator_id in enumerate(evaluator_ids)
+        ),
+        key=lambda row: -abs(row["mean_offset"]),
+    )
+    report["rubrics"] = [
+        {
+            "id": int(rubric_id),
+            "label": rubric_labels[int(rubric_id)][1],
+            "students": int(targets[index]),
+            "ratings": int(ratings[index]),
+            "icc": _round(icc[index]),
+        }
+        for index, rubric_id in sorted(
+            enumerate(rubric_ids), key=lambda item: rubric_labels[int(item[1])]
+        )
+    ]
+    report["outliers"] = [
+        {
+            "student_id": int(paired_student[index]),
+            "student": student_names.get(int(paired_student[index])),
+            "criteria_id": int(paired_criteria[index]),
+            "criteria": criteria_labels.get(int(paired_criteria[index])),
+            "evaluator_id": int(paired_evaluator[index]),
+            "evaluator": names.get(int(paired_evaluator[index])),
+            "score": _round(paired_score[index]),
+            "others_mean": _round(others_mean[index]),
+            "z": _round(z[index]),
+        }
+        for index in flagged
+    ]
+    return report
+
+
+def get_agreement_report(course=None, mode=None):
+    """Cached ``build_agreement_report``, rebuilt when marks or the scheme change."""
+    key = ":".join(
+        [
+            "grades",
+            "agreement",
+            get_version(MARKS_VERSION),
+            get_version(SCHEME_VERSION),
+            course or "all",
+            mode or "all",
+        ]
+    )
+    report = cache.get(key)
+    if report is None:
+        report = build_agreement_report(course, mode)
+        cache.set(key, report, AGREEMENT_TIMEOUT)
+    return report
@@ -0,0 +1,167 @@
+from math import ceil
+
+from django.core.cache import cache
+from django.db.models import Aggregate, Avg, Count, F, FloatField, StdDev, Value
+from django.db.models.functions import Floor, Least
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import MARKS_VERSION, bump_version, get_version
+from .models import StudentGrade, StudentMark, StudentRubricScore
+
+# Short enough that a missed invalidation heals itself quickly during marking
+ANALYTICS_TIMEOUT = 60
+
+
+class PercentileCont(Aggregate):
+    """PostgreSQL ``percentile_cont``, e.g. ``PercentileCont("score", 0.5)``."""
+
+    function = "PERCENTILE_CONT"
+    name = "PercentileCont"
+    template = "%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = FloatField()
+
+    def __init__(self, expression, percentile, **extra):
+        super().__init__(expression, percentile=float(percentile), **extra)
+
+
+def _summary(queryset, group_fields, field):
+    """Mean, median and std of ``field`` for each group, computed by the DB."""
+    return queryset.values(*group_fields).annotate(
+        count=Count("id"),
+        mean=Avg(field),
+        median=PercentileCont(field, 0.5),
+        std=StdDev(field),
+    )
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def total_mark_histogram(grades, bin_width):
+    """Counts of ``total_mark`` per ``bin_width`` wide bin from 0 to 100."""
+    last_bin = ceil(100 / bin_width) - 1
+    rows = (
+        grades.annotate(
+            # 100 belongs in the last bin rather than a bin of its own
+            bin=Least(Floor(F("total_mark") / bin_width), Value(float(last_bin)))
+        )
+        .values("bin")
+        .annotate(count=Count("id"))
+    )
+    counts = {int(row["bin"]): row["count"] for row in rows}
+    return [
+        {
+            "min": position * bin_width,
+            "max": min((position + 1) * bin_width, 100),
+            "count": counts.get(position, 0),
+        }
+        for position in range(last_bin + 1)
+    ]
+
+
+def build_cohort_analytics(course=None, mode=None, bin_width=10):
+    filters = {}
+    if course:
+        filters["student__course"] = course
+    if mode:
+        filters["student__mode"] = mode
+
+    grades = StudentGrade.objects.filter(**filters)
+    letters = (
+        grades.values("grade__grade_letter")
+        .annotate(count=Count("id"))
+        .order_by("-grade__min_mark")
+    )
+    overall = grades.aggregate(
+        count=Count("id"),
+        mean=Avg("total_mark"),
+        median=PercentileCont("total_mark", 0.5),
+        std=StdDev("total_mark"),
+    )
+
+    rubric_rows = _summary(
+        StudentRubricScore.objects.filter(
+            rubric__course=F("student__course"), **filters
+        ),
+        ["rubric_id", "rubric__label"],
+        "score",
+    ).order_by("rubric__steps", "rubric_id")
+
+    criteria_rows = _summary(
+        StudentMark.objects.filter(
+            criteria__rubric__course=F("student__course"), **filters
+        ).exclude(mark=0),
+        ["criteria_id", "criteria__label", "criteria__rubric_id"],
+        "mark",
+    ).order_by("criteria__rubric__steps", "criteria__rubric_id", "criteria_id")
+
+    return {
+        "course": course or "all",
+        "mode": mode or "all",
+        "students": overall["count"],
+        "total_mark": {
+            "mean": _round(overall["mean"]),
+            "median": _round(overall["median"]),
+            "std": _round(overall["std"]),
+            "histogram": total_mark_histogram(grades, bin_width),
+        },
+        "grades": [
+            {"grade": row["grade__grade_letter"] or "N/A", "count": row["count"]}
+            for row in letters
+        ],
+        "rubrics": [
+            {
+                "id": row["rubric_id"],
+                "label": row["rubric__label"],
+                "count": row["count"],
+                "mean": _round(row["mean"]),
+                "median": _round(row["median"]),
+                "std": _round(row["std"]),
+            }
+            for row in rubric_rows
+        ],
+        "criteria": [
+            {
+                "id": row["criteria_id"],
+                "label": row["criteria__label"],
+                "rubric": row["criteria__rubric_id"],
+                "count": row["count"],
+                "mean": _round(row["mean"]),
+                "median": _round(row["median"]),
+                "std": _round(row["std"]),
+            }
+            for row in criteria_rows
+        ],
+    }
+
+
+def get_cohort_analytics(course=None, mode=None, bin_width=10):
+    """Cached ``build_cohort_analytics``, dropped whenever marks change."""
+    key = ":".join(
+        [
+            "grades",
+            "analytics",
+            get_version(MARKS_VERSION),
+            course or "all",
+            mode or "all",
+            str(bin_width),
+        ]
+    )
+    analytics = cache.get(key)
+    if analytics is None:
+        analytics = build_cohort_analytics(course, mode, bin_width)
+        cache.set(key, analytics, ANALYTICS_TIMEOUT)
+    return analytics
+
+
+@receiver(post_save, sender=StudentMark)
+@receiver(post_delete, sender=StudentMark)
+@receiver(post_save, sender=StudentGrade)
+@receiver(post_delete, sender=StudentGrade)
+def invalidate_cohort_analytics(sender, instance, **kwargs):
+    # Fires per row, but bump_version writes once when the transaction
+    # commits, so a grade save costs one version write however many marks
+    # it replaces
+    bump_version(MARKS_VERSION)
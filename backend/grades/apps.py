@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class GradesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'grades'
+
+    def ready(self):
+        # Registers the receivers that keep the grade band index, marking
+        # scheme and analytics caches fresh and StudentGrade in step with
+        # StudentMark changes
+        from . import analytics, bands, schemes, signals  # noqa: F401
@@ -0,0 +1,95 @@
+import threading
+from bisect import bisect_right
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import MARKS_VERSION, bump_version, get_version
+from .models import Grade, StudentGrade
+
+BANDS_VERSION = "grade_bands"
+
+
+class GradeBandIndex:
+    """
+    Grade bands sorted by ``min_mark`` for bisect lookups. ``lookup`` returns
+    the band with the highest ``min_mark`` that contains the mark, matching the
+    ``Grade`` default ordering the old per-save query relied on.
+    """
+
+    def __init__(self, grades):
+        self.grades = sorted(grades, key=lambda grade: grade.min_mark)
+        self.min_marks = [grade.min_mark for grade in self.grades]
+
+    def lookup(self, mark):
+        position = bisect_right(self.min_marks, mark)
+        # Walk down from the closest lower bound; bands normally don't overlap
+        # so this stops at the first candidate
+        while position > 0:
+            position -= 1
+            grade = self.grades[position]
+            if mark <= grade.max_mark:
+                return grade
+        return None
+
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+
+
+def get_band_index():
+    """Process-level band index, rebuilt when the bands version changes."""
+    global _index, _index_version
+    version = get_version(BANDS_VERSION)
+    if _index is None or _index_version != version:
+        with _lock:
+            if _index is None or _index_version != version:
+                _index = GradeBandIndex(Grade.objects.all())
+                _index_version = version
+    return _index
+
+
+def grade_for_mark(mark):
+    return get_band_index().lookup(mark)
+
+
+def reband_student_grades():
+    """
+    Re-assign StudentGrade.grade for every student from the current bands in a
+    single pass. Marks are not recalculated. Returns the number of rows changed.
+    """
+    index = get_band_index()
+    changed = []
+    for pk, total_mark, grade_id in StudentGrade.objects.values_list(
+        "id", "total_mark", "grade_id"
+    ):
+        grade = index.lookup(total_mark)
+        new_grade_id = grade.id if grade else None
+        if new_grade_id != grade_id:
+            changed.append(StudentGrade(id=pk, grade_id=new_grade_id))
+    StudentGrade.objects.bulk_update(changed, ["grade"], batch_size=500)
+    if changed:
+        bump_version(MARKS_VERSION)
+    return len(changed)
+
+
+def schedule_reband():
+    """
+    Re-band once when the current transaction commits, however many bands were
+    touched in it (e.g. a list_editable save in GradeAdmin or a Grade import).
+    """
+    connection = transaction.get_connection()
+    if any(entry[1] is reband_student_grades for entry in connection.run_on_commit):
+        return
+    transaction.on_commit(reband_student_grades)
+
+
+@receiver(post_save, sender=Grade)
+@receiver(post_delete, sender=Grade)
+def invalidate_grade_bands(sender, instance, **kwargs):
+    global _index
+    _index = None
+    bump_version(BANDS_VERSION)
+    schedule_reband()
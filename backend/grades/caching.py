@@ -0,0 +1,63 @@
+from uuid import uuid4
+
+from django.db import transaction
+
+from .models import CacheVersion
+
+# Bumped whenever stored marks, totals or grade letters change
+MARKS_VERSION = "marks"
+
+
+class _VersionBump:
+    """
+    On-commit callback storing a fresh token for ``name``. Until then,
+    ``token`` is what the writing transaction itself sees.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.token = uuid4().hex
+
+    def __call__(self):
+        _store_version(self.name)
+
+
+def _pending_bump(name):
+    connection = transaction.get_connection()
+    for entry in connection.run_on_commit:
+        if isinstance(entry[1], _VersionBump) and entry[1].name == name:
+            return entry[1]
+    return None
+
+
+def get_version(name):
+    """
+    Current version token for ``name``. Cached values are kept per process
+    under keys that include the token, and the token lives in the database,
+    so a bump made by one worker invalidates them in every worker.
+    """
+    # Values built inside a transaction that bumped ``name`` go under a
+    # token of its own, which is forgotten on commit or rollback
+    bump = _pending_bump(name)
+    if bump is not None:
+        return bump.token
+    version, _ = CacheVersion.objects.get_or_create(
+        name=name, defaults={"token": uuid4().hex}
+    )
+    return version.token
+
+
+def _store_version(name):
+    CacheVersion.objects.update_or_create(name=name, defaults={"token": uuid4().hex})
+
+
+def bump_version(name):
+    """
+    Invalidate everything built against the current version of ``name``.
+
+    The new token is written once when the current transaction commits, however
+    many times it bumps ``name``, so writers don't hold a lock on the shared
+    row and a rollback leaves the version alone.
+    """
+    if _pending_bump(name) is None:
+        transaction.on_commit(_VersionBump(name))
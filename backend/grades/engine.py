@@ -0,0 +1,445 @@
+import copy
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Prefetch
+
+from users.models import Student
+from .bands import get_band_index
+from .caching import MARKS_VERSION, bump_version
+from .models import (
+    Criteria,
+    Rubric,
+    StudentGrade,
+    StudentMark,
+    StudentRubricScore,
+)
+
+
+class GradingPlan:
+    """
+    Rubrics and criteria for one (course, mode) pair flattened into parallel
+    lists, so a student's marks can be scored without touching the database.
+    Rubrics are kept in ``steps`` order and criteria in ``id`` order, which is
+    the order ``StudentGrade.recalculate_total_mark`` has always summed them in.
+    """
+
+    def __init__(self, course, mode, rubrics):
+        self.course = course
+        self.mode = mode
+
+        # Per-rubric arrays
+        self.rubric_ids = []
+        self.rubric_labels = []
+        self.rubric_weightages = []
+        self.rubric_supervisor = []
+        self.rubric_examiner = []
+
+        # Per-criterion arrays, criteria_rubric holds the rubric position
+        self.criteria_ids = []
+        self.criteria_rubric = []
+        self.criteria_weightages = []
+        self.criteria_max_marks = []
+
+        for rubric in rubrics:
+            position = len(self.rubric_ids)
+            self.rubric_ids.append(rubric.id)
+            self.rubric_labels.append(rubric.label)
+            self.rubric_weightages.append(rubric.weightage)
+            self.rubric_supervisor.append("supervisor" in rubric.pic)
+            self.rubric_examiner.append("examiner" in rubric.pic)
+            for criteria in rubric.criterias.all():
+                self.criteria_ids.append(criteria.id)
+                self.criteria_rubric.append(position)
+                self.criteria_weightages.append(criteria.weightage)
+                self.criteria_max_marks.append(criteria.max_mark)
+
+        self.criteria_index = {
+            criteria_id: position
+            for position, criteria_id in enumerate(self.criteria_ids)
+        }
+
+    def score(self, marks, supervisor_id, evaluator_ids):
+        """
+        Score ``marks``, an iterable of ``(criteria_id, evaluator_id, mark)``
+        rows, in a single pass. Returns ``(total_mark, rubric_totals)`` where
+        ``rubric_totals`` lines up with ``rubric_ids`` and already includes the
+        rubric weightage. The total is not rounded.
+        """
+        size = len(self.criteria_ids)
+        supervisor_sum = [0.0] * size
+        supervisor_count = [0] * size
+        examiner_sum = [0.0] * size
+        examiner_count = [0] * size
+
+        for criteria_id, evaluator_id, mark in marks:
+            position = self.criteria_index.get(criteria_id)
+            if position is None or mark == 0:
+                continue
+            # A supervisor who is also an evaluator counts in both groups
+            if evaluator_id in evaluator_ids:
+                examiner_sum[position] += mark
+                examiner_count[position] += 1
+            if evaluator_id == supervisor_id:
+                supervisor_sum[position] += mark
+                supervisor_count[position] += 1
+
+        rubric_scores = [0.0] * len(self.rubric_ids)
+        for position in range(size):
+            rubric = self.criteria_rubric[position]
+            max_mark = self.criteria_max_marks[position]
+            weightage = self.criteria_weightages[position]
+
+            examiner_score = 0
+            if examiner_count[position] and self.rubric_examiner[rubric]:
+                avg_examiner_mark = examiner_sum[position] / examiner_count[position]
+                examiner_score = (avg_examiner_mark / max_mark * weightage) / 100
+
+            supervisor_score = 0
+            if supervisor_count[position] and self.rubric_supervisor[rubric]:
+                avg_supervisor_mark = (
+                    supervisor_sum[position] / supervisor_count[position]
+                )
+                supervisor_score = (avg_supervisor_mark / max_mark * weightage) / 100
+
+            rubric_scores[rubric] += examiner_score + supervisor_score
+
+        total_mark = 0
+        rubric_totals = []
+        for rubric_score, weightage in zip(rubric_scores, self.rubric_weightages):
+            rubric_total = rubric_score * weightage
+            rubric_totals.append(rubric_total)
+            total_mark += rubric_total
+        return total_mark, rubric_totals
+
+    def with_weightages(self, rubrics=None, criteria=None):
+        """
+        Copy of the plan with some weightages replaced; ``rubrics`` and
+        ``criteria`` map ids to the new weightage. Ids not in the plan are
+        ignored.
+        """
+        plan = copy.copy(self)
+        if rubrics:
+            plan.rubric_weightages = [
+                rubrics.get(rubric_id, weightage)
+                for rubric_id, weightage in zip(self.rubric_ids, self.rubric_weightages)
+            ]
+        if criteria:
+            plan.criteria_weightages = [
+                criteria.get(criteria_id, weightage)
+                for criteria_id, weightage in zip(
+                    self.criteria_ids, self.criteria_weightages
+                )
+            ]
+        return plan
+
+
+def build_plan(course, mode, rubric_ids=None):
+    """
+    Compile the grading plan for a course and student mode (2 queries).
+    ``rubric_ids`` restricts the plan to some of the course's rubrics.
+    """
+    rubrics = Rubric.objects.filter(course=course)
+    if rubric_ids is not None:
+        rubrics = rubrics.filter(id__in=rubric_ids)
+    rubrics = rubrics.order_by("steps", "id").prefetch_related(
+        Prefetch(
+            "criterias",
+            queryset=Criteria.objects.filter(mode__in=[mode, "both"]).order_by("id"),
+        )
+    )
+    return GradingPlan(course, mode, rubrics)
+
+
+def load_student_marks(student, criteria_ids=None):
+    """All non-zero marks for a student as (criteria_id, evaluator_id, mark)."""
+    marks = StudentMark.objects.filter(student=student)
+    if criteria_ids is not None:
+        marks = marks.filter(criteria_id__in=criteria_ids)
+    return (
+        marks.exclude(mark=0)
+        .order_by("id")
+        .values_list("criteria_id", "evaluator_id", "mark")
+    )
+
+
+def score_student(student, plan=None):
+    """Return ``(total_mark, rubric_totals, plan)`` for a single student."""
+    if plan is None:
+        plan = build_plan(student.course, student.mode)
+    evaluator_ids = {evaluator.id for evaluator in student.evaluators.all()}
+    total_mark, rubric_totals = plan.score(
+        load_student_marks(student), student.supervisor_id, evaluator_ids
+    )
+    return total_mark, rubric_totals, plan
+
+
+class CohortMatrix:
+    """
+    Marks for a cohort laid out as students x criteria arrays, split by the
+    role of the evaluator. Rows follow ``student_ids`` and columns follow the
+    plan's ``criteria_ids``.
+    """
+
+    def __init__(self, plan, student_ids):
+        self.plan = plan
+        self.student_ids = list(student_ids)
+        self.row_index = {
+            student_id: row for row, student_id in enumerate(self.student_ids)
+        }
+        shape = (len(self.student_ids), len(plan.criteria_ids))
+        self.supervisor_sum = np.zeros(shape)
+        self.supervisor_count = np.zeros(shape, dtype=np.int64)
+        self.examiner_sum = np.zeros(shape)
+        self.examiner_count = np.zeros(shape, dtype=np.int64)
+
+    def load(self, rows, supervisors, evaluator_pairs):
+        """
+        Fill the matrix from ``rows`` of (student_id, criteria_id, evaluator_id,
+        mark) in id order, as returned by ``fetch_cohort_marks``. Rows for other
+        students or criteria outside the plan are ignored. ``supervisors`` maps
+        student id to supervisor id and ``evaluator_pairs`` is an iterable of
+        (student_id, evaluator_id).
+        """
+        rows = [
+            row
+            for row in rows
+            if row[0] in self.row_index and row[1] in self.plan.criteria_index
+        ]
+        if not rows:
+            return self
+
+        student_ids, criteria_ids, evaluator_ids, marks = zip(*rows)
+        row = np.array([self.row_index[sid] for sid in student_ids])
+        column = np.array([self.plan.criteria_index[cid] for cid in criteria_ids])
+        # -1 stands in for a missing evaluator/supervisor so None == None still
+        # matches, exactly like filtering on evaluator=None did
+        evaluator = np.array(
+            [-1 if eid is None else eid for eid in evaluator_ids], dtype=np.int64
+        )
+        supervisor = np.array(
+            [
+                -1 if supervisors.get(sid) is None else supervisors[sid]
+                for sid in student_ids
+            ],
+            dtype=np.int64,
+        )
+        marks = np.array(marks, dtype=float)
+
+        pairs = np.array(list(evaluator_pairs), dtype=np.int64).reshape(-1, 2)
+        is_examiner = np.isin(
+            _pair_keys(np.array(student_ids, dtype=np.int64), evaluator),
+            _pair_keys(pairs[:, 0], pairs[:, 1]),
+        )
+        is_supervisor = evaluator == supervisor
+
+        # np.add.at applies repeated indices in order, so each cell is summed
+        # in id order just like the per-student path
+        np.add.at(
+            self.examiner_sum,
+            (row[is_examiner], column[is_examiner]),
+            marks[is_examiner],
+        )
+        np.add.at(self.examiner_count, (row[is_examiner], column[is_examiner]), 1)
+        np.add.at(
+            self.supervisor_sum,
+            (row[is_supervisor], column[is_supervisor]),
+            marks[is_supervisor],
+        )
+        np.add.at(self.supervisor_count, (row[is_supervisor], column[is_supervisor]), 1)
+        return self
+
+    def score(self, plan=None):
+        """
+        Apply the plan's weight vectors to every student at once. Returns
+        ``(totals, rubric_totals)`` as students and students x rubrics arrays.
+        ``plan`` may be a ``with_weightages`` variant of the loaded plan.
+        """
+        plan = plan or self.plan
+        max_marks = np.array(plan.criteria_max_marks, dtype=float)
+        weightages = np.array(plan.criteria_weightages, dtype=float)
+        criteria_rubric = np.array(plan.criteria_rubric, dtype=np.int64)
+        examiner_enabled = np.array(plan.rubric_examiner, dtype=bool)[criteria_rubric]
+        supervisor_enabled = np.array(plan.rubric_supervisor, dtype=bool)[
+            criteria_rubric
+        ]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            examiner_avg = self.examiner_sum / self.examiner_count
+            supervisor_avg = self.supervisor_sum / self.supervisor_count
+            examiner_score = np.where(
+                (self.examiner_count > 0) & examiner_enabled,
+                (examiner_avg / max_marks * weightages) / 100,
+                0.0,
+            )
+            supervisor_score = np.where(
+                (self.supervisor_count > 0) & supervisor_enabled,
+                (supervisor_avg / max_marks * weightages) / 100,
+                0.0,
+            )
+        criteria_scores = examiner_score + supervisor_score
+
+        # Accumulate column by column to keep the summation order identical
+        # to GradingPlan.score; there are only a few dozen criteria
+        students = len(self.student_ids)
+        rubric_scores = np.zeros((students, len(plan.rubric_ids)))
+        for column, rubric in enumerate(plan.criteria_rubric):
+            rubric_scores[:, rubric] += criteria_scores[:, column]
+
+        rubric_totals = rubric_scores * np.array(plan.rubric_weightages, dtype=float)
+        totals = np.zeros(students)
+        for rubric in range(len(plan.rubric_ids)):
+            totals += rubric_totals[:, rubric]
+        return totals, rubric_totals
+
+
+def fetch_cohort_marks(student_ids):
+    """Every non-zero mark for the given students in one query, in id order."""
+    return list(
+        StudentMark.objects.filter(student_id__in=student_ids)
+        .exclude(mark=0)
+        .order_by("id")
+        .values_list("student_id", "criteria_id", "evaluator_id", "mark")
+    )
+
+
+def _pair_keys(first, second):
+    return (first << 32) | (second & 0xFFFFFFFF)
+
+
+def store_rubric_scores(student_ids, scores):
+    """
+    Bring StudentRubricScore for ``student_ids`` in line with ``scores``
+    ({(student_id, rubric_id): score}), touching only rows that differ.
+    """
+    existing = {
+        (student_id, rubric_id): (pk, score)
+        for pk, student_id, rubric_id, score in StudentRubricScore.objects.filter(
+            student_id__in=student_ids
+        ).values_list("id", "student_id", "rubric_id", "score")
+    }
+    stale = [pk for key, (pk, _) in existing.items() if key not in scores]
+    if stale:
+        StudentRubricScore.objects.filter(id__in=stale).delete()
+    StudentRubricScore.objects.bulk_create(
+        [
+            StudentRubricScore(student_id=student_id, rubric_id=rubric_id, score=score)
+            for (student_id, rubric_id), score in scores.items()
+            if existing.get((student_id, rubric_id), (None, None))[1] != score
+        ],
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["student", "rubric"],
+        update_fields=["score"],
+    )
+
+
+def load_cohort_matrices(course, students):
+    """
+    Load the marks of ``students`` ({student_id: Student}, all in ``course``)
+    with a single mark query and return ``(plan, student_ids, matrix)`` for
+    each student mode in the cohort.
+    """
+    supervisors = {sid: student.supervisor_id for sid, student in students.items()}
+    evaluator_pairs = list(
+        Student.evaluators.through.objects.filter(student_id__in=students).values_list(
+            "student_id", "user_id"
+        )
+    )
+    rows = fetch_cohort_marks(list(students))
+
+    matrices = []
+    for mode in sorted({student.mode for student in students.values()}):
+        plan = build_plan(course, mode)
+        student_ids = [sid for sid, student in students.items() if student.mode == mode]
+        matrix = CohortMatrix(plan, student_ids).load(
+            rows, supervisors, evaluator_pairs
+        )
+        matrices.append((plan, student_ids, matrix))
+    return matrices
+
+
+def regrade_cohort(course, student_ids=None):
+    """
+    Recompute every StudentGrade of a course cohort (or only those of
+    ``student_ids``) in bulk and write back only the rows that changed.
+    Returns a dict with the number of students graded and how many totals and
+    grade letters changed.
+    """
+    student_grades = StudentGrade.objects.filter(student__course=course)
+    if student_ids is not None:
+        student_grades = student_grades.filter(student_id__in=student_ids)
+    student_grades = list(student_grades.select_related("student"))
+    report = {
+        "course": course,
+        "students": 0,
+        "totals_changed": 0,
+        "letters_changed": 0,
+    }
+    if not student_grades:
+        return report
+
+    students = {sg.student_id: sg.student for sg in student_grades}
+    bands = get_band_index()
+
+    new_totals = {}
+    new_scores = {}
+    for plan, student_ids, matrix in load_cohort_matrices(course, students):
+        totals, rubric_totals = matrix.score()
+        for row, student_id in enumerate(student_ids):
+            new_totals[student_id] = round(float(totals[row]), 1)
+            for rubric_id, score in zip(plan.rubric_ids, rubric_totals[row]):
+                new_scores[(student_id, rubric_id)] = float(score)
+
+    changed = []
+    for student_grade in student_grades:
+        total_mark = new_totals[student_grade.student_id]
+        grade = bands.lookup(total_mark)
+        grade_id = grade.id if grade else None
+        total_changed = student_grade.total_mark != total_mark
+        letter_changed = student_grade.grade_id != grade_id
+        if total_changed:
+            report["totals_changed"] += 1
+        if letter_changed:
+            report["letters_changed"] += 1
+        if total_changed or letter_changed:
+            student_grade.total_mark = total_mark
+            student_grade.grade = grade
+            changed.append(student_grade)
+
+    with transaction.atomic():
+        StudentGrade.objects.bulk_update(
+            changed, ["total_mark", "grade"], batch_size=500
+        )
+        store_rubric_scores(list(students), new_scores)
+    bump_version(MARKS_VERSION)
+    report["students"] = len(students)
+    return report
+
+
+def regrade_students(student_ids):
+    """
+    Bring the StudentGrade of each of ``student_ids`` up to date in bulk,
+    creating the ones that do not exist yet.
+    """
+    courses = {}
+    for student_id, course in Student.objects.filter(id__in=student_ids).values_list(
+        "id", "course"
+    ):
+        courses.setdefault(course, []).append(student_id)
+    graded = set(
+        StudentGrade.objects.filter(student_id__in=student_ids).values_list(
+            "student_id", flat=True
+        )
+    )
+    # regrade_cohort() fills in the totals of the new rows
+    StudentGrade.objects.bulk_create(
+        [
+            StudentGrade(student_id=student_id, total_mark=0)
+            for ids in courses.values()
+            for student_id in ids
+            if student_id not in graded
+        ],
+        batch_size=500,
+    )
+    return [regrade_cohort(course, ids) for course, ids in sorted(courses.items())]
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from grades.engine import regrade_cohort
+from grades.utils import COURSES
+
+
+class Command(BaseCommand):
+    help = "Recompute every StudentGrade of one or more course cohorts in bulk."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "courses",
+            nargs="*",
+            help="Courses to regrade (defaults to both FYP1 and FYP2).",
+        )
+
+    def handle(self, *args, **options):
+        # Checked here: argparse rejects an empty list against ``choices``
+        courses = options["courses"] or COURSES
+        unknown = [course for course in courses if course not in COURSES]
+        if unknown:
+            raise CommandError(
+                f"Unknown course(s): {', '.join(unknown)}. "
+                f"Choose from {', '.join(COURSES)}."
+            )
+        for course in courses:
+            report = regrade_cohort(course)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{course}: {report['students']} student(s) regraded, "
+                    f"{report['totals_changed']} total(s) and "
+                    f"{report['letters_changed']} grade letter(s) changed."
+                )
+            )
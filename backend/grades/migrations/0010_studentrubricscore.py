@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-18 18:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grades", "0009_remove_rubric_mode_criteria_mode"),
+        ("users", "0018_student_cgpa"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StudentRubricScore",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField(default=0)),
+                (
+                    "rubric",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="student_scores",
+                        to="grades.rubric",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rubric_scores",
+                        to="users.student",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("student", "rubric")},
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-18 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grades", "0010_studentrubricscore"),
+        ("users", "0018_student_cgpa"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="studentgrade",
+            index=models.Index(
+                fields=["total_mark", "id"], name="grades_stud_total_m_b2dde7_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grades", "0011_studentgrade_total_mark_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CacheVersion",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("token", models.CharField(max_length=32)),
+            ],
+        ),
+    ]
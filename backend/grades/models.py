@@ -112,68 +112,84 @@ class StudentGrade(models.Model):
     total_mark = models.FloatField()
     grade = models.ForeignKey(Grade, on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta:
+        # Keyset pagination on the total marks page orders by (total_mark, id)
+        indexes = [models.Index(fields=["total_mark", "id"])]
+
     def recalculate_total_mark(self):
-        total_mark = 0
-        rubrics = Rubric.objects.filter(course=self.student.course).order_by("steps")
-        for rubric in rubrics:
-            criteria_list = rubric.criterias.filter(
-                mode__in=[self.student.mode, "both"]
-            ).order_by("id")
-            rubric_score = 0
-            for criteria in criteria_list:
-                # Group marks by evaluator type
-                examiner_marks = StudentMark.objects.filter(
-                    student=self.student,
-                    criteria=criteria,
-                    evaluator__in=self.student.evaluators.all(),
-                ).exclude(mark=0)
-                supervisor_marks = StudentMark.objects.filter(
-                    student=self.student,
-                    criteria=criteria,
-                    evaluator=self.student.supervisor,
-                ).exclude(mark=0)
-
-                # Calculate examiner contribution
-                examiner_score = 0
-                if examiner_marks.exists() and "examiner" in rubric.pic:
-                    avg_examiner_mark = (
-                        sum(mark.mark for mark in examiner_marks)
-                        / examiner_marks.count()
-                    )
-                    examiner_score = (
-                        avg_examiner_mark / criteria.max_mark * criteria.weightage
-                    ) / 100
-
-                # Calculate supervisor contribution
-                supervisor_score = 0
-                if supervisor_marks.exists() and "supervisor" in rubric.pic:
-                    avg_supervisor_mark = (
-                        sum(mark.mark for mark in supervisor_marks)
-                        / supervisor_marks.count()
-                    )
-                    supervisor_score = (
-                        avg_supervisor_mark / criteria.max_mark * criteria.weightage
-                    ) / 100
-
-                # Sum examiner and supervisor scores for the criteria
-                criteria_score = examiner_score + supervisor_score
-                rubric_score += criteria_score
-            # Apply rubric weightage
-            total_mark += rubric_score * rubric.weightage
+        # Imported here because the engine builds on the models in this module
+        from .engine import score_student
+        from .schemes import get_plan
+
+        student = self.student
+        total_mark, rubric_totals, plan = score_student(
+            student, get_plan(student.course, student.mode)
+        )
         self.total_mark = round(total_mark, 1)  # Round to 1 decimal place
-        # Update or create StudentGrade
-        self.grade = Grade.objects.filter(
-            min_mark__lte=self.total_mark, max_mark__gte=self.total_mark
-        ).first()
+        # save() assigns the matching Grade
         self.save()
+        StudentRubricScore.store(
+            self.student_id, dict(zip(plan.rubric_ids, rubric_totals))
+        )
 
     def save(self, *args, **kwargs):
+        from .bands import grade_for_mark
+
         # Automatically assign grade based on total_mark
-        self.grade = Grade.objects.filter(
-            min_mark__lte=self.total_mark, max_mark__gte=self.total_mark
-        ).first()
+        self.grade = grade_for_mark(self.total_mark)
         super().save(*args, **kwargs)
 
     def __str__(self):
         grade_display = self.grade.grade_letter if self.grade else "N/A"
         return f"{self.student} - Total: {self.total_mark} - Grade: {grade_display}"
+
+
+class StudentRubricScore(models.Model):
+    """
+    Weighted contribution of one rubric to a student's total mark, kept up to
+    date whenever the student's grade is recalculated so the total marks page
+    can read the breakdown without re-scoring every student.
+    """
+
+    student = models.ForeignKey(
+        Student, on_delete=models.CASCADE, related_name="rubric_scores"
+    )
+    rubric = models.ForeignKey(
+        Rubric, on_delete=models.CASCADE, related_name="student_scores"
+    )
+    score = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ("student", "rubric")
+
+    def __str__(self):
+        return f"{self.student} - {self.rubric} - {self.score}"
+
+    @classmethod
+    def store(cls, student_id, scores):
+        """Replace a student's rubric scores with ``scores`` ({rubric_id: score})."""
+        cls.objects.filter(student_id=student_id).exclude(
+            rubric_id__in=list(scores)
+        ).delete()
+        cls.objects.bulk_create(
+            [
+                cls(student_id=student_id, rubric_id=rubric_id, score=score)
+                for rubric_id, score in scores.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["student", "rubric"],
+            update_fields=["score"],
+        )
+
+
+class CacheVersion(models.Model):
+    """
+    Version token of a family of cached grading data (see grades/caching.py).
+    Kept in the database so that every worker process sees a bump.
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    token = models.CharField(max_length=32)
+
+    def __str__(self):
+        return f"{self.name}: {self.token}"
@@ -1,7 +1,10 @@
+from django.core.exceptions import ValidationError
 from users.models import Student, User
 from .models import Grade, Rubric, Criteria, StudentMark, StudentGrade
+from .engine import regrade_students
 from import_export import resources, fields
-from import_export.widgets import ForeignKeyWidget, JSONWidget
+from import_export.instance_loaders import BaseInstanceLoader
+from import_export.widgets import FloatWidget, ForeignKeyWidget, JSONWidget
 import json
 
 
@@ -138,6 +141,147 @@ class StudentMarkResource(resources.ModelResource):
         import_id_fields = ("student", "criteria", "evaluator")
 
 
+class CachedForeignKeyWidget(ForeignKeyWidget):
+    """
+    ForeignKeyWidget that resolves values from a map built once per file with
+    ``load()`` instead of running a query per row.
+    """
+
+    def __init__(self, model, field="pk", queryset=None, **kwargs):
+        super().__init__(model, field, **kwargs)
+        self.queryset = queryset if queryset is not None else model.objects.all()
+        self.lookup = None
+
+    @staticmethod
+    def key(value):
+        # Spreadsheets hand numeric ids over as floats
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value).strip()
+
+    def load(self, values):
+        keys = {self.key(value) for value in values if value not in (None, "")}
+        self.lookup = {
+            self.key(getattr(obj, self.field)): obj
+            for obj in self.queryset.filter(**{f"{self.field}__in": keys})
+        }
+
+    def clean(self, value, row=None, **kwargs):
+        if self.lookup is None:
+            return super().clean(value, row, **kwargs)
+        if value in (None, ""):
+            return None
+        try:
+            return self.lookup[self.key(value)]
+        except KeyError:
+            raise ValueError(
+                f"{self.model._meta.verbose_name.capitalize()} with "
+                f"{self.field} {value} does not exist."
+            )
+
+
+class StudentMarkInstanceLoader(BaseInstanceLoader):
+    """
+    Loads the existing marks for every student and criteria in the file with
+    a single query, keyed on (student, criteria, evaluator).
+    """
+
+    def __init__(self, resource, dataset=None):
+        super().__init__(resource, dataset)
+        self.key_fields = [
+            resource.fields[name] for name in resource.get_import_id_fields()
+        ]
+        students = resource.fields["student"].widget.lookup or {}
+        criteria = resource.fields["criteria"].widget.lookup or {}
+        self.instances = {
+            (mark.student_id, mark.criteria_id, mark.evaluator_id): mark
+            for mark in StudentMark.objects.filter(
+                student__in=students.values(), criteria__in=criteria.values()
+            )
+        }
+
+    def get_instance(self, row):
+        try:
+            key = tuple(
+                getattr(field.clean(row), "pk", None) for field in self.key_fields
+            )
+        except ValueError:
+            # Reported as a validation error once the row is imported
+            return None
+        return self.instances.get(key)
+
+
+class StudentMarkBulkResource(resources.ModelResource):
+    """
+    Fast import for large mark sheets with the columns ``student_id``,
+    ``criteria_id``, ``evaluator_email`` and ``mark``. Foreign keys are resolved
+    from maps built once per file, marks are checked against
+    ``criteria.max_mark`` in memory and rows are written with
+    bulk_create/bulk_update. Each affected student's grade is recomputed once
+    after the import.
+    """
+
+    student = fields.Field(
+        column_name="student_id",
+        attribute="student",
+        widget=CachedForeignKeyWidget(
+            Student,
+            "student_id",
+            # Student.__str__ reads the user's name for the import preview
+            queryset=Student.objects.select_related("user"),
+        ),
+    )
+    criteria = fields.Field(
+        column_name="criteria_id",
+        attribute="criteria",
+        widget=CachedForeignKeyWidget(Criteria, "pk"),
+    )
+    evaluator = fields.Field(
+        column_name="evaluator_email",
+        attribute="evaluator",
+        widget=CachedForeignKeyWidget(User, "email"),
+    )
+    mark = fields.Field(column_name="mark", attribute="mark", widget=FloatWidget())
+
+    class Meta:
+        model = StudentMark
+        name = "Student marks by student ID (bulk)"
+        fields = ("student", "criteria", "evaluator", "mark")
+        import_id_fields = ("student", "criteria", "evaluator")
+        instance_loader_class = StudentMarkInstanceLoader
+        use_bulk = True
+        batch_size = 1000
+        skip_diff = True
+
+    def before_import(self, dataset, **kwargs):
+        for name in ("student", "criteria", "evaluator"):
+            field = self.fields[name]
+            if field.column_name in dataset.headers:
+                field.widget.load(dataset[field.column_name])
+        self.affected_students = set()
+
+    def import_instance(self, instance, row, **kwargs):
+        super().import_instance(instance, row, **kwargs)
+        # Same rules as StudentMark.clean(), without its per-row criteria query
+        if instance.mark is None:
+            raise ValidationError({"mark": "This field is required."})
+        instance.mark = round(instance.mark, 1)
+        max_mark = instance.criteria.max_mark
+        if instance.mark < 0 or instance.mark > max_mark:
+            raise ValidationError({"mark": f"Mark must be between 0 and {max_mark}."})
+        if instance.mark == 0:
+            raise ValidationError({"mark": "Mark cannot be 0."})
+
+    def before_save_instance(self, instance, row, **kwargs):
+        self.affected_students.add(instance.student_id)
+
+    def after_import(self, dataset, result, **kwargs):
+        if kwargs.get("dry_run") or result.has_errors():
+            return
+        # Bulk writes send no signals, so grades are brought up to date here
+        regrade_students(self.affected_students)
+
+
 # Resource for StudentGrades
 class StudentGradesResource(resources.ModelResource):
     student = fields.Field(
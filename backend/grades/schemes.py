@@ -0,0 +1,108 @@
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import bump_version, get_version
+from .engine import build_plan
+from .models import Criteria, Rubric
+from .serializers import MarkingSchemeSerializer, RubricSerializer
+
+SCHEME_VERSION = "marking_scheme"
+
+# Marking schemes change a couple of times a semester and every change bumps
+# the version, which lives in the database so every worker sees it on its
+# next read; entries only need a timeout to free memory eventually
+SCHEME_TIMEOUT = 60 * 60 * 24
+
+
+def _cached(kind, *parts, build):
+    key = ":".join(
+        ["grades", kind, get_version(SCHEME_VERSION)] + [str(part) for part in parts]
+    )
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, SCHEME_TIMEOUT)
+    return value
+
+
+def _course_rubrics(course):
+    rubrics = Rubric.objects.all()
+    if course:
+        rubrics = rubrics.filter(course=course)
+    return rubrics.prefetch_related(
+        Prefetch("criterias", queryset=Criteria.objects.order_by("id"))
+    )
+
+
+def get_marking_scheme(course, mode, role):
+    """
+    Serialized rubrics a supervisor or examiner marks for a student of
+    ``course`` and ``mode``: rubrics assigned to ``role`` that have criteria
+    for the mode, in steps order.
+    """
+
+    def build():
+        rubrics = [
+            rubric
+            for rubric in _course_rubrics(course).order_by("steps", "id")
+            if role in rubric.pic
+            and any(
+                criteria.mode in (mode, "both") for criteria in rubric.criterias.all()
+            )
+        ]
+        serializer = RubricSerializer(rubrics, many=True, context={"mode": mode})
+        return list(serializer.data)
+
+    return _cached("scheme", course, mode, role, build=build)
+
+
+def get_grading_sheet(course, mode):
+    """
+    Every rubric of ``course`` as ``(rubric_id, scheme, criteria_count)``
+    where ``scheme`` is the serialized rubric and ``criteria_count`` the number
+    of its criteria that apply to ``mode``.
+    """
+
+    def build():
+        return [
+            (
+                rubric.id,
+                RubricSerializer(rubric).data,
+                sum(
+                    criteria.mode in (mode, "both")
+                    for criteria in rubric.criterias.all()
+                ),
+            )
+            for rubric in _course_rubrics(course).order_by("steps", "id")
+        ]
+
+    return _cached("sheet", course, mode, build=build)
+
+
+def get_course_schemes(course=""):
+    """Serialized marking schemes for one course, or all of them."""
+
+    def build():
+        rubrics = _course_rubrics(course)
+        if course:
+            rubrics = rubrics.order_by("steps", "id")
+        else:
+            rubrics = rubrics.order_by("course", "steps", "id")
+        return list(MarkingSchemeSerializer(rubrics, many=True).data)
+
+    return _cached("schemes", course or "all", build=build)
+
+
+def get_plan(course, mode):
+    """The course's GradingPlan, shared until the marking scheme changes."""
+    return _cached("plan", course, mode, build=lambda: build_plan(course, mode))
+
+
+@receiver(post_save, sender=Rubric)
+@receiver(post_delete, sender=Rubric)
+@receiver(post_save, sender=Criteria)
+@receiver(post_delete, sender=Criteria)
+def invalidate_marking_schemes(sender, instance, **kwargs):
+    bump_version(SCHEME_VERSION)
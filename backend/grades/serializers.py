@@ -25,11 +25,17 @@ class RubricSerializer(serializers.ModelSerializer):
         ]
 
     def get_contents(self, obj):
-        return [criteria.label for criteria in obj.criterias.all()]
+        # A "mode" in the context limits the labels to that student mode
+        mode = self.context.get("mode")
+        return [
+            criteria.label
+            for criteria in obj.criterias.all()
+            if mode is None or criteria.mode in (mode, "both")
+        ]
 
     def get_marks(self, obj):
-
-        criteria = obj.criterias.first()
+        # Lowest id first, like criterias.first(), but served from a prefetch
+        criteria = min(obj.criterias.all(), key=lambda c: c.id, default=None)
         return int(criteria.max_mark) if criteria else 0
 
 
@@ -62,29 +68,13 @@ class TotalMarksSerializer(serializers.Serializer):
         return grade.grade_letter if grade else "N/A"
 
     def get_breakdown(self, obj):
-        student_marks = StudentMark.objects.filter(student=obj.student).select_related(
-            "criteria__rubric"
-        )
-        breakdown = {}
-        for rubric in Rubric.objects.filter(course=obj.student.course).order_by(
-            "steps"
-        ):
-            criteria_list = rubric.criterias.filter(mode__in=[obj.student.mode, "both"])
-            rubric_score = 0
-            for criteria in criteria_list:
-                marks = student_marks.filter(criteria_id=criteria.id)
-                if marks.exists():
-                    avg_mark = sum(mark.mark for mark in marks) / marks.count()
-                    normalized_score = (
-                        avg_mark / criteria.max_mark * criteria.weightage
-                    ) / 100
-                    rubric_score += normalized_score
-            # Apply rubric weightage
-            rubric_total = rubric_score * rubric.weightage
-            breakdown[rubric.label] = round(
-                rubric_total, 2
-            )  # Round to 2 decimal places
-        return breakdown
+        # Read from the materialized StudentRubricScore rows; the view prefetches
+        # them with their rubric, ordered by steps
+        return {
+            score.rubric.label: round(score.score, 2)  # Round to 2 decimal places
+            for score in obj.student.rubric_scores.all()
+            if score.rubric.course == obj.student.course
+        }
 
 
 class MarkingSchemeSerializer(serializers.ModelSerializer):
@@ -101,5 +91,5 @@ class MarkingSchemeSerializer(serializers.ModelSerializer):
 
     def get_marks(self, obj):
         # Return max_mark from first Criteria, assuming all Criteria have the same max_mark
-        criteria = obj.criterias.first()
+        criteria = min(obj.criterias.all(), key=lambda c: c.id, default=None)
         return int(criteria.max_mark) if criteria else 0
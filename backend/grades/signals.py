@@ -1,17 +1,180 @@
-from django.db.models.signals import post_save, post_delete
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import FilteredRelation, Q
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
-from grades.models import StudentGrade, StudentMark
+from grades.engine import build_plan, load_student_marks
+from grades.models import (
+    Criteria,
+    Rubric,
+    StudentGrade,
+    StudentMark,
+    StudentRubricScore,
+)
+from users.models import Student
 
+_state = threading.local()
 
-@receiver(post_save, sender=StudentMark)
-@receiver(post_delete, sender=StudentMark)
-def update_student_grade(sender, instance, **kwargs):
-    # Only recalculate if non-zero marks exist for the student
-    if StudentMark.objects.filter(student=instance.student).exclude(mark=0).exists():
+
+class GradeUpdateBatch:
+    """Students whose grades are due for a recompute when the batch ends."""
+
+    def __init__(self):
+        self.student_ids = set()
+
+    def touch(self, student_id):
+        self.student_ids.add(student_id)
+
+
+@contextmanager
+def suspend_grade_updates():
+    """
+    Defer grade maintenance for StudentMark changes made inside the block and
+    recompute each affected student once when it exits cleanly. Paths that
+    bypass signals, such as bulk_create, register students with
+    ``batch.touch(student_id)``. Nested blocks share the outer batch.
+    """
+    batch = getattr(_state, "batch", None)
+    if batch is not None:
+        yield batch
+        return
+
+    batch = _state.batch = GradeUpdateBatch()
+    try:
+        yield batch
+    finally:
+        _state.batch = None
+    for student_id in batch.student_ids:
+        refresh_student_grade(student_id)
+
+
+def refresh_student_grade(student_id):
+    """Full recompute of one student's grade and rubric scores."""
+    # Only keep a grade if non-zero marks exist for the student
+    if StudentMark.objects.filter(student_id=student_id).exclude(mark=0).exists():
         student_grade, created = StudentGrade.objects.get_or_create(
-            student=instance.student, defaults={"total_mark": 0}
+            student_id=student_id, defaults={"total_mark": 0}
         )
         student_grade.recalculate_total_mark()
     else:
-        # Delete StudentGrade if no non-zero marks exist
-        StudentGrade.objects.filter(student=instance.student).delete()
+        StudentGrade.objects.filter(student_id=student_id).delete()
+        StudentRubricScore.objects.filter(student_id=student_id).delete()
+
+
+def apply_mark_change(mark, deleted=False):
+    """
+    Fold a single StudentMark change into the stored aggregate: only the
+    affected rubric is re-scored, then the total is re-summed from the
+    student's StudentRubricScore rows. Falls back to a full recompute when the
+    stored aggregate is missing or incomplete.
+    """
+    student = mark.student
+    if deleted and not (
+        StudentMark.objects.filter(student=student).exclude(mark=0).exists()
+    ):
+        refresh_student_grade(student.id)
+        return
+
+    student_grade = StudentGrade.objects.filter(student=student).first()
+    if student_grade is None:
+        refresh_student_grade(student.id)
+        return
+
+    plan = build_plan(
+        student.course, student.mode, rubric_ids=[mark.criteria.rubric_id]
+    )
+    if not plan.rubric_ids:
+        # The mark belongs to another course's rubric, the total is unaffected
+        return
+
+    evaluator_ids = {evaluator.id for evaluator in student.evaluators.all()}
+    _, rubric_totals = plan.score(
+        load_student_marks(student, plan.criteria_ids),
+        student.supervisor_id,
+        evaluator_ids,
+    )
+    StudentRubricScore.objects.update_or_create(
+        student=student,
+        rubric_id=plan.rubric_ids[0],
+        defaults={"score": rubric_totals[0]},
+    )
+
+    # Re-sum in steps order so the total matches a full recompute exactly
+    rubric_scores = (
+        Rubric.objects.filter(course=student.course)
+        .annotate(
+            own_score=FilteredRelation(
+                "student_scores", condition=Q(student_scores__student=student)
+            )
+        )
+        .order_by("steps", "id")
+        .values_list("own_score__score", flat=True)
+    )
+    total_mark = 0
+    for score in rubric_scores:
+        if score is None:
+            refresh_student_grade(student.id)
+            return
+        total_mark += score
+    student_grade.total_mark = round(total_mark, 1)  # Round to 1 decimal place
+    student_grade.save()
+
+
+def _deleting(origin, *models):
+    """Whether ``origin`` (an instance or a queryset) is of one of ``models``."""
+    return isinstance(origin, models) or getattr(origin, "model", None) in models
+
+
+@receiver(post_save, sender=StudentMark)
+@receiver(post_delete, sender=StudentMark)
+def update_student_grade(sender, instance, origin=None, **kwargs):
+    # The student (and with them their grade) is being deleted as well
+    if _deleting(origin, Student):
+        return
+    # The marks of a rubric or criteria being deleted: its rubric scores are
+    # already gone, the students are re-graded once it is (see below)
+    if _deleting(origin, Rubric, Criteria):
+        return
+
+    batch = getattr(_state, "batch", None)
+    if batch is not None:
+        batch.touch(instance.student_id)
+        return
+    apply_mark_change(instance, deleted=kwargs["signal"] is post_delete)
+
+
+@receiver(pre_delete, sender=Rubric)
+@receiver(pre_delete, sender=Criteria)
+def remember_marked_students(sender, instance, origin=None, **kwargs):
+    if sender is Criteria and _deleting(origin, Rubric):
+        return
+    marks = StudentMark.objects.exclude(mark=0)
+    if sender is Rubric:
+        marks = marks.filter(criteria__rubric=instance)
+    else:
+        marks = marks.filter(criteria=instance)
+    instance._marked_student_ids = set(marks.values_list("student_id", flat=True))
+
+
+@receiver(post_delete, sender=Rubric)
+@receiver(post_delete, sender=Criteria)
+def regrade_marked_students(sender, instance, origin=None, **kwargs):
+    # A rubric's criteria go with it, the rubric's own signal covers them
+    if sender is Criteria and _deleting(origin, Rubric):
+        return
+    student_ids = getattr(instance, "_marked_student_ids", ())
+
+    batch = getattr(_state, "batch", None)
+    if batch is not None:
+        for student_id in student_ids:
+            batch.touch(student_id)
+        return
+
+    # After the whole delete, once the scheme no longer has the rubric
+    def regrade():
+        for student_id in student_ids:
+            refresh_student_grade(student_id)
+
+    transaction.on_commit(regrade)
@@ -0,0 +1,152 @@
+import math
+from collections import Counter
+
+from .bands import GradeBandIndex, get_band_index
+from .engine import load_cohort_matrices
+from .models import Criteria, Grade, Rubric, StudentGrade
+from .utils import COURSES
+
+
+def parse_weightages(values, model, courses):
+    """
+    ``{id: weightage}`` from user input, checked against the rubrics or
+    criteria of ``courses``. Raises ValueError on anything unusable.
+    """
+    try:
+        weightages = {int(pk): float(weightage) for pk, weightage in values.items()}
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError(f"{model.__name__} weightages must map ids to numbers.")
+    if not all(math.isfinite(weightage) for weightage in weightages.values()):
+        raise ValueError(f"{model.__name__} weightages must be finite numbers.")
+    if any(weightage < 0 for weightage in weightages.values()):
+        raise ValueError(f"{model.__name__} weightages cannot be negative.")
+
+    course_field = "course" if model is Rubric else "rubric__course"
+    known = set(
+        model.objects.filter(
+            id__in=weightages, **{f"{course_field}__in": courses}
+        ).values_list("id", flat=True)
+    )
+    unknown = sorted(set(weightages) - known)
+    if unknown:
+        raise ValueError(
+            f"Unknown {model.__name__} id(s): {', '.join(map(str, unknown))}."
+        )
+    return weightages
+
+
+def parse_bands(values):
+    """Unsaved Grade rows from ``[{grade_letter, min_mark, max_mark}, ...]``."""
+    bands = []
+    try:
+        for band in values:
+            grade = Grade(
+                grade_letter=str(band["grade_letter"]),
+                gpa_value=float(band.get("gpa_value", 0)),
+                min_mark=float(band["min_mark"]),
+                max_mark=float(band["max_mark"]),
+            )
+            if not all(
+                map(math.isfinite, (grade.gpa_value, grade.min_mark, grade.max_mark))
+            ):
+                raise ValueError(
+                    f"Band {grade.grade_letter}: marks must be finite numbers."
+                )
+            if grade.min_mark > grade.max_mark:
+                raise ValueError(
+                    f"Band {grade.grade_letter}: min_mark is above max_mark."
+                )
+            bands.append(grade)
+    except (KeyError, TypeError, AttributeError):
+        raise ValueError(
+            "Bands must be a list of {grade_letter, min_mark, max_mark} objects."
+        )
+    return bands
+
+
+def simulate_grading(course=None, rubrics=None, criteria=None, bands=None):
+    """
+    Re-score the cohort in memory with proposed rubric/criteria weightages
+    ({id: weightage}) and grade bands (unsaved Grade rows) and compare with the
+    current scheme on the same marks. Nothing is written.
+
+    Returns the letter shift matrix ({current: {proposed: count}}) and every
+    student whose total or letter changes.
+    """
+    courses = [course] if course else list(COURSES)
+    current_bands = get_band_index()
+    proposed_bands = GradeBandIndex(bands) if bands is not None else current_bands
+
+    def letter(index, total):
+        grade = index.lookup(total)
+        return grade.grade_letter if grade else "N/A"
+
+    shift = {}
+    affected = []
+    student_count = 0
+    for cohort in courses:
+        students = {
+            sg.student_id: sg.student
+            for sg in StudentGrade.objects.filter(
+                student__course=cohort
+            ).select_related("student__user")
+        }
+        student_count += len(students)
+        if not students:
+            continue
+
+        for plan, student_ids, matrix in load_cohort_matrices(cohort, students):
+            current_totals, _ = matrix.score()
+            proposed_totals, _ = matrix.score(
+                plan.with_weightages(rubrics=rubrics, criteria=criteria)
+            )
+            for row, student_id in enumerate(student_ids):
+                current_total = round(float(current_totals[row]), 1)
+                proposed_total = round(float(proposed_totals[row]), 1)
+                current_letter = letter(current_bands, current_total)
+                proposed_letter = letter(proposed_bands, proposed_total)
+                counts = shift.setdefault(current_letter, Counter())
+                counts[proposed_letter] += 1
+
+                if (current_total, current_letter) != (proposed_total, proposed_letter):
+                    affected.append(
+                        {
+                            "student_id": student_id,
+                            "student": students[student_id].user.name,
+                            "course": cohort,
+                            "mode": plan.mode,
+                            "current_total": current_total,
+                            "proposed_total": proposed_total,
+                            "current_grade": current_letter,
+                            "proposed_grade": proposed_letter,
+                        }
+                    )
+
+    affected.sort(
+        key=lambda row: (
+            row["current_grade"] == row["proposed_grade"],
+            -abs(row["proposed_total"] - row["current_total"]),
+        )
+    )
+    return {
+        "course": course if len(courses) == 1 else "all",
+        "students": student_count,
+        "totals_changed": sum(
+            row["current_total"] != row["proposed_total"] for row in affected
+        ),
+        "letters_changed": sum(
+            row["current_grade"] != row["proposed_grade"] for row in affected
+        ),
+        "shift": {current: dict(counts) for current, counts in shift.items()},
+        "affected": affected,
+    }
+
+
+def parse_simulation(data, courses):
+    """Keyword arguments for ``simulate_grading`` from a request payload."""
+    bands = data.get("bands")
+    return {
+        "rubrics": parse_weightages(data.get("rubrics") or {}, Rubric, courses),
+        "criteria": parse_weightages(data.get("criteria") or {}, Criteria, courses),
+        "bands": parse_bands(bands) if bands is not None else None,
+    }
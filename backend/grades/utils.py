@@ -0,0 +1,38 @@
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import BasePermission
+
+from users.models import CourseCoordinator, Student
+
+COURSES = ("FYP1", "FYP2")
+MODES = tuple(value for value, label in Student.MODE_CHOICES)
+
+
+class IsCourseCoordinator(BasePermission):
+    def has_permission(self, request, view):
+        user = request.user
+        return user.is_authenticated and (
+            user.is_superuser or CourseCoordinator.objects.filter(user=user).exists()
+        )
+
+
+def get_cohort_scope(request, params=None):
+    """
+    ``(course, mode)`` from ``params`` (the query params by default), limited
+    to the coordinator's own course unless they coordinate both. ``None``
+    means all.
+    """
+    # request.GET so admin views can share this with the API
+    params = request.GET if params is None else params
+    course = params.get("course") or None
+    mode = params.get("mode") or None
+    if course is not None and course not in COURSES:
+        raise ValidationError({"course": f"Must be one of {', '.join(COURSES)}."})
+    if mode is not None and mode not in MODES:
+        raise ValidationError({"mode": f"Must be one of {', '.join(MODES)}."})
+
+    coordinator = CourseCoordinator.objects.filter(user=request.user).first()
+    if coordinator is not None and coordinator.course != "Both":
+        if course is not None and course != coordinator.course:
+            raise PermissionDenied("You can only view your own course.")
+        course = coordinator.course
+    return course, mode
@@ -1,12 +1,20 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
-from .models import Criteria, Rubric, StudentMark, StudentGrade
+from .models import Criteria, Rubric, StudentMark, StudentGrade, StudentRubricScore
 from users.models import CourseCoordinator, Student, User
-from .serializers import RubricSerializer, TotalMarksSerializer, MarkingSchemeSerializer
+from .agreement import get_agreement_report
+from .analytics import get_cohort_analytics
+from .pagination import KeysetPagination
+from .schemes import get_course_schemes, get_grading_sheet, get_marking_scheme
+from .serializers import TotalMarksSerializer
+from .signals import suspend_grade_updates
+from .simulator import parse_simulation, simulate_grading
+from .utils import COURSES, IsCourseCoordinator, get_cohort_scope
 from django.db import transaction
-from django.db.models import Prefetch, Q
+from django.db.models import Prefetch
 
 
 class GetMarkingSchemeView(APIView):
@@ -27,20 +35,10 @@ class GetMarkingSchemeView(APIView):
                     {"error": "User role not found"}, status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Initialize rubric query with criteria filtered by mode
-            rubric_query = Rubric.objects.filter(
-                course=student.course
-            ).prefetch_related(
-                Prefetch(
-                    "criterias",
-                    queryset=Criteria.objects.filter(mode__in=[student.mode, "both"]),
-                )
-            )
-
-            if user == student.supervisor:
-                rubric_query = rubric_query.filter(pic__contains=["supervisor"])
-            elif user in student.evaluators.all():
-                rubric_query = rubric_query.filter(pic__contains=["examiner"])
+            if user.id == student.supervisor_id:
+                role = "supervisor"
+            elif student.evaluators.filter(id=user.id).exists():
+                role = "examiner"
             else:
                 return Response(
                     {
@@ -49,16 +47,10 @@ class GetMarkingSchemeView(APIView):
                     status=status.HTTP_403_FORBIDDEN,
                 )
 
-            # Filter rubrics to only include those with non-empty criteria
-            rubrics = [
-                rubric
-                for rubric in rubric_query.order_by("steps")
-                if rubric.criterias.exists()
-            ]
-
-            # Serialize and return the filtered rubrics
-            serializer = RubricSerializer(rubrics, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            # Rubrics for this role with non-empty criteria, served from the
+            # versioned scheme cache
+            scheme = get_marking_scheme(student.course, student.mode, role)
+            return Response(scheme, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -74,28 +66,27 @@ class GetGradesView(APIView):
                     status=status.HTTP_401_UNAUTHORIZED,
                 )
 
-            rubrics = Rubric.objects.filter(course=student.course).order_by("steps")
-            result = []
-            for rubric in rubrics:
-                # Filter criteria by mode
-                criteria_list = rubric.criterias.filter(
-                    mode__in=[student.mode, "both"]
-                ).order_by("id")
-                # Fetch marks for the student, rubric, and authenticated user as evaluator
-                marks = StudentMark.objects.filter(
-                    student=student, criteria__rubric=rubric, evaluator=user
-                ).order_by("criteria__id")
+            sheet = get_grading_sheet(student.course, student.mode)
 
-                # If marks exist, use them; otherwise, initialize with zeros
-                if marks.exists():
-                    grades = [mark.mark for mark in marks]
-                else:
-                    # Initialize grades with zeros for each criterion in the rubric
-                    grades = [0] * criteria_list.count()
-
-                result.append(
-                    {"scheme": RubricSerializer(rubric).data, "grades": grades}
+            # Fetch all of this evaluator's marks for the student at once
+            marks_by_rubric = {}
+            for rubric_id, mark in (
+                StudentMark.objects.filter(
+                    student=student,
+                    evaluator=user,
+                    criteria__rubric_id__in=[rubric_id for rubric_id, _, _ in sheet],
                 )
+                .order_by("criteria__id", "id")
+                .values_list("criteria__rubric_id", "mark")
+            ):
+                marks_by_rubric.setdefault(rubric_id, []).append(mark)
+
+            result = []
+            for rubric_id, scheme, criteria_count in sheet:
+                # If marks exist, use them; otherwise, initialize with zeros
+                # for each criterion in the rubric
+                grades = marks_by_rubric.get(rubric_id) or [0] * criteria_count
+                result.append({"scheme": scheme, "grades": grades})
             return Response(result, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -108,50 +99,65 @@ class SaveGradesView(APIView):
             user = get_object_or_404(User, id=request.data.get("user_id"))
             grades_data = request.data.get("grades", [])
 
-            with transaction.atomic():
-                # Delete existing marks for the rubrics being updated
-                rubric_ids = [grade_entry["scheme_id"] for grade_entry in grades_data]
-                StudentMark.objects.filter(
-                    student=student, evaluator=user, criteria__rubric__id__in=rubric_ids
-                ).delete()
-
-                # Save new marks
-                for grade_entry in grades_data:
-                    rubric = get_object_or_404(Rubric, id=grade_entry["scheme_id"])
-                    criteria_list = rubric.criterias.filter(
+            # Validate every rubric payload against one prefetched rubric map
+            # before anything is written
+            rubric_ids = [int(grade_entry["scheme_id"]) for grade_entry in grades_data]
+            rubrics = Rubric.objects.filter(id__in=rubric_ids).prefetch_related(
+                Prefetch(
+                    "criterias",
+                    queryset=Criteria.objects.filter(
                         mode__in=[student.mode, "both"]
-                    ).order_by("id")
-                    grades = grade_entry["grades"]
+                    ).order_by("id"),
+                )
+            )
+            rubric_map = {rubric.id: rubric for rubric in rubrics}
+
+            new_marks = []
+            for rubric_id, grade_entry in zip(rubric_ids, grades_data):
+                rubric = rubric_map.get(rubric_id)
+                if rubric is None:
+                    return Response(
+                        {"error": "No Rubric matches the given query."},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+                criteria_list = rubric.criterias.all()
+                grades = grade_entry["grades"]
+
+                if len(grades) != len(criteria_list):
+                    return Response(
+                        {
+                            "error": f"Invalid number of grades for rubric {rubric.label}"
+                        },
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
 
-                    if len(grades) != len(criteria_list):
+                for criteria, mark in zip(criteria_list, grades):
+                    if mark == 0:
+                        continue
+                    if not (0 <= mark <= criteria.max_mark):
                         return Response(
                             {
-                                "error": f"Invalid number of grades for rubric {rubric.label}"
+                                "error": f"Mark {mark} for {criteria.label} is out of range"
                             },
                             status=status.HTTP_400_BAD_REQUEST,
                         )
-
-                    for idx, (criteria, mark) in enumerate(zip(criteria_list, grades)):
-                        if mark == 0:
-                            continue
-                        if not (0 <= mark <= criteria.max_mark):
-                            return Response(
-                                {
-                                    "error": f"Mark {mark} for {criteria.label} is out of range"
-                                },
-                                status=status.HTTP_400_BAD_REQUEST,
-                            )
-                        StudentMark.objects.create(
-                            student=student,
-                            criteria=criteria,
-                            evaluator=user,
-                            mark=mark,
-                        )
-
-                    student_grade, created = StudentGrade.objects.get_or_create(
-                        student=student, defaults={"total_mark": 0}
+                    student_mark = StudentMark(
+                        student=student, criteria=criteria, evaluator=user, mark=mark
                     )
-                    student_grade.recalculate_total_mark()
+                    # bulk_create skips save(), so round and validate here
+                    student_mark.clean()
+                    new_marks.append(student_mark)
+
+            # Grade maintenance is deferred so the student's grade is
+            # recomputed once for the whole submission
+            with transaction.atomic(), suspend_grade_updates() as batch:
+                # Replace this evaluator's marks for the submitted rubrics
+                StudentMark.objects.filter(
+                    student=student, evaluator=user, criteria__rubric__id__in=rubric_ids
+                ).delete()
+                StudentMark.objects.bulk_create(new_marks)
+                if grades_data:
+                    batch.touch(student.id)
 
             return Response(
                 {"message": "Grades saved successfully"}, status=status.HTTP_200_OK
@@ -161,53 +167,66 @@ class SaveGradesView(APIView):
 
 
 class GetAllTotalMarksView(APIView):
+    """
+    Total marks visible to the user, one keyset page at a time.
+
+    Query params: ``course`` and ``mode`` filter the students, ``ordering`` is
+    ``total_mark`` or ``-total_mark`` (default), ``limit`` sets the page size and
+    ``cursor`` is the ``next`` token of the previous page.
+    """
+
     def get(self, request):
         try:
             user = request.user
             # Check if user is a CourseCoordinator
             is_course_coordinator = CourseCoordinator.objects.filter(user=user).exists()
 
-            if is_course_coordinator:
-                grades = (
-                    StudentGrade.objects.select_related("student", "grade")
-                    .prefetch_related(
-                        Prefetch(
-                            "student__studentmark_set",
-                            queryset=StudentMark.objects.select_related(
-                                "criteria__rubric"
-                            ),
-                        )
-                    )
-                    .distinct()
-                    .all()
+            grades = StudentGrade.objects.select_related(
+                "student__user", "grade"
+            ).prefetch_related(
+                Prefetch(
+                    "student__rubric_scores",
+                    queryset=StudentRubricScore.objects.select_related(
+                        "rubric"
+                    ).order_by("rubric__steps", "rubric_id"),
                 )
+            )
 
-            else:
-                grades = (
-                    StudentGrade.objects.select_related("student", "grade")
-                    .prefetch_related(
-                        Prefetch(
-                            "student__studentmark_set",
-                            queryset=StudentMark.objects.select_related(
-                                "criteria__rubric"
-                            ),
-                        )
-                    )
-                    .filter(Q(student__supervisor=user) | Q(student__evaluators=user))
-                    .distinct()
-                    .all()
+            if not is_course_coordinator:
+                # Supervised students UNION evaluated students; the union
+                # removes duplicates, so no DISTINCT over the M2M join rows
+                supervised = Student.objects.filter(supervisor=user).values("id")
+                evaluated = Student.evaluators.through.objects.filter(user=user).values(
+                    "student_id"
                 )
+                grades = grades.filter(student_id__in=supervised.union(evaluated))
 
-            print(
-                f"Found {grades.count()} student grades for user {user.id} (Course Coordinator: {is_course_coordinator})"
-            )
+            course = request.query_params.get("course")
+            if course:
+                grades = grades.filter(student__course=course)
+            mode = request.query_params.get("mode")
+            if mode:
+                grades = grades.filter(student__mode=mode)
 
-            if not grades.exists():
-                return Response([], status=status.HTTP_200_OK)
+            ordering = request.query_params.get("ordering", "-total_mark")
+            if ordering not in ("total_mark", "-total_mark"):
+                return Response(
+                    {"error": "ordering must be total_mark or -total_mark"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            paginator = KeysetPagination(
+                "total_mark", descending=ordering.startswith("-")
+            )
+            page, next_cursor = paginator.paginate(grades, request)
 
-            serializer = TotalMarksSerializer(grades, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            serializer = TotalMarksSerializer(page, many=True)
+            return Response(
+                {"results": serializer.data, "next": next_cursor},
+                status=status.HTTP_200_OK,
+            )
 
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             print(f"Error in GetAllTotalMarksView: {e}")
             return Response(
@@ -220,15 +239,13 @@ class GetMarkingSchemeGradesView(APIView):
     def get(self, request):
         course = request.query_params.get("course", "")
         try:
+            schemes = get_course_schemes(course)
             if course:
-                rubrics = Rubric.objects.filter(course=course).order_by("steps")
-                print(f"Found {rubrics.count()} rubrics for course {course}")
+                print(f"Found {len(schemes)} rubrics for course {course}")
             else:
-                rubrics = Rubric.objects.all().order_by("course", "steps")
-                print(f"Found {rubrics.count()} total rubrics")
+                print(f"Found {len(schemes)} total rubrics")
 
-            serializer = MarkingSchemeSerializer(rubrics, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return Response(schemes, status=status.HTTP_200_OK)
 
         except Exception as e:
             print(f"Error in GetMarkingSchemeGradesView: {e}")
@@ -236,3 +253,92 @@ class GetMarkingSchemeGradesView(APIView):
                 {"error": f"Failed to fetch marking schemes: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+class CohortAnalyticsView(APIView):
+    """
+    Grade distribution for a course and mode: total mark histogram, counts
+    per grade letter and mean/median/std per rubric and per criterion.
+    """
+
+    permission_classes = [IsCourseCoordinator]
+
+    def get(self, request):
+        course, mode = get_cohort_scope(request)
+        try:
+            bin_width = int(request.query_params.get("bin_width", 10))
+        except ValueError:
+            bin_width = 0
+        if not 1 <= bin_width <= 50:
+            return Response(
+                {"error": "bin_width must be a whole number between 1 and 50"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            analytics = get_cohort_analytics(course, mode, bin_width)
+            return Response(analytics, status=status.HTTP_200_OK)
+        except Exception as e:
+            print(f"Error in CohortAnalyticsView: {e}")
+            return Response(
+                {"error": f"Failed to compute analytics: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class InterRaterReportView(APIView):
+    """
+    How consistently evaluators mark the same students: per-evaluator mean
+    offset from the other raters, ICC(1) per rubric and outlying marks.
+    """
+
+    permission_classes = [IsCourseCoordinator]
+
+    def get(self, request):
+        course, mode = get_cohort_scope(request)
+        try:
+            report = get_agreement_report(course, mode)
+            return Response(report, status=status.HTTP_200_OK)
+        except Exception as e:
+            print(f"Error in InterRaterReportView: {e}")
+            return Response(
+                {"error": f"Failed to compute inter-rater report: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class SimulateGradingView(APIView):
+    """
+    What-if grading: re-score the cohort with proposed rubric/criteria
+    weightages and grade bands without saving anything.
+
+    Body: ``{"course": "FYP1", "rubrics": {id: weightage}, "criteria":
+    {id: weightage}, "bands": [{"grade_letter", "min_mark", "max_mark"}]}``,
+    every key optional.
+    """
+
+    permission_classes = [IsCourseCoordinator]
+
+    def post(self, request):
+        if not isinstance(request.data, dict):
+            return Response(
+                {"error": "Expected a JSON object."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        course, _ = get_cohort_scope(request, request.data)
+        try:
+            proposal = parse_simulation(
+                request.data, [course] if course else list(COURSES)
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = simulate_grading(course, **proposal)
+            return Response(result, status=status.HTTP_200_OK)
+        except Exception as e:
+            print(f"Error in SimulateGradingView: {e}")
+            return Response(
+                {"error": f"Failed to simulate grading: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
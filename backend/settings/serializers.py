@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from documents.previews import preview_urls
 from .models import (
     Outline,
     documentModes,
@@ -9,10 +10,11 @@ from .models import (
 
 class OutlineSerializer(serializers.ModelSerializer):
     src = serializers.SerializerMethodField()
+    previews = serializers.SerializerMethodField()
 
     class Meta:
         model = Outline
-        fields = ["id", "label", "src"]
+        fields = ["id", "label", "src", "previews"]
 
     def get_src(self, obj):
         request = self.context.get("request")
@@ -20,6 +22,9 @@ class OutlineSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.src.url)
         return None
 
+    def get_previews(self, obj):
+        return preview_urls(self.context.get("request"), "outline", obj.src, obj.id)
+
 
 class documentModeSerializer(serializers.ModelSerializer):
     class Meta:
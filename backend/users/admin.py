@@ -3,7 +3,7 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.http import HttpResponseRedirect
 from django.urls import path, reverse
 import urllib
-from documents.models import Logbook, StudentSubmission
+from archives.archiving import archive_students
 from .forms import (
     CustomUserChangeForm,
     CustomUserCreationForm,
@@ -612,9 +612,9 @@ class StudentAdmin(ImportExportModelAdmin):
         for student in queryset.filter(course="FYP1"):
             try:
                 with transaction.atomic():
-                    # Delete related data from models with ForeignKey to Student
-                    Logbook.objects.filter(student=student).delete()
-                    StudentSubmission.objects.filter(student=student).delete()
+                    # Archive the FYP1 marks, grade, logbooks and submissions
+                    # before they leave the live tables
+                    archive_students([student], user=request.user)
 
                     # Clear many-to-many relationships (e.g., evaluators)
                     student.evaluators.clear()
@@ -634,20 +634,19 @@ class StudentAdmin(ImportExportModelAdmin):
 
         self.message_user(
             request,
-            f"{promoted_count} student(s) promoted to FYP2 and related data cleared.",
+            f"{promoted_count} student(s) promoted to FYP2 and related data archived.",
             messages.SUCCESS if promoted_count > 0 else messages.ERROR,
         )
 
-    @admin.action(description="Deactivate selected students and delete related data")
+    @admin.action(description="Deactivate selected students and archive related data")
     def deactivate(self, request, queryset):
         updated_count = 0
         for student in queryset:
             if student.user.is_active:  # Only process active students
                 try:
                     with transaction.atomic():
-                        # Delete related data from models with ForeignKey to Student
-                        Logbook.objects.filter(student=student).delete()
-                        StudentSubmission.objects.filter(student=student).delete()
+                        # Archive related data before it leaves the live tables
+                        archive_students([student], user=request.user)
 
                         # Clear many-to-many relationships (e.g., evaluators)
                         student.evaluators.clear()
@@ -669,7 +668,7 @@ class StudentAdmin(ImportExportModelAdmin):
 
         self.message_user(
             request,
-            f"{updated_count} student(s) deactivated, marked as 'Inactive', and related data deleted.",
+            f"{updated_count} student(s) deactivated, marked as 'Inactive', and related data archived.",
             messages.SUCCESS if updated_count > 0 else messages.ERROR,
         )
 
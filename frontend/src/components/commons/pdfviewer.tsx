@@ -1,10 +1,11 @@
 import "./pdfworker";
 import { Document, Page, DocumentProps } from "react-pdf";
-import { useState } from "react";
+import { useMemo, useState } from "react";
 import { useContainerWidth } from "./containerWidth";
 import { Box, IconButton } from "@mui/material";
 import AddIcon from "@mui/icons-material/Add";
 import RemoveIcon from "@mui/icons-material/Remove";
+import { ACCESS_TOKEN } from "../../api/constants";
 
 interface PDFViewerProps {
   src: string;
@@ -24,6 +25,14 @@ const PDFViewer: React.FC<PDFViewerProps> = ({
 
   const isImage = /\.(jpg|jpeg|png|gif|bmp|webp)$/i.test(src);
 
+  // The /files/ endpoint needs the token; it answers range requests, so
+  // pdf.js only fetches the parts of the PDF it is showing
+  const file = useMemo(() => {
+    const token = localStorage.getItem(ACCESS_TOKEN);
+    if (!token || !src.includes("/files/")) return src;
+    return { url: src, httpHeaders: { Authorization: `Bearer ${token}` } };
+  }, [src]);
+
   const onLoadSuccess: DocumentProps["onLoadSuccess"] = ({ numPages }) => {
     setNumPages(numPages || 0);
   };
@@ -78,7 +87,7 @@ const PDFViewer: React.FC<PDFViewerProps> = ({
           />
         ) : (
           <Document
-            file={src}
+            file={file}
             onLoadSuccess={onLoadSuccess}
             loading={<div style={{ padding: "10px" }}>Loading PDF...</div>}
             error={
@@ -73,7 +73,7 @@ function FileCard({ file }: { file: DocumentType }) {
           <CardMedia
             component="img"
             height="140"
-            image={file.thumbnail_url}
+            image={file.previews?.card ?? file.thumbnail_url}
             alt={file.title || "Document thumbnail"}
           />
         ) : (
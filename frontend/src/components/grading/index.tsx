@@ -22,7 +22,7 @@ export const GradingPage = () => {
     const fetchDoc = async () => {
       try {
         const src = await getMarkingSchemeDoc(studentId);
-        setPdfUrl(src.data.src);
+        setPdfUrl(src.data.stream_url ?? src.data.src);
         setIsLoading(false);
       } catch (error) {
         console.error("Error fetching PDF:", error);
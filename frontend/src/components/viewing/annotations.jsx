@@ -0,0 +1,216 @@
+import { fabric } from "fabric";
+
+// Conversion between the fabric canvas of each page and the vector
+// annotations the backend stores and stamps onto the submission PDF.
+// Canvas units are PDF points, as the canvas is sized to the page at scale 1.
+
+const round = (value) => Math.round(value * 100) / 100;
+
+const toHex = (colour) => {
+  if (!colour || typeof colour !== "string") return null;
+  const parsed = new fabric.Color(colour);
+  if (parsed.getAlpha() === 0) return null;
+  return `#${parsed.toHex().toLowerCase()}`;
+};
+
+const bounds = (obj) => {
+  const left = obj.left || 0;
+  const top = obj.top || 0;
+  const width = (obj.width || 0) * (obj.scaleX || 1);
+  const height = (obj.height || 0) * (obj.scaleY || 1);
+  return [round(left), round(top), round(left + width), round(top + height)];
+};
+
+const pathPoints = (obj) => {
+  // Free drawing stores absolute points; left/top move with the object
+  const points = [];
+  (obj.path || []).forEach((command) => {
+    if (command.length >= 3) {
+      points.push(command[command.length - 2], command[command.length - 1]);
+    }
+  });
+  if (points.length < 4) return null;
+  const xs = points.filter((_, i) => i % 2 === 0);
+  const ys = points.filter((_, i) => i % 2 === 1);
+  const half = (obj.strokeWidth || 0) / 2;
+  const minX = Math.min(...xs);
+  const minY = Math.min(...ys);
+  return points.map((value, i) =>
+    i % 2 === 0
+      ? round(obj.left + half + (value - minX) * (obj.scaleX || 1))
+      : round(obj.top + half + (value - minY) * (obj.scaleY || 1))
+  );
+};
+
+const toAnnotation = (obj, page) => {
+  const opacity = obj.opacity ?? 1;
+  const stroke = toHex(obj.stroke);
+  const fill = toHex(obj.fill);
+  const width = stroke ? obj.strokeWidth || 1 : 0;
+
+  switch (obj.type) {
+    case "rect":
+      // The highlight tool draws translucent rectangles without a border
+      if (!stroke) {
+        return fill
+          ? {
+              type: "highlight",
+              page,
+              rect: bounds(obj),
+              colour: fill,
+              opacity,
+            }
+          : null;
+      }
+      return {
+        type: "rect",
+        page,
+        rect: bounds(obj),
+        colour: stroke,
+        fill,
+        width,
+        opacity,
+      };
+    case "circle":
+    case "ellipse": {
+      const [x0, y0] = bounds(obj);
+      const rx = (obj.rx ?? obj.radius) * (obj.scaleX || 1);
+      const ry = (obj.ry ?? obj.radius) * (obj.scaleY || 1);
+      return {
+        type: "ellipse",
+        page,
+        rect: [x0, y0, round(x0 + 2 * rx), round(y0 + 2 * ry)],
+        colour: stroke || fill || "#000000",
+        fill,
+        width,
+        opacity,
+      };
+    }
+    case "textbox":
+    case "i-text":
+    case "text":
+      return {
+        type: "text",
+        page,
+        rect: bounds(obj),
+        text: obj.text || "",
+        colour: fill || "#000000",
+        font_size: round((obj.fontSize || 12) * (obj.scaleY || 1)),
+        opacity,
+      };
+    case "path": {
+      const points = pathPoints(obj);
+      return points
+        ? {
+            type: "ink",
+            page,
+            points,
+            colour: stroke || "#000000",
+            width,
+            opacity,
+          }
+        : null;
+    }
+    default:
+      // Pictures and sticky-note images have no vector form
+      return null;
+  }
+};
+
+export const toAnnotations = (edits) => {
+  const annotations = [];
+  Object.entries(edits).forEach(([page, state]) => {
+    (state?.objects || []).forEach((obj) => {
+      const annotation = toAnnotation(obj, Number(page));
+      if (annotation) annotations.push(annotation);
+    });
+  });
+  return annotations;
+};
+
+const toObject = (annotation) => {
+  const common = {
+    opacity: annotation.opacity,
+    editable: true,
+    cornerStyle: "circle",
+  };
+  if (annotation.rect) {
+    const [x0, y0, x1, y1] = annotation.rect;
+    Object.assign(common, { left: x0, top: y0 });
+    switch (annotation.type) {
+      case "highlight":
+        return {
+          ...common,
+          type: "rect",
+          width: x1 - x0,
+          height: y1 - y0,
+          fill: annotation.colour,
+          strokeWidth: 0,
+        };
+      case "rect":
+        return {
+          ...common,
+          type: "rect",
+          width: x1 - x0,
+          height: y1 - y0,
+          fill: annotation.fill || "transparent",
+          stroke: annotation.colour,
+          strokeWidth: annotation.width,
+        };
+      case "ellipse":
+        return {
+          ...common,
+          type: "ellipse",
+          rx: (x1 - x0) / 2,
+          ry: (y1 - y0) / 2,
+          fill: annotation.fill || "transparent",
+          stroke: annotation.colour,
+          strokeWidth: annotation.width,
+        };
+      case "text":
+        return {
+          ...common,
+          type: "textbox",
+          width: x1 - x0,
+          text: annotation.text,
+          fill: annotation.colour,
+          fontSize: annotation.font_size,
+          fontFamily: "Times New Roman",
+        };
+      default:
+        return null;
+    }
+  }
+  const [first, ...rest] = annotation.points;
+  const path = [["M", first, rest[0]]];
+  for (let i = 1; i < rest.length; i += 2) {
+    path.push(["L", rest[i], rest[i + 1]]);
+  }
+  const xs = annotation.points.filter((_, i) => i % 2 === 0);
+  const ys = annotation.points.filter((_, i) => i % 2 === 1);
+  const half = annotation.width / 2;
+  return {
+    ...common,
+    type: "path",
+    path,
+    left: Math.min(...xs) - half,
+    top: Math.min(...ys) - half,
+    fill: null,
+    stroke: annotation.colour,
+    strokeWidth: annotation.width,
+    strokeLineCap: "round",
+    strokeLineJoin: "round",
+  };
+};
+
+// Saved annotations as the per-page canvas states of CanvasProvider's edits
+export const toEdits = (annotations) => {
+  const edits = {};
+  annotations.forEach((annotation) => {
+    const obj = toObject(annotation);
+    if (!obj) return;
+    edits[annotation.page] = edits[annotation.page] || { objects: [] };
+    edits[annotation.page].objects.push(obj);
+  });
+  return edits;
+};
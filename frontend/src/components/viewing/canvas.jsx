@@ -2,6 +2,12 @@ import React, { useRef, useEffect, useState } from "react";
 import { fabric } from "fabric";
 import jsPDF from "jspdf";
 import html2canvas from "html2canvas";
+import {
+  downloadAnnotatedFeedback,
+  getAnnotations,
+  saveAnnotations,
+} from "../../services";
+import { toAnnotations, toEdits } from "./annotations";
 
 const funButtons = React.createContext();
 
@@ -21,6 +27,8 @@ export const CanvasProvider = ({ children }) => {
   const [hideCanvas, setHiddenCanvas] = useState(false);
   const [pageCanvases, setPageCanvases] = useState({});
   const [edits, setEdits] = useState({});
+  const [submissionId, setSubmissionId] = useState(null);
+  const [annotationVersion, setAnnotationVersion] = useState(0);
   const [isHighlightMode, setIsHighlightMode] = useState(false);
   const [isDrawingMode, setIsDrawingMode] = useState(false);
   const [highlightWidth, setHighlightWidth] = useState(400); // Default width
@@ -233,91 +241,46 @@ export const CanvasProvider = ({ children }) => {
     brush.width = strokeWidth;
   };
 
+  const loadAnnotations = async (canvi, submission) => {
+    setSubmissionId(submission);
+    try {
+      const data = await getAnnotations(submission);
+      const saved = toEdits(data.annotations);
+      setEdits(saved);
+      setAnnotationVersion(data.annotation_version);
+      if (saved[1]) canvi.loadFromJSON(saved[1], () => canvi.renderAll());
+    } catch (error) {
+      console.error("Error loading annotations:", error);
+    }
+  };
+
+  // Annotations are saved as vectors and stamped onto the original PDF by
+  // the server, instead of rasterising every page here
   const exportPdf = async () => {
+    if (!submissionId) return;
     setExporting(true);
-    const pdf = new jsPDF({
-      orientation: "portrait",
-      unit: "mm",
-      format: "a4",
-    });
-
-    // Save the current page's canvas state before exporting
-    setEdits((prevEdits) => ({
-      ...prevEdits,
-      [currPage]: canvas.toObject(),
-    }));
-
-    let pageIndex = 1;
-    const totalPages = numPages;
-
-    const exportNextPage = async () => {
-      if (pageIndex > totalPages) {
-        pdf.save("marked_submission.pdf");
-        setExporting(false);
-        return;
-      }
-
-      setCurrPage(pageIndex);
-      await new Promise((resolve) => setTimeout(resolve, 500));
-
-      // Fully clear the canvas before loading the new page
-      canvas.clear();
-      canvas.setBackgroundColor("rgba(0,0,0,0)", () => {
-        canvas.renderAll();
-      });
-
-      if (edits[pageIndex]) {
-        canvas.loadFromJSON(edits[pageIndex], () => {
-          canvas.renderAll();
-
-          setTimeout(() => {
-            const docElement = document.querySelector("#singlePageExport");
-            if (!docElement) {
-              console.error("Error: Element #singlePageExport not found.");
-              setExporting(false);
-              return;
-            }
-
-            html2canvas(docElement, { scale: 2, useCORS: true }).then((canvas) => {
-              const imgData = canvas.toDataURL("image/png");
-              const imgWidth = 210;
-              const imgHeight = (canvas.height * imgWidth) / canvas.width;
-
-              if (pageIndex > 1) {
-                pdf.addPage();
-              }
-              pdf.addImage(imgData, "PNG", 0, 0, imgWidth, imgHeight);
-
-              pageIndex += 1;
-              exportNextPage();
-            });
-          }, 600);
-        });
+    const allEdits = { ...edits, [currPage]: canvas.toObject() };
+    setEdits(allEdits);
+
+    try {
+      const data = await saveAnnotations(
+        submissionId,
+        toAnnotations(allEdits),
+        annotationVersion
+      );
+      setAnnotationVersion(data.annotation_version);
+      if (data.annotated_url) await downloadAnnotatedFeedback(data.id);
+    } catch (error) {
+      if (error.response?.status === 409) {
+        alert(
+          "These annotations were changed in another window. Reload to see the latest version."
+        );
       } else {
-        const docElement = document.querySelector("#singlePageExport");
-        if (!docElement) {
-          console.error("Error: Element #singlePageExport not found.");
-          setExporting(false);
-          return;
-        }
-
-        html2canvas(docElement, { scale: 2, useCORS: true }).then((canvas) => {
-          const imgData = canvas.toDataURL("image/png");
-          const imgWidth = 210;
-          const imgHeight = (canvas.height * imgWidth) / canvas.width;
-
-          if (pageIndex > 1) {
-            pdf.addPage();
-          }
-          pdf.addImage(imgData, "PNG", 0, 0, imgWidth, imgHeight);
-
-          pageIndex += 1;
-          exportNextPage();
-        });
+        console.error("Error saving annotations:", error);
       }
-    };
-
-    exportNextPage();
+    } finally {
+      setExporting(false);
+    }
   };
 
   return (
@@ -344,6 +307,7 @@ export const CanvasProvider = ({ children }) => {
         deleteBtn,
         exportPage,
         exportPdf,
+        loadAnnotations,
         downloadPage,
         isExporting,
         borderColor,
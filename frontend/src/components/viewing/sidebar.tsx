@@ -242,7 +242,10 @@ export default function SideBar() {
                   />
                 </div>
               </Tooltip>
-              <Tooltip title="Download Whole PDF" placement="left">
+              <Tooltip
+                title="Save Annotations and Download PDF"
+                placement="left"
+              >
                 <div>
                   <SaveAsRounded
                     sx={{ color: "secondary.main" }}
@@ -16,7 +16,9 @@ interface FileUploadProps {
 
 export default function FileUpload({ student, submission }: FileUploadProps) {
   const contextValues = useButtons();
-  const [source, setSource] = useState<{ file: string } | null>(null);
+  const [source, setSource] = useState<{ id: number; file: string } | null>(
+    null
+  );
   const [docIsLoading, setDocIsLoading] = useState<boolean>(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -82,7 +84,9 @@ export default function FileUpload({ student, submission }: FileUploadProps) {
         const pageWidth = viewport.width;
         const pageHeight = viewport.height;
 
-        contextValues.setCanvas(initCanvas(pageWidth, pageHeight));
+        const canvas = initCanvas(pageWidth, pageHeight);
+        contextValues.setCanvas(canvas);
+        contextValues.loadAnnotations(canvas, source!.id);
         setTimeout(() => setDocIsLoading(false), 1000); // Reduced timeout for faster feedback
       });
     });
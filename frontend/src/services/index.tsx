@@ -336,6 +336,42 @@ export const uploadFeedback = async ({
   });
 };
 
+export const getAnnotations = async (submissionId: number) => {
+  const { data } = await api.get(`feedback/annotations/${submissionId}/`);
+  return data;
+};
+
+// Replaces the reviewer's annotations on a submission; the server answers
+// 409 when `version` is not the one it holds
+export const saveAnnotations = async (
+  submissionId: number,
+  annotations: object[],
+  version: number
+) => {
+  const { data } = await api.put(`feedback/annotations/${submissionId}/`, {
+    annotations,
+    version,
+  });
+  return data;
+};
+
+export const downloadAnnotatedFeedback = async (
+  feedbackId: number,
+  filename = "marked_submission.pdf"
+) => {
+  const response = await api.get(`feedback/${feedbackId}/annotated/`, {
+    responseType: "blob",
+  });
+  const url = window.URL.createObjectURL(new Blob([response.data]));
+  const link = document.createElement("a");
+  link.href = url;
+  link.setAttribute("download", filename);
+  document.body.appendChild(link);
+  link.click();
+  document.body.removeChild(link);
+  window.URL.revokeObjectURL(url);
+};
+
 export const deleteFeedback = async (feedbackId: number) => {
   try {
     const data = await api.delete(`feedback/delete/${feedbackId}/`);
@@ -408,24 +444,95 @@ export const getUserSubmissionData = async (student: number) => {
   }
 };
 
+type UploadSession = {
+  id: string;
+  size: number;
+  chunk_size: number;
+  received: number;
+  next_chunk: number;
+  complete: boolean;
+};
+
+const CHUNK_RETRIES = 3;
+
+const sha256Hex = async (data: ArrayBuffer) => {
+  const digest = await crypto.subtle.digest("SHA-256", data);
+  return Array.from(new Uint8Array(digest))
+    .map((byte) => byte.toString(16).padStart(2, "0"))
+    .join("");
+};
+
+// Uploads the file in checksummed chunks. A failed chunk is retried, and the
+// session id is kept so a later attempt at the same file resumes where this
+// one stopped instead of starting over.
 export const uploadSubmission = async ({
   studentId,
   file,
   submissionPhaseId,
+  onProgress,
 }: {
   studentId: number;
   file: File;
   submissionPhaseId: number;
+  onProgress?: (fraction: number) => void;
 }) => {
-  const formData = new FormData();
-  formData.append("file", file);
-  formData.append("submission_phase", submissionPhaseId.toString());
+  const resumeKey = `upload:${studentId}:${submissionPhaseId}:${file.name}:${file.size}:${file.lastModified}`;
 
-  return api.post(`/submissions/upload/${studentId}/`, formData, {
-    headers: {
-      "Content-Type": "multipart/form-data",
-    },
-  });
+  let session: UploadSession | null = null;
+  const savedId = localStorage.getItem(resumeKey);
+  if (savedId) {
+    try {
+      session = (await api.get(`/submissions/upload/sessions/${savedId}/`))
+        .data;
+    } catch {
+      // Expired or already completed; start again
+      localStorage.removeItem(resumeKey);
+    }
+  }
+  if (!session) {
+    session = (
+      await api.post(`/submissions/upload/${studentId}/sessions/`, {
+        filename: file.name,
+        size: file.size,
+        submission_phase: submissionPhaseId,
+      })
+    ).data as UploadSession;
+    localStorage.setItem(resumeKey, session.id);
+  }
+
+  let failures = 0;
+  while (!session.complete) {
+    const start = session.next_chunk * session.chunk_size;
+    const chunk = await file
+      .slice(start, start + session.chunk_size)
+      .arrayBuffer();
+    try {
+      const res = await api.put(
+        `/submissions/upload/sessions/${session.id}/chunks/${session.next_chunk}/`,
+        chunk,
+        {
+          headers: {
+            "Content-Type": "application/octet-stream",
+            "X-Chunk-SHA256": await sha256Hex(chunk),
+          },
+        }
+      );
+      session = res.data as UploadSession;
+      failures = 0;
+      onProgress?.(session.received / session.size);
+    } catch (error: any) {
+      if (++failures > CHUNK_RETRIES) throw error;
+      // Ask the server how far it got before sending again
+      session = (await api.get(`/submissions/upload/sessions/${session.id}/`))
+        .data as UploadSession;
+    }
+  }
+
+  const response = await api.post(
+    `/submissions/upload/sessions/${session.id}/complete/`
+  );
+  localStorage.removeItem(resumeKey);
+  return response;
 };
 
 export const deleteSubmission = async (
@@ -597,9 +704,20 @@ export const updateStudentTopic = async (
   );
 };
 
-export const fetchAllTotalMarks = async (): Promise<TotalMarks[]> => {
-  const response = await api.get("/grades/total-marks/");
-  return response.data;
+export const fetchAllTotalMarks = async (
+  params: { course?: string; mode?: string; ordering?: string } = {}
+): Promise<TotalMarks[]> => {
+  // The endpoint is keyset-paginated; follow the cursor until the last page
+  const totalMarks: TotalMarks[] = [];
+  let cursor: string | null = null;
+  do {
+    const response: any = await api.get("/grades/total-marks/", {
+      params: { ...params, limit: 500, ...(cursor ? { cursor } : {}) },
+    });
+    totalMarks.push(...response.data.results);
+    cursor = response.data.next;
+  } while (cursor);
+  return totalMarks;
 };
 
 export const fetchMarkingSchemes = async (
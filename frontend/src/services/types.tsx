@@ -104,11 +104,14 @@ export interface SupervisorsSelectionType {
   hasSavedProof?: boolean;
 }
 
+export type PreviewUrls = Record<"icon" | "card" | "page", string> | null;
+
 interface FileType {
   id: number;
   title: string;
   upload_date: Date;
   src: string;
+  previews?: PreviewUrls;
 }
 
 export interface DocumentType extends FileType {
@@ -116,6 +119,7 @@ export interface DocumentType extends FileType {
   category: string;
   mode: string;
   thumbnail_url: string;
+  thumbnail_status: "pending" | "ready" | "failed" | "skipped";
 }
 
 export interface SubmissionType extends FileType {